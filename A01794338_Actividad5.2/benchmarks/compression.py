@@ -0,0 +1,117 @@
+"""
+Benchmark of computing sales from compressed sales files.
+
+This program generates a large sales file, writes it uncompressed and
+compressed with gzip, bzip2 and xz, and computes the sales of every
+version through the same streaming path used by computeSales. For each
+codec it reports, as JSON:
+
+    - size_bytes: the size of the file on disk.
+    - read_seconds: reading the raw bytes of the file (I/O bound).
+    - decompress_seconds: decompressing those bytes in memory (CPU
+      bound, 0 for the uncompressed file).
+    - parse_seconds: parsing and aggregating the text in memory (CPU
+      bound, the same work for every codec).
+    - end_to_end_seconds: streaming the file from disk to the totals.
+
+Run it twice to time reads from the page cache, or drop the caches in
+between to time reads from the disk.
+
+Usage (from the A01794338_Actividad5.2 directory):
+    python benchmarks/compression.py
+    python benchmarks/compression.py --sales 2000000 --codecs none gz
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from computeSales import compute_results
+from json_stream import CODECS, detect_codec, iter_json_records, open_text
+from sales_data import generate_sales
+from sales_stream import iter_sales
+
+EXTENSIONS = {'none': '', 'gz': '.gz', 'bz2': '.bz2', 'xz': '.xz'}
+
+
+def measure(file_name, prices_dictionary):
+    """
+    Time the I/O, decompression, parsing and end-to-end cost of a file.
+
+    Parameters:
+        file_name (str): The path to the sales file.
+        prices_dictionary (dict): A dictionary containing prices data.
+
+    Returns:
+        dict: The size of the file and the measured times.
+    """
+    start_time = time.perf_counter()
+    with open(file_name, 'rb') as opened_file:
+        raw = opened_file.read()
+    read_seconds = time.perf_counter() - start_time
+
+    codec = detect_codec(file_name)
+    start_time = time.perf_counter()
+    text = (codec.decompress(raw) if codec else raw).decode('utf-8')
+    decompress_seconds = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    _, in_memory_total = compute_results(
+        prices_dictionary, iter_json_records(io.StringIO(text)))
+    parse_seconds = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    _, total_sales = compute_results(prices_dictionary, iter_sales(file_name))
+    end_to_end_seconds = time.perf_counter() - start_time
+    assert total_sales == in_memory_total, 'Totals differ'
+
+    return {'size_bytes': len(raw),
+            'read_seconds': round(read_seconds, 4),
+            'decompress_seconds': round(decompress_seconds if codec else 0,
+                                        4),
+            'parse_seconds': round(parse_seconds, 4),
+            'end_to_end_seconds': round(end_to_end_seconds, 4),
+            'total_sales': total_sales}
+
+
+def main():
+    """
+    Generate the sales files, measure every codec and print the report.
+    """
+    parser = argparse.ArgumentParser(
+        description='Benchmark computing sales from compressed files.')
+    parser.add_argument('--sales', type=int, default=500000,
+                        help='Number of sales records')
+    parser.add_argument('--products', type=int, default=50)
+    parser.add_argument('--codecs', nargs='+', choices=list(EXTENSIONS),
+                        default=list(EXTENSIONS))
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    assert all(EXTENSIONS[codec] in CODECS for codec in args.codecs
+               if codec != 'none'), 'Unsupported codec'
+
+    prices_dictionary, sales = generate_sales(args.sales, args.products,
+                                              args.seed)
+    report = {'config': vars(args), 'codecs': {}}
+    with tempfile.TemporaryDirectory() as directory:
+        for codec in args.codecs:
+            file_name = os.path.join(
+                directory, 'bench.salesRecord.json' + EXTENSIONS[codec])
+            start_time = time.perf_counter()
+            with open_text(file_name, 'w') as opened_file:
+                json.dump(sales, opened_file, indent=2)
+            write_seconds = time.perf_counter() - start_time
+            result = measure(file_name, prices_dictionary)
+            result['write_seconds'] = round(write_seconds, 4)
+            report['codecs'][codec] = result
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark of the sales throughput of the JSON, NDJSON and CSV readers.
+
+This program writes the same generated sales as a JSON array, as
+newline-delimited JSON and as CSV, and times every way computeSales can
+read them:
+
+    - json_array: read_json followed by compute_results.
+    - json_stream: the streaming JSON reader used by sketch mode.
+    - ndjson_records, csv_records: a dictionary per row, as used with
+      validation, group-by or effective-dated prices.
+    - ndjson_pairs, csv_pairs: only the product and quantity of every
+      row, the path used for plain totals.
+    - ndjson_jobs, csv_jobs: the pairs counted by --jobs processes.
+
+Every method must give the same total. The report lists, as JSON, the
+seconds, the records per second and the megabytes per second of each.
+
+Usage (from the A01794338_Actividad5.2 directory):
+    python benchmarks/line_formats.py
+    python benchmarks/line_formats.py --sales 2000000 --jobs 8
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from computeSales import compute_quantity_results, compute_results, read_json
+from sales_lines import count_quantities, iter_sales_records
+from sales_data import generate_sales
+from sales_stream import iter_sales
+
+
+def write_files(directory, sales):
+    """
+    Write the sales as a JSON array, as NDJSON and as CSV.
+
+    Parameters:
+        directory (str): The directory receiving the files.
+        sales (list): The sales records.
+
+    Returns:
+        dict: The formats mapped to the paths of their files.
+    """
+    paths = {name: os.path.join(directory, f'sales.{name}')
+             for name in ('json', 'ndjson', 'csv')}
+    with open(paths['json'], 'w', encoding='utf-8') as opened_file:
+        json.dump(sales, opened_file, indent=2)
+    with open(paths['ndjson'], 'w', encoding='utf-8') as opened_file:
+        for sale in sales:
+            opened_file.write(json.dumps(sale) + '\n')
+    with open(paths['csv'], 'w', encoding='utf-8',
+              newline='') as opened_file:
+        writer = csv.DictWriter(opened_file, fieldnames=list(sales[0]))
+        writer.writeheader()
+        writer.writerows(sales)
+    return paths
+
+
+def main():
+    """
+    Write the sales files, time every reader and print the report.
+    """
+    parser = argparse.ArgumentParser(
+        description='Benchmark the JSON, NDJSON and CSV sales readers.')
+    parser.add_argument('--sales', type=int, default=500000,
+                        help='Number of sales records')
+    parser.add_argument('--products', type=int, default=50)
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    prices_dictionary, sales = generate_sales(args.sales, args.products,
+                                              args.seed)
+    report = {'config': vars(args), 'methods': {}}
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_files(directory, sales)
+        del sales
+        methods = {
+            'json_array': ('json', lambda: compute_results(
+                prices_dictionary, read_json(paths['json']))),
+            'json_stream': ('json', lambda: compute_results(
+                prices_dictionary, iter_sales(paths['json'])))}
+        for name in ('ndjson', 'csv'):
+            path = paths[name]
+            methods[f'{name}_records'] = (name, lambda path=path: (
+                compute_results(prices_dictionary,
+                                iter_sales_records(path))))
+            methods[f'{name}_pairs'] = (name, lambda path=path: (
+                compute_quantity_results(prices_dictionary,
+                                         count_quantities(path))))
+            methods[f'{name}_jobs'] = (name, lambda path=path: (
+                compute_quantity_results(prices_dictionary,
+                                         count_quantities(path,
+                                                          jobs=args.jobs))))
+        totals = set()
+        for method, (name, run) in methods.items():
+            start_time = time.perf_counter()
+            _, total_sales = run()
+            elapsed_time = time.perf_counter() - start_time
+            totals.add(total_sales)
+            size = os.path.getsize(paths[name])
+            report['methods'][method] = {
+                'seconds': round(elapsed_time, 4),
+                'records_per_second': round(args.sales / elapsed_time),
+                'megabytes_per_second': round(size / elapsed_time / 1e6, 1),
+                'file_megabytes': round(size / 1e6, 1)}
+        assert len(totals) == 1, f'Totals differ: {totals}'
+        report['total_sales'] = totals.pop()
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == '__main__':
+    main()
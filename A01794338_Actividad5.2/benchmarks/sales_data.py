@@ -0,0 +1,35 @@
+"""
+Module generating the sales shared by the benchmarks.
+
+Every benchmark builds its input from the same random catalogue and
+sales, so their results can be compared with each other.
+
+Functions:
+    - generate_sales(count, products, seed): Generate a catalogue and a
+      list of sales.
+"""
+import random
+
+
+def generate_sales(count, products, seed):
+    """
+    Generate a catalogue and a list of sales.
+
+    Parameters:
+        count (int): The number of sales records.
+        products (int): The number of products in the catalogue.
+        seed (int): The seed of the random generator.
+
+    Returns:
+        tuple: The prices dictionary and the sales records.
+    """
+    rng = random.Random(seed)
+    prices_dictionary = {f'Product {i}': round(rng.uniform(1, 100), 2)
+                         for i in range(products)}
+    titles = list(prices_dictionary)
+    sales = [{'SALE_ID': i // 5 + 1,
+              'SALE_Date': f'{rng.randint(1, 28):02d}/12/23',
+              'Product': rng.choice(titles),
+              'Quantity': rng.randint(1, 9)}
+             for i in range(count)]
+    return prices_dictionary, sales
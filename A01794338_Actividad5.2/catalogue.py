@@ -0,0 +1,82 @@
+"""
+Module for keeping the price catalogue loaded in memory.
+
+This module provides a class that parses the price catalogue once and
+reloads it only when the file changes on disk, so long-running
+processes do not pay a full JSON parse for every sales file. The
+product index resolving the sold names is built with the catalogue, so
+the server and the watch mode match names as computeSales does.
+
+Classes:
+    - Catalogue: An in-memory, auto-reloading price catalogue.
+"""
+import os
+import threading
+
+from computeSales import read_json, get_prices_dict
+from price_index import PriceIndex
+from product_index import NORMALIZED, ProductIndex
+
+
+class Catalogue:
+    """
+    Class that keeps the price catalogue loaded in memory.
+
+    Methods:
+        - load(): Parse the catalogue file and index it by title.
+        - refresh(): Reload the catalogue if the file changed and return
+          the prices dictionary, the price index and the product index.
+    """
+    def __init__(self, path, match=NORMALIZED, match_cutoff=0.85):
+        self.path = path
+        self.match = match
+        self.match_cutoff = match_cutoff
+        self.current = ({}, None, ProductIndex({}, match, match_cutoff))
+        self.signature = None
+        self.lock = threading.Lock()
+
+    def load(self):
+        """
+        Parse the catalogue file and index it by title.
+
+        Effective-dated catalogues also get a price index and the
+        prices dictionary holds the latest price of every product.
+
+        Returns:
+            tuple: The prices dictionary, the price index, None when
+                   the catalogue is not effective-dated, and the
+                   product index. Every job should count its names with
+                   ProductIndex.for_job.
+        """
+        stat = os.stat(self.path)
+        price_datum = read_json(self.path)
+        price_index = PriceIndex(price_datum)
+        if price_index.dated:
+            prices_dictionary = price_index.current_prices()
+        else:
+            prices_dictionary = get_prices_dict(price_datum)
+            price_index = None
+        self.current = (prices_dictionary, price_index,
+                        ProductIndex(prices_dictionary, self.match,
+                                     self.match_cutoff))
+        self.signature = (stat.st_mtime_ns, stat.st_size)
+        return self.current
+
+    def refresh(self):
+        """
+        Reload the catalogue if the file changed since it was loaded.
+
+        Only a stat call is made when the file is unchanged, so this is
+        cheap enough to run before every job.
+
+        Returns:
+            tuple: The current prices dictionary, price index and
+                   product index.
+        """
+        stat = os.stat(self.path)
+        if (stat.st_mtime_ns, stat.st_size) != self.signature:
+            with self.lock:
+                stat = os.stat(self.path)
+                if (stat.st_mtime_ns, stat.st_size) != self.signature:
+                    self.load()
+        return self.current
@@ -6,28 +6,64 @@ This program reads data from two JSON files: one containing available
 products in a store and the other containing the sales of that store.
 It calculates the total sales for each product and writes the results
 to a text file.
+
+The sales may also be given as newline-delimited JSON (.ndjson, .jsonl)
+or CSV (.csv) files, which are read line by line and, with --jobs,
+split between several worker processes.
 """
 import sys
 import time
-import json
+import argparse
+
+from sales_validation import (POLICIES, SalesValidator,
+                              SalesValidationError)
+from sales_sketch import SalesSketch
+from sales_groups import (SalesGroups, build_catalogue_index,
+                          parse_group_by)
+from json_stream import load_json, open_text
+from sales_lines import (FORMATS, JSON, SalesLineError, count_quantities,
+                         detect_format, iter_sales_records)
+from price_index import PriceIndex, SaleDateError
+from product_index import MATCH_MODES, NORMALIZED, ProductIndex
 
 
 def read_json(file_name):
     """
     Read data from a JSON file and return a list of dictionaries.
 
+    The file may be compressed with gzip, bzip2 or xz. It is decoded as
+    a stream, so a JSON array is built one record at a time without
+    holding the whole text in memory.
+
     Parameters:
         file_path (str): The path to the JSON file to be read.
 
     Returns:
         list: A list of dictionaries containing the data from the JSON file.
     """
-    with open(file_name, 'r', encoding='utf-8') as opened_file:
-        datum = json.load(opened_file)
+    with open_text(file_name) as opened_file:
+        datum = load_json(opened_file)
     opened_file.close()
     return datum
 
 
+def read_sales(file_name, sales_format=None):
+    """
+    Read the sales records of a JSON, NDJSON or CSV file.
+
+    Parameters:
+        file_name (str): The path to the sales file.
+        sales_format (str): 'json', 'ndjson' or 'csv', guessed from the
+                            extension when None.
+
+    Returns:
+        list: A list of dictionaries containing the sales data.
+    """
+    if (sales_format or detect_format(file_name)) == JSON:
+        return read_json(file_name)
+    return list(iter_sales_records(file_name, sales_format))
+
+
 def get_prices_dict(price_datum):
     """
     Create a dictionary with product names as keys and prices as values.
@@ -45,7 +81,53 @@ def get_prices_dict(price_datum):
     return prices_dictionary
 
 
-def get_sales_dict(sales_datum, prices_dictionary):
+def aggregate_sales(sales_datum, products, validator=None,
+                    product_index=None, on_sale=None):
+    """
+    Add up the quantity sold of every product in a single pass.
+
+    This is the aggregation loop shared by get_sales_dict and
+    get_dated_sales_dicts. When a validator is given, every sale is
+    checked inside the pass and only the accepted sales are added,
+    otherwise the sales of unknown products are skipped. When a product
+    index is given, the names that are not catalogue titles are resolved
+    through it, exact titles still costing a single lookup. The index is
+    then the only judge of unknown products: the validator rejects the
+    sales it could not match, and the index leaves them out of its
+    Unmatched lines so every bad row is reported once.
+
+    Parameters:
+        sales_datum (list): A list of dictionaries containing sales data.
+        products (iterable): The catalogue titles.
+        validator (SalesValidator): An optional validator for the sales.
+        product_index (ProductIndex): Optional resolver of the product
+                                      names that are not catalogue
+                                      titles.
+        on_sale (function): Optionally called with every added sale.
+
+    Returns:
+        sales_dict (dict): A dictionary where the keys are
+        product names and the values are the
+        total quantities sold of each product.
+    """
+    sales_dict = dict.fromkeys(products, 0)
+    if product_index is not None:
+        sales_datum = product_index.canonical_sales(
+            sales_datum, count_unmatched=validator is None)
+    for row, sale in enumerate(sales_datum):
+        if validator is not None:
+            if not validator.check(row, sale, sales_dict):
+                continue
+        elif sale['Product'] not in sales_dict:
+            continue
+        sales_dict[sale['Product']] += sale['Quantity']
+        if on_sale is not None:
+            on_sale(sale)
+    return sales_dict
+
+
+def get_sales_dict(sales_datum, prices_dictionary, validator=None,
+                   groups=None, product_index=None):
     """
     Calculate the total sales for each product and return a dictionary.
 
@@ -56,23 +138,30 @@ def get_sales_dict(sales_datum, prices_dictionary):
     returns a dictionary where the keys are product names and the values
     are the total sales for each product.
 
+    The sales are validated and resolved as in aggregate_sales. When
+    groups are given, every added sale is also aggregated by their
+    groupings in the same pass.
+
     Parameters:
         sales_datum (list): A list of dictionaries containing sales data.
         prices_dictionary (dict): A dictionary containing prices data.
+        validator (SalesValidator): An optional validator for the sales.
+        groups (SalesGroups): Optional groupings fed in the same pass.
+        product_index (ProductIndex): Optional resolver of the product
+                                      names that are not catalogue
+                                      titles.
 
     Returns:
         sales_dict (dict): A dictionary where the keys are
         product names and the values are the
         total quantities sold of each product.
     """
-    sales_dict = {}
-    for key in prices_dictionary.keys():
-        sales_count = 0
-        for sale in sales_datum:
-            if sale['Product'] == key:
-                sales_count += sale['Quantity']
-        sales_dict[key] = sales_count
-    return sales_dict
+    on_sale = None
+    if groups is not None:
+        def on_sale(sale):
+            groups.add(sale, prices_dictionary[sale['Product']])
+    return aggregate_sales(sales_datum, prices_dictionary, validator,
+                           product_index, on_sale)
 
 
 def get_total_sales_dict(prices_dictionary, sales_dict):
@@ -107,7 +196,107 @@ def get_total_sales_dict(prices_dictionary, sales_dict):
     return total_sales_dict
 
 
-def format_results(total_sales_dict, prices_dictionary, results_list):
+def get_dated_sales_dicts(sales_datum, price_index, validator=None,
+                          groups=None, product_index=None):
+    """
+    Calculate the quantities and the revenue pricing each sale as of
+    its date.
+
+    This function works like get_sales_dict followed by
+    get_total_sales_dict, except that the revenue of every sale uses
+    the price that was effective on its SALE_Date.
+
+    Parameters:
+        sales_datum (list): A list of dictionaries containing sales data.
+        price_index (PriceIndex): The price versions of every product.
+        validator (SalesValidator): An optional validator for the sales.
+        groups (SalesGroups): Optional groupings fed in the same pass.
+        product_index (ProductIndex): Optional resolver of the product
+                                      names that are not catalogue
+                                      titles.
+
+    Returns:
+        tuple: The quantities sold and the revenue of each product.
+    """
+    revenue_dict = dict.fromkeys(price_index.prices, 0)
+
+    def on_sale(sale):
+        price = price_index.price_for(sale)
+        revenue_dict[sale['Product']] += sale['Quantity']*price
+        if groups is not None:
+            groups.add(sale, price)
+    sales_dict = aggregate_sales(sales_datum, price_index.prices, validator,
+                                 product_index, on_sale)
+    total_sales_dict = {}
+    for key, value in revenue_dict.items():
+        total_sales_dict[key] = round(value, 2)
+    return sales_dict, total_sales_dict
+
+
+def compute_results(prices_dictionary, sales_datum, validator=None,
+                    price_index=None, groups=None, product_index=None):
+    """
+    Calculate the revenue per product and the total sales.
+
+    This function chains get_sales_dict and get_total_sales_dict so
+    that callers keeping the catalogue in memory share the same
+    computation used by main.
+
+    Parameters:
+        prices_dictionary (dict): A dictionary containing prices data.
+        sales_datum (list): A list of dictionaries containing sales data.
+        validator (SalesValidator): An optional validator for the sales.
+        price_index (PriceIndex): Optional price versions, used to price
+                                  each sale as of its date when the
+                                  catalogue is effective-dated.
+        groups (SalesGroups): Optional groupings fed in the same pass.
+        product_index (ProductIndex): Optional resolver of the product
+                                      names that are not catalogue
+                                      titles.
+
+    Returns:
+        tuple: The total sales dictionary and the total sales summing
+               all products.
+    """
+    if price_index is not None and price_index.dated:
+        _, total_sales_dict = get_dated_sales_dicts(
+            sales_datum, price_index, validator, groups, product_index)
+    else:
+        sales_dict = get_sales_dict(sales_datum, prices_dictionary,
+                                    validator, groups, product_index)
+        total_sales_dict = get_total_sales_dict(prices_dictionary,
+                                                sales_dict)
+    total_sales = round(sum(total_sales_dict.values()), 2)
+    return total_sales_dict, total_sales
+
+
+def compute_quantity_results(prices_dictionary, quantities,
+                             product_index=None):
+    """
+    Calculate the revenue per product from the quantities sold.
+
+    Parameters:
+        prices_dictionary (dict): A dictionary containing prices data.
+        quantities (dict): The quantity sold of every product, products
+                           missing from the catalogue being ignored.
+        product_index (ProductIndex): Optional resolver of the product
+                                      names that are not catalogue
+                                      titles.
+
+    Returns:
+        tuple: The total sales dictionary and the total sales summing
+               all products.
+    """
+    if product_index is not None:
+        quantities = product_index.resolve_quantities(quantities)
+    sales_dict = {key: quantities.get(key, 0) for key in prices_dictionary}
+    total_sales_dict = get_total_sales_dict(prices_dictionary, sales_dict)
+    total_sales = round(sum(total_sales_dict.values()), 2)
+    return total_sales_dict, total_sales
+
+
+def format_results(total_sales_dict, prices_dictionary, results_list,
+                   summary=''):
     """
     Format the results obtained by the program.
 
@@ -127,6 +316,8 @@ def format_results(total_sales_dict, prices_dictionary, results_list):
         elapsed_time (float): The execution time of the program.
         file_name (str): The name of the file that was read to
                          calculate the sales.
+        summary (str): Optional extra lines, such as the validation
+                       counters, written before the separator.
 
     Returns:
         results (str): A formatted string containing the results.
@@ -142,20 +333,71 @@ def format_results(total_sales_dict, prices_dictionary, results_list):
         '\n' + 'Total sales'.ljust(50, '-') +
         f'${results_list[0]}' + '\n\n'
     )
-    results += (
-        f'Execution time for file {results_list[2]}: '
-        f'{results_list[1]} seconds\n\n'
-    )
-    results += '*'*60 + '\n\n'
+    results += format_footer(results_list[1], results_list[2], summary)
     return results
 
 
+def format_footer(elapsed_time, file_name, summary=''):
+    """
+    Format the execution time and the separator closing a report.
+
+    Parameters:
+        elapsed_time (float): The execution time of the program.
+        file_name (str): The name of the file that was read to
+                         calculate the sales.
+        summary (str): Optional extra lines written before the separator.
+
+    Returns:
+        footer (str): A formatted string closing the report.
+    """
+    footer = (
+        f'Execution time for file {file_name}: '
+        f'{elapsed_time} seconds\n\n'
+    )
+    footer += summary
+    footer += '*'*60 + '\n\n'
+    return footer
+
+
+def compute_sketch(prices_dictionary, sales_file, top_k, validator=None,
+                   price_index=None, sales_format=None, product_index=None):
+    """
+    Summarize a sales file in one streaming pass and constant memory.
+
+    Parameters:
+        prices_dictionary (dict): A dictionary containing prices data.
+        sales_file (str): The path to the sales file, '-' for stdin.
+        top_k (int): The number of top products to report.
+        validator (SalesValidator): An optional validator for the sales.
+        price_index (PriceIndex): Optional price versions of every product.
+        sales_format (str): 'json', 'ndjson' or 'csv', guessed from the
+                            extension when None.
+        product_index (ProductIndex): Optional resolver of the product
+                                      names that are not catalogue
+                                      titles.
+
+    Returns:
+        SalesSketch: The sketches fed with every sale of the file.
+    """
+    sketch = SalesSketch(prices_dictionary, top_k, price_index)
+    sales_datum = iter_sales_records(sales_file, sales_format)
+    if product_index is not None:
+        sales_datum = product_index.canonical_sales(
+            sales_datum, count_unmatched=validator is None)
+    for row, sale in enumerate(sales_datum):
+        if validator is None or validator.check(row, sale,
+                                                prices_dictionary):
+            sketch.add(sale)
+    return sketch
+
+
 def write_results_file(results, results_file):
     """
     Write formatted results to a text file.
 
     This function takes a string with the formatted results and a filename.
     It writes the results to a text file with the given filename.
+    A filename ending in .gz, .bz2 or .xz is written compressed.
 
     Parameters:
         results (str): A string containing the formatted results.
@@ -164,11 +406,62 @@ def write_results_file(results, results_file):
     Returns:
         None
     """
-    with open(results_file, 'a', encoding='utf-8') as txt_file:
+    with open_text(results_file, 'a') as txt_file:
         txt_file.write(results)
     txt_file.close()
 
 
+def parse_arguments(argv=None):
+    """
+    Parse the command line arguments of the program.
+
+    Parameters:
+        argv (list): The arguments to parse, sys.argv when None.
+
+    Returns:
+        argparse.Namespace: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        description='Compute the total sales of a store.')
+    parser.add_argument('prices_file', help='Path to the price catalogue')
+    parser.add_argument('sales_file', help='Path to the sales record')
+    parser.add_argument('--validate', choices=POLICIES,
+                        help='Validate every sale, stopping at the first '
+                             'bad row (fail-fast) or quarantining it (skip)')
+    parser.add_argument('--quarantine', default='SalesQuarantine.jsonl',
+                        help='File the rejected rows are appended to')
+    parser.add_argument('--sketch', action='store_true',
+                        help='Stream the sales and report only the top '
+                             'products and the approximate distinct sales')
+    parser.add_argument('--top-k', type=int, default=10,
+                        help='Number of top products in sketch mode')
+    parser.add_argument('--group-by', action='append', type=parse_group_by,
+                        default=[], metavar='FIELDS',
+                        help='Also report quantity and sales grouped by '
+                             'comma-separated catalogue or sale fields, '
+                             'such as type,rating (repeatable)')
+    parser.add_argument('--format', choices=FORMATS, dest='sales_format',
+                        help='Format of the sales file, guessed from its '
+                             'extension by default')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='Worker processes splitting an NDJSON or CSV '
+                             'sales file when only the totals are needed')
+    parser.add_argument('--match', choices=MATCH_MODES, default=NORMALIZED,
+                        help='How product names that are not catalogue '
+                             'titles are matched: not at all (exact), '
+                             'ignoring case and whitespace (normalized, '
+                             'the default) or also to the closest title '
+                             '(fuzzy)')
+    parser.add_argument('--match-cutoff', type=float, default=0.85,
+                        help='Minimum similarity of a fuzzy match')
+    args = parser.parse_args(argv)
+    if args.top_k < 1:
+        parser.error('--top-k must be at least 1')
+    if args.sketch and args.group_by:
+        parser.error('--group-by is not available in sketch mode')
+    return args
+
+
 def main():
     """
     Main function of the program.
@@ -184,21 +477,59 @@ def main():
     None.
     """
     start_time = time.time()
-    prices_file = sys.argv[1]
-    sales_file = sys.argv[2]
+    args = parse_arguments()
+    sales_file = args.sales_file
+    sales_format = args.sales_format or detect_format(sales_file)
     results_file = 'SalesResults.txt'
 
-    price_datum = read_json(prices_file)
-    sales_datum = read_json(sales_file)
-
+    price_datum = read_json(args.prices_file)
     prices_dictionary = get_prices_dict(price_datum)
-    sales_dict = get_sales_dict(sales_datum, prices_dictionary)
-    total_sales_dict = get_total_sales_dict(prices_dictionary, sales_dict)
-    total_sales = round(sum(total_sales_dict.values()), 2)
+    price_index = PriceIndex(price_datum)
+    if price_index.dated:
+        prices_dictionary = price_index.current_prices()
+    product_index = ProductIndex(prices_dictionary, args.match,
+                                 args.match_cutoff)
+    groups = None
+    if args.group_by:
+        groups = SalesGroups(build_catalogue_index(price_datum),
+                             args.group_by)
+    validator = None
+    if args.validate:
+        validator = SalesValidator(args.validate, args.quarantine,
+                                   price_index)
+    try:
+        if args.sketch:
+            sketch = compute_sketch(prices_dictionary, sales_file,
+                                    args.top_k, validator, price_index,
+                                    sales_format, product_index)
+        elif (sales_format != JSON and validator is None and
+              groups is None and not price_index.dated):
+            quantities = count_quantities(sales_file, sales_format,
+                                          args.jobs)
+            total_sales_dict, total_sales = compute_quantity_results(
+                prices_dictionary, quantities, product_index)
+        else:
+            sales_datum = read_sales(sales_file, sales_format)
+            total_sales_dict, total_sales = compute_results(
+                prices_dictionary, sales_datum, validator, price_index,
+                groups, product_index)
+    except (SalesValidationError, SaleDateError, SalesLineError) as error:
+        sys.exit(f'{sales_file}: {error}')
     end_time = time.time()
     elapsed_time = end_time - start_time
-    results_list = [total_sales, elapsed_time, sales_file]
-    results = format_results(total_sales_dict, prices_dictionary, results_list)
+    summary = product_index.summary()
+    if validator is not None:
+        validator.close()
+        summary += validator.summary()
+    if args.sketch:
+        results = sketch.format_results()
+        results += format_footer(elapsed_time, sales_file, summary)
+    else:
+        results_list = [total_sales, elapsed_time, sales_file]
+        if groups is not None:
+            summary = groups.format_results() + summary
+        results = format_results(total_sales_dict, prices_dictionary,
+                                 results_list, summary)
     print(results)
     write_results_file(results, results_file)
 
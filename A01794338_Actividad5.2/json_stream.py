@@ -0,0 +1,231 @@
+"""
+Module for reading and writing JSON data files as streams.
+
+Files compressed with gzip, bzip2 or xz are decompressed or compressed
+on the fly. The codec of an existing file is recognized by its magic
+bytes, also when the file is rewritten; a new file gets the codec of
+its extension. Only one chunk of the decompressed text is in memory at
+a time.
+
+The JSON values of a stream are decoded one record at a time: a
+top-level array is unwrapped and its elements are yielded one by one,
+so memory is bounded by the largest record instead of the whole file.
+A stream without a top-level array may hold several values concatenated
+one after the other.
+
+Functions:
+    - detect_codec(file_name, mode): Return the codec of a file.
+    - open_text(file_name, mode): Open a file, compressed or not.
+    - iter_json_records(stream, chunk_size): Yield the records of a stream.
+    - load_json(stream, chunk_size): Decode the JSON value of a stream.
+"""
+import bz2
+import gzip
+import json
+import lzma
+import os
+
+CHUNK_SIZE = 1 << 16
+WHITESPACE = ' \t\n\r'
+VALUE = 'v'
+MAX_TOKEN_SIZE = len('-Infinity')
+CODECS = {'.gz': gzip, '.bz2': bz2, '.xz': lzma, '.lzma': lzma}
+MAGIC_BYTES = ((b'\x1f\x8b', gzip), (b'BZh', bz2),
+               (b'\xfd7zXZ\x00', lzma))
+
+
+def detect_codec(file_name, mode='r'):
+    """
+    Return the compression module of a file.
+
+    The codec is recognized by the magic bytes of the file. A file
+    opened for writing that does not exist yet, or is empty, gets the
+    codec of its extension, so rewriting a gzip file named .json keeps
+    it compressed.
+
+    Parameters:
+        file_name (str): The path to the file.
+        mode (str): 'r' to read the file, 'w' or 'a' to write it.
+
+    Returns:
+        module: gzip, bz2 or lzma, None for an uncompressed file.
+    """
+    if 'r' not in mode and (not os.path.exists(file_name) or
+                            os.path.getsize(file_name) == 0):
+        return CODECS.get(os.path.splitext(file_name)[1].lower())
+    with open(file_name, 'rb') as opened_file:
+        head = opened_file.read(6)
+    for magic, codec in MAGIC_BYTES:
+        if head.startswith(magic):
+            return codec
+    return None
+
+
+def open_text(file_name, mode='r'):
+    """
+    Open a text file, decompressing or compressing it transparently.
+
+    A UTF-8 byte order mark at the start of a file being read is
+    skipped.
+
+    Parameters:
+        file_name (str): The path to the file.
+        mode (str): 'r', 'w' or 'a'.
+
+    Returns:
+        file: A text stream over the uncompressed contents.
+    """
+    codec = detect_codec(file_name, mode)
+    encoding = 'utf-8-sig' if 'r' in mode else 'utf-8'
+    if codec is None:
+        return open(file_name, mode, encoding=encoding)
+    return codec.open(file_name, mode + 't', encoding=encoding)
+
+
+def is_truncated(error, buffer):
+    """
+    Return whether a decode error may be due to the buffer ending early.
+
+    The value may then be complete once more text is read. Any other
+    error is raised at once instead of reading the rest of the stream.
+
+    Parameters:
+        error (json.JSONDecodeError): The error raised decoding a value.
+        buffer (str): The text being decoded.
+
+    Returns:
+        bool: True when the error is within the last token of the buffer
+              or is a string running to its end.
+    """
+    return (len(buffer) - error.pos <= MAX_TOKEN_SIZE or
+            error.msg.startswith('Unterminated string'))
+
+
+def is_cut_number(value, buffer, end):
+    """
+    Return whether a decoded number may go on in the next chunk.
+
+    A number followed by the end of the buffer, or by a '.' or an 'e'
+    it could not use yet, as in '1.' or '1e', may be the start of a
+    longer number cut by the chunk boundary.
+
+    Parameters:
+        value: The value decoded from the buffer.
+        buffer (str): The text being decoded.
+        end (int): The index right after the decoded value.
+
+    Returns:
+        bool: True when more text must be read before the value is used.
+    """
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return False
+    return end == len(buffer) or (len(buffer) - end <= MAX_TOKEN_SIZE and
+                                  buffer[end] in '.eE')
+
+
+def iter_json_records(stream, chunk_size=CHUNK_SIZE):
+    """
+    Yield the records of a text stream holding JSON values.
+
+    A stream holding a single top-level array has its elements yielded
+    one by one. Any other stream may hold several values concatenated
+    one after the other, each being yielded as it is. Text after the
+    array, or an array after other values, raises an error instead of
+    being flattened into the records.
+
+    Parameters:
+        stream (file): A text stream with the JSON values.
+        chunk_size (int): The number of characters read at a time.
+
+    Yields:
+        The records decoded from the stream.
+
+    Raises:
+        json.JSONDecodeError: When the stream is not valid JSON, or
+            ends in the middle of the array.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    # None outside of an array, else the last token read in the array:
+    # '[', ',' or VALUE.
+    last_token = None
+    # None until the first top-level token, then '[' or VALUE.
+    top_level = None
+    eof = False
+    while True:
+        while position < len(buffer) and buffer[position] in WHITESPACE:
+            position += 1
+        if position < len(buffer):
+            char = buffer[position]
+            if last_token is not None and char in ',]':
+                expected = (VALUE,) if char == ',' else ('[', VALUE)
+                if last_token not in expected:
+                    raise json.JSONDecodeError('Expecting value', buffer,
+                                               position)
+                last_token = ',' if char == ',' else None
+                position += 1
+                continue
+            if last_token is None:
+                if top_level == '[' or (top_level == VALUE and
+                                        char == '['):
+                    raise json.JSONDecodeError('Extra data', buffer,
+                                               position)
+                top_level = '[' if char == '[' else VALUE
+                if char == '[':
+                    last_token = '['
+                    position += 1
+                    continue
+            if last_token == VALUE:
+                raise json.JSONDecodeError("Expecting ',' delimiter",
+                                           buffer, position)
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError as error:
+                if eof or not is_truncated(error, buffer):
+                    raise
+                end = len(buffer)
+            if eof or (end < len(buffer) and
+                       not is_cut_number(value, buffer, end)):
+                position = end
+                if last_token is not None:
+                    last_token = VALUE
+                yield value
+                continue
+        elif eof:
+            if last_token is not None:
+                message = ("Expecting ',' delimiter" if last_token == VALUE
+                           else 'Expecting value')
+                raise json.JSONDecodeError(message, buffer, position)
+            return
+        buffer = buffer[position:]
+        position = 0
+        chunk = stream.read(chunk_size)
+        eof = not chunk
+        buffer += chunk
+
+
+def load_json(stream, chunk_size=CHUNK_SIZE):
+    """
+    Decode the JSON value of a seekable text stream.
+
+    A top-level array is built one record at a time with
+    iter_json_records, so the text is never held in memory in full,
+    only the records. Any other value is decoded with json.load.
+
+    Parameters:
+        stream (file): A seekable text stream with one JSON value.
+        chunk_size (int): The number of characters read at a time.
+
+    Returns:
+        The decoded value.
+    """
+    while True:
+        chunk = stream.read(chunk_size)
+        head = chunk.lstrip(WHITESPACE)
+        if head or not chunk:
+            break
+    stream.seek(0)
+    if head.startswith('['):
+        return list(iter_json_records(stream, chunk_size))
+    return json.load(stream)
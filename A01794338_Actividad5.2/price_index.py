@@ -0,0 +1,126 @@
+"""
+Module for pricing sales with an effective-dated price catalogue.
+
+A catalogue entry may carry an "effective_date" (YYYY-MM-DD) and the
+same title may appear several times with different dates, each entry
+being one price version:
+
+    {"title": "Honey", "price": 17.01}
+    {"title": "Honey", "price": 18.50, "effective_date": "2023-12-02"}
+
+An entry without "effective_date" is effective since the beginning of
+time. The index keeps, for each title, the version dates sorted once so
+that pricing a sale as of its SALE_Date (DD/MM/YY) is a binary search.
+
+A sale whose SALE_Date cannot be parsed cannot be priced and raises
+SaleDateError, or is rejected by a SalesValidator given the index.
+
+Classes:
+    - SaleDateError: Raised for a sale without a valid date.
+    - PriceIndex: Sorted price versions per product.
+"""
+from bisect import bisect_right
+from datetime import date, datetime
+from functools import lru_cache
+
+SALE_DATE_FORMAT = '%d/%m/%y'
+
+
+class SaleDateError(ValueError):
+    """
+    Error raised when a sale priced as of its date has no valid date.
+    """
+
+
+@lru_cache(maxsize=4096)
+def sale_day(sale_date):
+    """
+    Convert a sale date into a day number, caching repeated dates.
+
+    Parameters:
+        sale_date (str): The date of the sale in DD/MM/YY format.
+
+    Returns:
+        int: The proleptic Gregorian ordinal of the date, None when the
+             date cannot be parsed.
+    """
+    try:
+        return datetime.strptime(sale_date, SALE_DATE_FORMAT).toordinal()
+    except (TypeError, ValueError):
+        return None
+
+
+class PriceIndex:
+    """
+    Class that prices products as of a date.
+
+    Methods:
+        - price_as_of(product, day): Return the price effective on a day.
+        - price_for(sale): Return the price of a sale as of its date.
+        - current_prices(): Return the latest price of every product.
+    """
+    def __init__(self, price_datum):
+        versions = {}
+        self.dated = False
+        for dictionary in price_datum:
+            effective_date = dictionary.get('effective_date')
+            day = 0
+            if effective_date is not None:
+                self.dated = True
+                day = date.fromisoformat(effective_date).toordinal()
+            versions.setdefault(dictionary['title'], []).append(
+                (day, dictionary['price']))
+        self.days = {}
+        self.prices = {}
+        for title, title_versions in versions.items():
+            title_versions.sort(key=lambda version: version[0])
+            self.days[title] = [day for day, _ in title_versions]
+            self.prices[title] = [price for _, price in title_versions]
+
+    def price_as_of(self, product, day):
+        """
+        Return the price of a product effective on a day.
+
+        A day before the first version gets the first version.
+
+        Parameters:
+            - product (str): The title of the product.
+            - day (int): The day number, see sale_day.
+
+        Returns:
+            float: The price effective on that day.
+        """
+        prices = self.prices[product]
+        position = bisect_right(self.days[product], day)
+        return prices[max(position - 1, 0)]
+
+    def price_for(self, sale):
+        """
+        Return the price of a sale as of its SALE_Date.
+
+        Parameters:
+            - sale (dict): The sale record.
+
+        Returns:
+            float: The price of the product on the sale date.
+
+        Raises:
+            SaleDateError: When the SALE_Date is missing or cannot be
+                           parsed.
+        """
+        day = sale_day(sale.get('SALE_Date'))
+        if day is None:
+            raise SaleDateError(
+                f'Sale {sale.get("SALE_ID")} has no valid SALE_Date: '
+                f'{sale.get("SALE_Date")!r}')
+        return self.price_as_of(sale['Product'], day)
+
+    def current_prices(self):
+        """
+        Return the latest price version of every product.
+
+        Returns:
+            dict: A dictionary where the keys are product names
+                  and the values are their latest prices.
+        """
+        return {title: prices[-1] for title, prices in self.prices.items()}
@@ -0,0 +1,205 @@
+"""
+Module for matching sold product names to the catalogue titles.
+
+Sales are matched to the catalogue by exact title, so a sale of
+"sweet fresh  Stawberry" silently counts as zero. The index built here
+once from the catalogue resolves such names in three steps:
+
+    - exact: the title itself, a dictionary lookup as before.
+    - normalized: the name compared case-insensitively with runs of
+      whitespace collapsed, also a dictionary lookup.
+    - fuzzy: the closest normalized title according to difflib, kept
+      only above a similarity cutoff.
+
+Names are matched up to the normalized step by default; fuzzy matching
+has to be asked for, since it may count a sale under a different
+product. It compares the name against every title, so the titles
+found for names missing the exact step are kept in an LRU cache and a
+repeated near miss costs one lookup. The quantity sold under every name
+that was corrected or could not be matched is counted so the report
+can list it.
+
+Classes:
+    - ProductIndex: Resolves product names to catalogue titles.
+
+Functions:
+    - normalize_product(name): Normalize case and whitespace.
+"""
+import copy
+import difflib
+from collections import Counter
+from functools import lru_cache
+
+EXACT = 'exact'
+NORMALIZED = 'normalized'
+FUZZY = 'fuzzy'
+MATCH_MODES = (EXACT, NORMALIZED, FUZZY)
+
+
+def normalize_product(name):
+    """
+    Normalize the case and whitespace of a product name.
+
+    Parameters:
+        name (str): The product name.
+
+    Returns:
+        str: The name in lower case with runs of whitespace collapsed.
+    """
+    return ' '.join(name.casefold().split())
+
+
+class ProductIndex:
+    """
+    Class that resolves product names to catalogue titles.
+
+    Methods:
+        - resolve(name): Return the catalogue title of a name.
+        - canonical_sales(sales_datum, count_unmatched): Yield sales
+          with resolved names.
+        - resolve_quantities(quantities): Merge quantities by title.
+        - summary(): Format the corrected and unmatched names.
+        - for_job(): Return an index with its own counters.
+    """
+    def __init__(self, titles, mode=NORMALIZED, cutoff=0.85,
+                 cache_size=4096):
+        self.mode = mode
+        self.cutoff = cutoff
+        self.titles = dict.fromkeys(titles)
+        self.normalized = {}
+        for title in self.titles:
+            self.normalized.setdefault(normalize_product(title), title)
+        self.choices = list(self.normalized)
+        self.corrected = Counter()
+        self.unmatched = Counter()
+        self.find_title = lru_cache(maxsize=cache_size)(self.match_title)
+
+    def match_title(self, name):
+        """
+        Return the title matching a name that is not a catalogue title.
+
+        Parameters:
+            name (str): The product name.
+
+        Returns:
+            str: The catalogue title, None when the name cannot be
+                 matched.
+        """
+        if self.mode == EXACT:
+            return None
+        normalized_name = normalize_product(name)
+        title = self.normalized.get(normalized_name)
+        if title is not None or self.mode != FUZZY:
+            return title
+        matches = difflib.get_close_matches(normalized_name, self.choices,
+                                            n=1, cutoff=self.cutoff)
+        if not matches:
+            return None
+        return self.normalized[matches[0]]
+
+    def resolve(self, name, quantity=1, count_unmatched=True):
+        """
+        Return the catalogue title of a product name.
+
+        Parameters:
+            name (str): The product name of a sale.
+            quantity (int): The quantity sold under that name, counted
+                            when the name is corrected or unmatched.
+            count_unmatched (bool): Whether an unmatched name is counted
+                                    for the summary.
+
+        Returns:
+            str: The catalogue title, None when the name cannot be
+                 matched.
+        """
+        if name in self.titles:
+            return name
+        title = self.find_title(name) if isinstance(name, str) else None
+        if title is None:
+            if count_unmatched:
+                self.unmatched[name] += quantity
+        else:
+            self.corrected[(name, title)] += quantity
+        return title
+
+    def canonical_sales(self, sales_datum, count_unmatched=True):
+        """
+        Yield the sales with their product names resolved.
+
+        Sales of catalogue titles and sales without a string product are
+        yielded unchanged, the others as copies carrying the resolved
+        title, or unchanged when the name cannot be matched.
+
+        Parameters:
+            sales_datum (iterable): The sales records.
+            count_unmatched (bool): Whether the names that cannot be
+                                    matched are counted for the summary,
+                                    False when a validator rejects and
+                                    reports those sales instead.
+
+        Yields:
+            dict: The sales records.
+        """
+        titles = self.titles
+        for sale in sales_datum:
+            product = sale.get('Product') if isinstance(sale, dict) else None
+            if product in titles or not isinstance(product, str):
+                yield sale
+                continue
+            quantity = sale.get('Quantity')
+            if not isinstance(quantity, (int, float)):
+                quantity = 0
+            title = self.resolve(product, quantity, count_unmatched)
+            yield sale if title is None else dict(sale, Product=title)
+
+    def resolve_quantities(self, quantities):
+        """
+        Merge the quantities of names resolving to the same title.
+
+        Parameters:
+            quantities (dict): The product names mapped to quantities.
+
+        Returns:
+            dict: The catalogue titles mapped to their quantities, the
+                  names that cannot be matched being dropped.
+        """
+        resolved = {}
+        for name, quantity in quantities.items():
+            if name in self.titles:
+                title = name
+            else:
+                title = self.resolve(name, quantity)
+                if title is None:
+                    continue
+            resolved[title] = resolved.get(title, 0) + quantity
+        return resolved
+
+    def for_job(self):
+        """
+        Return an index sharing the titles and the match cache of this
+        one but counting the corrected and unmatched names on its own,
+        so concurrent jobs each report their own names.
+
+        Returns:
+            ProductIndex: The index of the job.
+        """
+        index = copy.copy(self)
+        index.corrected = Counter()
+        index.unmatched = Counter()
+        return index
+
+    def summary(self):
+        """
+        Format the corrected and unmatched names to append to the report.
+
+        Returns:
+            str: A formatted string, empty when every name matched.
+        """
+        lines = [(f'Matched: {name} -> {title}', count)
+                 for (name, title), count in sorted(self.corrected.items())]
+        lines += [(f'Unmatched: {name}', count)
+                  for name, count in sorted(self.unmatched.items(), key=str)]
+        summary = ''
+        for label, count in lines:
+            summary += (label + '-').ljust(50, '-') + f'{count}\n'
+        return summary + '\n' if summary else ''
@@ -0,0 +1,155 @@
+"""
+Module for aggregating sales by catalogue attributes.
+
+The catalogue is indexed once by title in a hash table, so every sale
+is joined to its catalogue entry with a single dictionary lookup, and
+the entry attributes (type, rating, ...) are never searched again. A
+grouping is a list of fields, each one taken from the catalogue entry
+or, for the fields of the sale record itself (SALE_Date, SALE_ID), from
+the sale. Any number of groupings are fed in the same pass that
+computes the normal totals:
+
+    python computeSales.py priceCatalogue.json TC1.salesRecord.json \\
+        --group-by type --group-by type,rating --group-by type,SALE_Date
+
+Classes:
+    - SalesGroups: Quantity and revenue per group of several groupings.
+
+Functions:
+    - build_catalogue_index(price_datum): Index the catalogue by title.
+    - parse_group_by(value): Parse a grouping such as 'type,rating'.
+    - group_sort_key(fields): Return the sort key of the groups.
+"""
+from price_index import sale_day
+
+SALE_FIELDS = ('SALE_ID', 'SALE_Date')
+
+
+def build_catalogue_index(price_datum):
+    """
+    Index the catalogue entries by title.
+
+    When a title appears more than once, the last entry wins, as in
+    get_prices_dict.
+
+    Parameters:
+        price_datum (list): A list of dictionaries.
+
+    Returns:
+        dict: The product titles mapped to their catalogue entries.
+    """
+    catalogue_index = {}
+    for entry in price_datum:
+        catalogue_index[entry['title']] = entry
+    return catalogue_index
+
+
+def parse_group_by(value):
+    """
+    Parse a grouping given as comma-separated field names.
+
+    Parameters:
+        value (str): The fields, such as 'type,rating'.
+
+    Returns:
+        tuple: The field names.
+    """
+    fields = tuple(field.strip() for field in value.split(',')
+                   if field.strip())
+    if not fields:
+        raise ValueError('A grouping needs at least one field')
+    return fields
+
+
+def group_sort_key(fields):
+    """
+    Return the function sorting the groups of a grouping.
+
+    SALE_Date values are sorted as dates, the ones that cannot be parsed
+    coming last; every other value is sorted as text.
+
+    Parameters:
+        fields (list): The fields of the grouping.
+
+    Returns:
+        function: The sort key of a group key.
+    """
+    dates = [field == 'SALE_Date' for field in fields]
+
+    def sort_key(key):
+        parts = []
+        for is_date, value in zip(dates, key):
+            day = sale_day(value) if is_date else None
+            parts.append((day is None, day or 0, str(value)))
+        return tuple(parts)
+    return sort_key
+
+
+class SalesGroups:
+    """
+    Class that aggregates the quantity and revenue of several groupings.
+
+    Methods:
+        - add(sale, price): Add a sale to every grouping.
+        - format_results(): Format one table per grouping.
+    """
+    def __init__(self, catalogue_index, groupings):
+        self.groupings = list(groupings)
+        self.totals = [{} for _ in self.groupings]
+        self.sale_fields = [
+            [(position, field) for position, field in enumerate(fields)
+             if field in SALE_FIELDS]
+            for fields in self.groupings]
+        self.static_keys = [
+            {title: tuple(None if field in SALE_FIELDS else entry.get(field)
+                          for field in fields)
+             for title, entry in catalogue_index.items()}
+            for fields in self.groupings]
+
+    def add(self, sale, price):
+        """
+        Add a sale of a catalogue product to every grouping.
+
+        Parameters:
+            sale (dict): The sale record.
+            price (float): The unit price applied to the sale.
+        """
+        product = sale['Product']
+        quantity = sale['Quantity']
+        revenue = quantity * price
+        for static_keys, sale_fields, totals in zip(
+                self.static_keys, self.sale_fields, self.totals):
+            key = static_keys[product]
+            if sale_fields:
+                key = list(key)
+                for position, field in sale_fields:
+                    key[position] = sale.get(field)
+                key = tuple(key)
+            total = totals.get(key)
+            if total is None:
+                totals[key] = [quantity, revenue]
+            else:
+                total[0] += quantity
+                total[1] += revenue
+
+    def format_results(self):
+        """
+        Format the quantity and revenue of every group.
+
+        Returns:
+            str: One table per grouping, groups sorted by key, see
+                 group_sort_key.
+        """
+        results = ''
+        for fields, totals in zip(self.groupings, self.totals):
+            results += (f'Sales by {" x ".join(fields)}'.center(40) +
+                        'Quantity'.ljust(10) + 'Sales'.ljust(10) + '\n\n')
+            for key in sorted(totals, key=group_sort_key(fields)):
+                quantity, revenue = totals[key]
+                results += (
+                    ' / '.join(map(str, key)).ljust(40, '-') +
+                    f'{quantity}'.ljust(10, '-') +
+                    f'${round(revenue, 2)}'.ljust(10) + '\n'
+                )
+            results += '\n'
+        return results
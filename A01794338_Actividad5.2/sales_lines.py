@@ -0,0 +1,530 @@
+"""
+Module for reading line-oriented sales files.
+
+Point of sale systems export sales as newline-delimited JSON (one
+record per line) or as CSV (a header line naming the columns and one
+record per line). This module reads both formats directly:
+
+    - The file is read in large chunks cut on line boundaries, so the
+      lines of a whole chunk are handed over at once instead of one
+      read call per line.
+    - When only the product and quantity of every sale are needed, the
+      pair readers extract them without building a dictionary per row,
+      scanning a whole NDJSON chunk with one regular expression call.
+    - An uncompressed file can be split on line boundaries into byte
+      ranges that worker processes count in parallel.
+
+Records must not span several lines, so CSV fields must not contain
+line breaks. CSV values are strings except Quantity and SALE_ID, which
+are converted to numbers when possible. A UTF-8 byte order mark at the
+start of a file is skipped. When only the pairs are read, a sale whose
+product is not a string or whose quantity is not a number raises
+SalesLineError, as does a CSV line too short to hold both; CSV errors
+give the number of the line.
+
+Classes:
+    - SalesLineError: Raised for a sale without a valid product or
+      quantity.
+
+Functions:
+    - detect_format(file_name): Guess the format from the extension.
+    - iter_sales_records(file_name, sales_format): Yield sale records.
+    - iter_sales_pairs(file_name, sales_format): Yield product and
+      quantity pairs.
+    - split_ranges(file_name, jobs, start): Split a file on lines.
+    - count_lines(file_name, end): Count the lines before an offset.
+    - count_quantities(file_name, sales_format, jobs): Add up the
+      quantity sold of every product, optionally in parallel.
+"""
+import csv
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from json_stream import CODECS, detect_codec, open_text
+from sales_stream import iter_sales
+
+JSON = 'json'
+NDJSON = 'ndjson'
+CSV = 'csv'
+FORMATS = (JSON, NDJSON, CSV)
+EXTENSIONS = {'.ndjson': NDJSON, '.jsonl': NDJSON, '.csv': CSV}
+LINE_CHUNK_SIZE = 1 << 20
+NUMERIC_COLUMNS = ('Quantity', 'SALE_ID')
+PRODUCT_FIELD = re.compile(r'"Product"\s*:\s*"([^"\\]*)"')
+QUANTITY_FIELD = re.compile(
+    r'"Quantity"\s*:\s*(-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)\s*[,}]')
+REPEATED_FIELD = re.compile(r'"(Product|Quantity)"\s*:[^\n]*"\1"\s*:')
+
+
+class SalesLineError(ValueError):
+    """
+    Error raised when a sale of a line file has no valid product or
+    quantity.
+    """
+
+
+def detect_format(file_name):
+    """
+    Guess the format of a sales file from its extension.
+
+    A compression extension is ignored, so sales.csv.gz is a CSV file.
+
+    Parameters:
+        file_name (str): The path to the sales file.
+
+    Returns:
+        str: 'ndjson', 'csv' or 'json'.
+    """
+    root, extension = os.path.splitext(file_name.lower())
+    if extension in CODECS:
+        extension = os.path.splitext(root)[1]
+    return EXTENSIONS.get(extension, JSON)
+
+
+def sale_pair(product, quantity):
+    """
+    Check the product and quantity of a sale.
+
+    Parameters:
+        product: The product read from the file.
+        quantity: The quantity read from the file.
+
+    Returns:
+        tuple: The product and quantity.
+
+    Raises:
+        SalesLineError: When the product is not a string or the
+                        quantity is not a number.
+    """
+    if (not isinstance(product, str) or isinstance(quantity, bool) or
+            not isinstance(quantity, (int, float))):
+        raise SalesLineError(
+            f'Invalid sale: product {product!r}, quantity {quantity!r}')
+    return product, quantity
+
+
+def to_number(value):
+    """
+    Convert a CSV value to an int or a float when possible.
+
+    Parameters:
+        value (str): The value read from the file.
+
+    Returns:
+        The number, or the value unchanged when it is not a number.
+    """
+    try:
+        return int(value)
+    except ValueError:
+        try:
+            return float(value)
+        except ValueError:
+            return value
+
+
+def iter_line_blocks(stream, chunk_size=LINE_CHUNK_SIZE):
+    """
+    Yield the complete lines of a text stream a chunk at a time.
+
+    Parameters:
+        stream (file): A text stream.
+        chunk_size (int): The number of characters read at a time.
+
+    Yields:
+        str: The lines completed by every chunk, without the last line
+        break.
+    """
+    rest = ''
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        block = rest + chunk
+        cut = block.rfind('\n')
+        if cut < 0:
+            rest = block
+            continue
+        rest = block[cut + 1:]
+        yield block[:cut]
+    if rest:
+        yield rest
+
+
+def iter_range_blocks(file_name, start, end, chunk_size=LINE_CHUNK_SIZE):
+    """
+    Yield the lines of a byte range of a file a chunk at a time.
+
+    Parameters:
+        file_name (str): The path to an uncompressed file.
+        start (int): The offset of the first byte, at a line start.
+        end (int): The offset after the last byte, at a line start.
+        chunk_size (int): The number of bytes read at a time.
+
+    Yields:
+        str: The lines completed by every chunk, without the last line
+        break.
+    """
+    with open(file_name, 'rb') as opened_file:
+        opened_file.seek(start)
+        remaining = end - start
+        rest = b''
+        while remaining > 0:
+            chunk = opened_file.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            block = rest + chunk
+            cut = block.rfind(b'\n')
+            if cut < 0:
+                rest = block
+                continue
+            rest = block[cut + 1:]
+            yield block[:cut].decode('utf-8-sig').replace('\r\n', '\n')
+        if rest:
+            yield rest.decode('utf-8-sig').rstrip('\r')
+
+
+def open_blocks(file_name):
+    """
+    Yield the line blocks of a whole sales file.
+
+    Parameters:
+        file_name (str): The path to the sales file, '-' for stdin.
+
+    Yields:
+        str: The lines of every chunk, see iter_line_blocks.
+    """
+    if file_name == '-':
+        yield from iter_line_blocks(sys.stdin)
+        return
+    with open_text(file_name) as opened_file:
+        yield from iter_line_blocks(opened_file)
+
+
+def iter_ndjson_records(blocks):
+    """
+    Yield the records of newline-delimited JSON lines.
+
+    Parameters:
+        blocks (iterable): The line blocks of the file.
+
+    Yields:
+        The record of every non-blank line.
+    """
+    for block in blocks:
+        for line in block.split('\n'):
+            if line.strip():
+                yield json.loads(line)
+
+
+def iter_csv_records(blocks, header=None):
+    """
+    Yield the records of CSV lines as dictionaries.
+
+    Parameters:
+        blocks (iterable): The line blocks of the file.
+        header (list): The column names, read from the first line when
+                       None.
+
+    Yields:
+        dict: The record of every non-blank line.
+    """
+    numeric = None if header is None else numeric_columns(header)
+    for block in blocks:
+        for row in csv.reader(block.split('\n')):
+            if not row:
+                continue
+            if header is None:
+                header = row
+                numeric = numeric_columns(header)
+                continue
+            record = dict(zip(header, row))
+            for position, column in numeric:
+                if position < len(row):
+                    record[column] = to_number(row[position])
+            yield record
+
+
+def numeric_columns(header):
+    """
+    Return the positions and names of the numeric CSV columns.
+
+    Parameters:
+        header (list): The column names.
+
+    Returns:
+        list: The (position, name) pairs of the numeric columns.
+    """
+    return [(position, column) for position, column in enumerate(header)
+            if column in NUMERIC_COLUMNS]
+
+
+def iter_ndjson_pairs(blocks):
+    """
+    Yield the product and quantity of newline-delimited JSON lines.
+
+    The two fields of a whole block are extracted with one regular
+    expression call each. They are only used when both match exactly
+    once on every line and at its top level: as many matches as lines,
+    no line naming either field twice and no nested object, whose
+    fields could be taken for missing top-level ones. Otherwise,
+    because of blank lines, nested or repeated fields, or values the
+    expressions cannot handle such as escaped product names or quoted
+    quantities, the lines of the block are decoded one by one instead.
+
+    Parameters:
+        blocks (iterable): The line blocks of the file.
+
+    Yields:
+        tuple: The product and quantity of every sale.
+    """
+    for block in blocks:
+        products = PRODUCT_FIELD.findall(block)
+        quantities = QUANTITY_FIELD.findall(block)
+        lines = block.count('\n') + 1
+        if (len(products) == len(quantities) == lines and
+                block.count('{') == lines and
+                not REPEATED_FIELD.search(block)):
+            try:
+                numbers = list(map(int, quantities))
+            except ValueError:
+                numbers = [to_number(quantity) for quantity in quantities]
+            yield from zip(products, numbers)
+            continue
+        for line in block.split('\n'):
+            if line.strip():
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise SalesLineError(f'Invalid sale: {record!r}')
+                yield sale_pair(record.get('Product'),
+                                record.get('Quantity'))
+
+
+def csv_columns(header):
+    """
+    Return the positions of the Product and Quantity columns.
+
+    Parameters:
+        header (list): The column names.
+
+    Returns:
+        tuple: The positions of the Product and Quantity columns.
+    """
+    assert 'Product' in header and 'Quantity' in header, \
+        'CSV header needs Product and Quantity columns'
+    return header.index('Product'), header.index('Quantity')
+
+
+def iter_csv_pairs(blocks, header=None, line=0):
+    """
+    Yield the product and quantity of CSV lines.
+
+    Parameters:
+        blocks (iterable): The line blocks of the file.
+        header (list): The column names, read from the first line when
+                       None.
+        line (int): The number of lines of the file before the blocks,
+                    used to number the lines in errors.
+
+    Yields:
+        tuple: The product and quantity of every sale.
+
+    Raises:
+        SalesLineError: When a line has no Product or Quantity value,
+                        or has an invalid one, see sale_pair.
+    """
+    columns = None if header is None else csv_columns(header)
+    for block in blocks:
+        reader = csv.reader(block.split('\n'))
+        for row in reader:
+            if not row:
+                continue
+            if columns is None:
+                columns = csv_columns(row)
+                continue
+            try:
+                if len(row) <= max(columns):
+                    raise SalesLineError(
+                        f'Missing Product or Quantity value in {row!r}')
+                yield sale_pair(row[columns[0]],
+                                to_number(row[columns[1]]))
+            except SalesLineError as error:
+                raise SalesLineError(
+                    f'Line {line + reader.line_num}: {error}') from None
+        line += block.count('\n') + 1
+
+
+def count_lines(file_name, end):
+    """
+    Count the lines of a file before an offset.
+
+    Parameters:
+        file_name (str): The path to an uncompressed file.
+        end (int): The offset, at a line start.
+
+    Returns:
+        int: The number of line breaks before the offset.
+    """
+    lines = 0
+    with open(file_name, 'rb') as opened_file:
+        remaining = end
+        while remaining > 0:
+            chunk = opened_file.read(min(LINE_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            lines += chunk.count(b'\n')
+    return lines
+
+
+def iter_sales_records(file_name, sales_format=None):
+    """
+    Yield the sales records of a file in any supported format.
+
+    Parameters:
+        file_name (str): The path to the sales file, '-' for stdin.
+        sales_format (str): 'json', 'ndjson' or 'csv', guessed from the
+                            extension when None.
+
+    Yields:
+        dict: The sales records of the file.
+    """
+    sales_format = sales_format or detect_format(file_name)
+    if sales_format == NDJSON:
+        yield from iter_ndjson_records(open_blocks(file_name))
+    elif sales_format == CSV:
+        yield from iter_csv_records(open_blocks(file_name))
+    else:
+        yield from iter_sales(file_name)
+
+
+def iter_sales_pairs(file_name, sales_format=None):
+    """
+    Yield the product and quantity of every sale of a line file.
+
+    Parameters:
+        file_name (str): The path to the sales file, '-' for stdin.
+        sales_format (str): 'ndjson' or 'csv', guessed from the
+                            extension when None.
+
+    Yields:
+        tuple: The product and quantity of every sale.
+    """
+    sales_format = sales_format or detect_format(file_name)
+    if sales_format == CSV:
+        yield from iter_csv_pairs(open_blocks(file_name))
+    else:
+        yield from iter_ndjson_pairs(open_blocks(file_name))
+
+
+def split_ranges(file_name, jobs, start=0):
+    """
+    Split a file into byte ranges starting and ending at line starts.
+
+    Parameters:
+        file_name (str): The path to an uncompressed file.
+        jobs (int): The number of ranges wanted.
+        start (int): The offset where the first range starts.
+
+    Returns:
+        list: The (start, end) offsets of the non-empty ranges.
+    """
+    size = os.path.getsize(file_name)
+    bounds = [start]
+    with open(file_name, 'rb') as opened_file:
+        for job in range(1, jobs):
+            offset = start + (size - start) * job // jobs
+            if offset <= bounds[-1]:
+                continue
+            opened_file.seek(offset - 1)
+            opened_file.readline()
+            bounds.append(min(opened_file.tell(), size))
+    bounds.append(size)
+    return [(first, last) for first, last in zip(bounds, bounds[1:])
+            if first < last]
+
+
+def count_pairs(pairs):
+    """
+    Add up the quantity sold of every product.
+
+    Parameters:
+        pairs (iterable): The product and quantity of every sale.
+
+    Returns:
+        dict: The products mapped to their total quantity.
+    """
+    quantities = {}
+    get = quantities.get
+    for product, quantity in pairs:
+        quantities[product] = get(product, 0) + quantity
+    return quantities
+
+
+def count_range(file_name, sales_format, start, end, header=None):
+    """
+    Add up the quantities of a byte range of a line file.
+
+    Parameters:
+        file_name (str): The path to an uncompressed file.
+        sales_format (str): 'ndjson' or 'csv'.
+        start (int): The offset of the first byte of the range.
+        end (int): The offset after the last byte of the range.
+        header (list): The CSV column names.
+
+    Returns:
+        dict: The products mapped to their total quantity.
+    """
+    blocks = iter_range_blocks(file_name, start, end)
+    if sales_format == CSV:
+        try:
+            return count_pairs(iter_csv_pairs(blocks, header))
+        except SalesLineError:
+            # Counted again to number the bad line from the file start.
+            blocks = iter_range_blocks(file_name, start, end)
+            return count_pairs(iter_csv_pairs(
+                blocks, header, count_lines(file_name, start)))
+    return count_pairs(iter_ndjson_pairs(blocks))
+
+
+def count_quantities(file_name, sales_format=None, jobs=1):
+    """
+    Add up the quantity sold of every product of a line file.
+
+    With several jobs an uncompressed file is split on line boundaries
+    and every range is counted by a separate process. Compressed files
+    and stdin are always read by a single process.
+
+    Parameters:
+        file_name (str): The path to the sales file, '-' for stdin.
+        sales_format (str): 'ndjson' or 'csv', guessed from the
+                            extension when None.
+        jobs (int): The number of worker processes.
+
+    Returns:
+        dict: The products mapped to their total quantity.
+    """
+    sales_format = sales_format or detect_format(file_name)
+    if jobs <= 1 or file_name == '-' or detect_codec(file_name):
+        return count_pairs(iter_sales_pairs(file_name, sales_format))
+    header = None
+    start = 0
+    if sales_format == CSV:
+        with open(file_name, 'rb') as opened_file:
+            first_line = opened_file.readline()
+        header = next(csv.reader(
+            [first_line.decode('utf-8-sig').rstrip('\r\n')]))
+        start = len(first_line)
+    ranges = split_ranges(file_name, jobs, start)
+    quantities = {}
+    with ProcessPoolExecutor(len(ranges) or 1) as executor:
+        futures = [executor.submit(count_range, file_name, sales_format,
+                                   first, last, header)
+                   for first, last in ranges]
+        for future in futures:
+            for product, quantity in future.result().items():
+                quantities[product] = quantities.get(product, 0) + quantity
+    return quantities
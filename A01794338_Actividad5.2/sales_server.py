@@ -0,0 +1,205 @@
+"""
+A resident server that computes sales without reloading the catalogue.
+
+The server loads and indexes the price catalogue once and then answers
+aggregation jobs over a Unix socket or over stdin/stdout. Each job is a
+single line of JSON and each answer is a single line of JSON, so other
+programs can keep one connection open and send thousands of jobs
+without paying interpreter startup or a catalogue parse per job.
+
+A job has either a "sales_file" path or inline "records":
+
+    {"sales_file": "TC1.salesRecord.json"}
+    {"records": [{"Product": "Honey", "Quantity": 2}], "output": "totals"}
+
+The optional "output" key selects "text" (the format_results report,
+the default) or "totals" (the structured totals and the quantities of
+the unmatched product names). An optional
+"results_file" key appends the text report to that file as main does.
+A "format" key ("json", "ndjson" or "csv") overrides the format guessed
+from the extension of "sales_file".
+
+Usage:
+    python sales_server.py priceCatalogue.json
+    python sales_server.py priceCatalogue.json --socket /tmp/sales.sock
+"""
+import argparse
+import json
+import os
+import socket
+import socketserver
+import sys
+import time
+
+from catalogue import Catalogue
+from computeSales import (read_sales, compute_results, format_results,
+                          write_results_file)
+from product_index import MATCH_MODES, NORMALIZED
+
+
+def run_job(catalogue, job):
+    """
+    Compute the sales for a single job.
+
+    Parameters:
+        catalogue (Catalogue): The in-memory price catalogue.
+        job (dict): The job with a "sales_file" path or inline "records".
+
+    Returns:
+        dict: The answer with the report or the totals and the
+              elapsed time in milliseconds.
+    """
+    start_time = time.time()
+    prices_dictionary, price_index, product_index = catalogue.refresh()
+    product_index = product_index.for_job()
+    if 'records' in job:
+        sales_datum = job['records']
+        sales_file = job.get('name', 'inline records')
+    else:
+        sales_file = job['sales_file']
+        sales_datum = read_sales(sales_file, job.get('format'))
+    assert isinstance(sales_datum, list), 'Sales must be a list of records'
+    total_sales_dict, total_sales = compute_results(
+        prices_dictionary, sales_datum, price_index=price_index,
+        product_index=product_index)
+    elapsed_time = time.time() - start_time
+    response = {'ok': True, 'elapsed_ms': round(elapsed_time * 1000, 3)}
+    if job.get('output', 'text') == 'totals':
+        response['totals'] = total_sales_dict
+        response['total_sales'] = total_sales
+        response['unmatched'] = {str(name): count for name, count
+                                 in product_index.unmatched.items()}
+        return response
+    results_list = [total_sales, elapsed_time, sales_file]
+    results = format_results(total_sales_dict, prices_dictionary, results_list,
+                             product_index.summary())
+    if job.get('results_file'):
+        write_results_file(results, job['results_file'])
+    response['results'] = results
+    return response
+
+
+def handle_line(catalogue, line):
+    """
+    Decode a job line, run it and encode the answer.
+
+    Errors are reported back to the client instead of stopping the
+    server.
+
+    Parameters:
+        catalogue (Catalogue): The in-memory price catalogue.
+        line (str): A line containing a JSON job.
+
+    Returns:
+        str: A line containing the JSON answer.
+    """
+    try:
+        job = json.loads(line)
+        assert isinstance(job, dict), 'Job must be a JSON object'
+        response = run_job(catalogue, job)
+    except (OSError, ValueError, KeyError, TypeError,
+            AssertionError) as error:
+        response = {'ok': False, 'error': f'{type(error).__name__}: {error}'}
+    return json.dumps(response) + '\n'
+
+
+class JobHandler(socketserver.StreamRequestHandler):
+    """
+    Handler that answers every job line sent over a connection.
+    """
+    def handle(self):
+        for raw_line in self.rfile:
+            line = raw_line.decode('utf-8').strip()
+            if line:
+                answer = handle_line(self.server.catalogue, line)
+                self.wfile.write(answer.encode('utf-8'))
+                self.wfile.flush()
+
+
+def serve_socket(catalogue, socket_path):
+    """
+    Serve jobs over a Unix socket until interrupted.
+
+    Parameters:
+        catalogue (Catalogue): The in-memory price catalogue.
+        socket_path (str): The path of the Unix socket to listen on.
+    """
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    with socketserver.ThreadingUnixStreamServer(socket_path,
+                                                JobHandler) as server:
+        server.catalogue = catalogue
+        server.daemon_threads = True
+        try:
+            server.serve_forever()
+        finally:
+            os.remove(socket_path)
+
+
+def serve_stdio(catalogue, input_stream, output_stream):
+    """
+    Serve jobs read line by line from a stream until it is closed.
+
+    Parameters:
+        catalogue (Catalogue): The in-memory price catalogue.
+        input_stream (file): The stream the jobs are read from.
+        output_stream (file): The stream the answers are written to.
+    """
+    for line in input_stream:
+        if line.strip():
+            output_stream.write(handle_line(catalogue, line))
+            output_stream.flush()
+
+
+def send_job(socket_path, job):
+    """
+    Send a single job to a running server and wait for the answer.
+
+    Parameters:
+        socket_path (str): The path of the server Unix socket.
+        job (dict): The job to run.
+
+    Returns:
+        dict: The answer of the server.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        with client.makefile('rwb') as stream:
+            stream.write((json.dumps(job) + '\n').encode('utf-8'))
+            stream.flush()
+            answer = stream.readline()
+    return json.loads(answer)
+
+
+def main():
+    """
+    Main function of the server.
+
+    Loads the catalogue and serves jobs over the requested transport.
+    """
+    parser = argparse.ArgumentParser(
+        description='Compute sales keeping the price catalogue loaded.')
+    parser.add_argument('prices_file', help='Path to the price catalogue')
+    parser.add_argument('--socket', dest='socket_path',
+                        help='Unix socket to listen on (stdin/stdout '
+                             'is used when omitted)')
+    parser.add_argument('--match', choices=MATCH_MODES, default=NORMALIZED,
+                        help='How product names that are not catalogue '
+                             'titles are matched, as in computeSales')
+    parser.add_argument('--match-cutoff', type=float, default=0.85,
+                        help='Minimum similarity of a fuzzy match')
+    args = parser.parse_args()
+
+    catalogue = Catalogue(args.prices_file, args.match, args.match_cutoff)
+    catalogue.load()
+    try:
+        if args.socket_path:
+            serve_socket(catalogue, args.socket_path)
+        else:
+            serve_stdio(catalogue, sys.stdin, sys.stdout)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,286 @@
+"""
+Module with bounded-memory sketches for summarizing huge sales streams.
+
+The sketches answer dashboard questions in a single pass and in
+constant memory, whatever the size of the input:
+
+    - SpaceSaving keeps the top-K products by a weight. With k counters
+      every reported weight overestimates the true weight by at most
+      W / k, where W is the total weight seen, and every product whose
+      true weight is above W / k is guaranteed to be reported.
+    - CountMinSketch estimates the weight of any product. With width
+      ceil(e / epsilon) and depth ceil(ln(1 / delta)) the estimate
+      overestimates the true weight by more than epsilon * W with
+      probability at most delta.
+    - HyperLogLog estimates the number of distinct values. With 2 ** p
+      registers the relative standard error is about 1.04 / sqrt(2 ** p),
+      0.81% for the default p = 14 (16 KiB of registers).
+
+The bounds above hold for non-negative weights. Returns (negative
+quantities) are subtracted from counters already tracked but never
+evict a product, so the top-K bounds become approximate when the
+stream contains many of them.
+
+Classes:
+    - SpaceSaving: Weighted heavy hitters.
+    - CountMinSketch: Weighted frequency estimates.
+    - HyperLogLog: Distinct count estimates.
+    - SalesSketch: The sketches fed by a stream of sales records.
+"""
+import hashlib
+import heapq
+import math
+
+
+def hash64(value, salt=b''):
+    """
+    Hash a value into two independent 64-bit integers.
+
+    Parameters:
+        value: The value to hash, converted to its string form.
+        salt (bytes): An optional salt of at most 16 bytes.
+
+    Returns:
+        tuple: Two 64-bit integers.
+    """
+    digest = hashlib.blake2b(str(value).encode('utf-8'), digest_size=16,
+                             salt=salt).digest()
+    return (int.from_bytes(digest[:8], 'little'),
+            int.from_bytes(digest[8:], 'little'))
+
+
+class SpaceSaving:
+    """
+    Class that keeps the top-K items of a weighted stream.
+
+    Methods:
+        - update(item, weight): Add a weight to an item.
+        - top(count): Return the heaviest items with their error.
+    """
+    def __init__(self, capacity):
+        assert capacity >= 1, 'Capacity must be at least 1'
+        self.capacity = capacity
+        self.counters = {}
+        self.errors = {}
+        self.heap = []
+        self.total = 0
+
+    def update(self, item, weight=1):
+        """
+        Add a weight to an item, evicting the lightest item if needed.
+
+        Parameters:
+            - item: The item observed in the stream.
+            - weight (int, float): The weight of the observation.
+        """
+        self.total += max(weight, 0)
+        if item in self.counters:
+            self.counters[item] += weight
+        elif weight <= 0:
+            return
+        elif len(self.counters) < self.capacity:
+            self.counters[item] = weight
+            self.errors[item] = 0
+        else:
+            floor, evicted = heapq.heappop(self.heap)
+            while self.counters.get(evicted) != floor:
+                floor, evicted = heapq.heappop(self.heap)
+            del self.counters[evicted]
+            del self.errors[evicted]
+            self.counters[item] = floor + weight
+            self.errors[item] = floor
+        heapq.heappush(self.heap, (self.counters[item], item))
+        if len(self.heap) > 4 * self.capacity:
+            self.heap = [(count, key) for key, count in self.counters.items()]
+            heapq.heapify(self.heap)
+
+    def top(self, count):
+        """
+        Return the heaviest items.
+
+        Parameters:
+            - count (int): The number of items to return.
+
+        Returns:
+            list: Tuples of item, estimated weight and maximum
+                  overestimation, heaviest first.
+        """
+        heaviest = heapq.nlargest(count, self.counters.items(),
+                                  key=lambda pair: pair[1])
+        return [(item, weight, self.errors[item]) for item, weight in heaviest]
+
+
+class CountMinSketch:
+    """
+    Class that estimates the weight of any item of a stream.
+
+    Methods:
+        - update(item, weight): Add a weight to an item.
+        - estimate(item): Return the estimated weight of an item.
+    """
+    def __init__(self, epsilon=0.001, delta=0.01):
+        self.epsilon = epsilon
+        self.delta = delta
+        self.width = math.ceil(math.e / epsilon)
+        self.depth = math.ceil(math.log(1 / delta))
+        self.table = [[0] * self.width for _ in range(self.depth)]
+        self.total = 0
+
+    def columns(self, item):
+        """
+        Return the column of an item in each row of the table.
+
+        Parameters:
+            - item: The item to locate.
+
+        Returns:
+            list: One column index per row.
+        """
+        first, second = hash64(item, b'count-min')
+        return [(first + row * second) % self.width
+                for row in range(self.depth)]
+
+    def update(self, item, weight=1):
+        """
+        Add a weight to an item.
+
+        Parameters:
+            - item: The item observed in the stream.
+            - weight (int, float): The weight of the observation.
+        """
+        self.total += max(weight, 0)
+        for row, column in enumerate(self.columns(item)):
+            self.table[row][column] += weight
+
+    def estimate(self, item):
+        """
+        Return the estimated weight of an item.
+
+        Parameters:
+            - item: The item to estimate.
+
+        Returns:
+            int, float: The estimated weight, at most epsilon * total
+            above the true weight with probability 1 - delta.
+        """
+        return min(self.table[row][column]
+                   for row, column in enumerate(self.columns(item)))
+
+
+class HyperLogLog:
+    """
+    Class that estimates the number of distinct values of a stream.
+
+    Methods:
+        - add(value): Observe a value.
+        - count(): Return the estimated number of distinct values.
+    """
+    def __init__(self, precision=14):
+        assert 4 <= precision <= 18, 'Precision must be between 4 and 18'
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(self.size)
+        self.relative_error = 1.04 / math.sqrt(self.size)
+
+    def add(self, value):
+        """
+        Observe a value.
+
+        Parameters:
+            - value: The value observed in the stream.
+        """
+        hashed = hash64(value, b'hyperloglog')[0]
+        index = hashed >> (64 - self.precision)
+        remainder = hashed & ((1 << (64 - self.precision)) - 1)
+        rank = 64 - self.precision - remainder.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self):
+        """
+        Return the estimated number of distinct values.
+
+        Returns:
+            int: The estimated number of distinct values.
+        """
+        alpha = 0.7213 / (1 + 1.079 / self.size)
+        harmonic = sum(2.0 ** -register for register in self.registers)
+        estimate = alpha * self.size * self.size / harmonic
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * self.size and zeros:
+            estimate = self.size * math.log(self.size / zeros)
+        return round(estimate)
+
+
+class SalesSketch:
+    """
+    Class that feeds the sketches with a stream of sales records.
+
+    Methods:
+        - add(sale): Observe a sale.
+        - format_results(top_k): Format the sketch answers.
+    """
+    def __init__(self, prices_dictionary, top_k=10, price_index=None,
+                 epsilon=0.001, delta=0.01, precision=14):
+        self.prices_dictionary = prices_dictionary
+        self.price_index = price_index
+        self.top_k = top_k
+        self.revenue = SpaceSaving(4 * top_k)
+        self.quantity = SpaceSaving(4 * top_k)
+        self.frequency = CountMinSketch(epsilon, delta)
+        self.distinct_sales = HyperLogLog(precision)
+        self.records = 0
+
+    def add(self, sale):
+        """
+        Observe a sale.
+
+        Only products of the catalogue sold in a numeric quantity are
+        counted, as in the exact report, while every SALE_ID counts
+        towards the distinct sales. Records that are not objects are
+        only counted as read.
+
+        Parameters:
+            - sale (dict): The sale record.
+        """
+        self.records += 1
+        if not isinstance(sale, dict):
+            return
+        if 'SALE_ID' in sale:
+            self.distinct_sales.add(sale['SALE_ID'])
+        product = sale.get('Product')
+        quantity = sale.get('Quantity')
+        if (product not in self.prices_dictionary or
+                isinstance(quantity, bool) or
+                not isinstance(quantity, (int, float))):
+            return
+        price = self.prices_dictionary[product]
+        if self.price_index is not None and self.price_index.dated:
+            price = self.price_index.price_for(sale)
+        self.quantity.update(product, quantity)
+        self.frequency.update(product, quantity)
+        self.revenue.update(product, quantity * price)
+
+    def format_results(self):
+        """
+        Format the top products and the distinct sales estimate.
+
+        Returns:
+            str: A formatted string with the sketch answers.
+        """
+        results = f'Top {self.top_k} products by revenue\n\n'
+        for item, weight, error in self.revenue.top(self.top_k):
+            results += (f'{item}'.ljust(40, '-') +
+                        f'${round(weight, 2)}'.ljust(14) +
+                        f'(+/- ${round(error, 2)})\n')
+        results += f'\nTop {self.top_k} products by quantity\n\n'
+        for item, weight, error in self.quantity.top(self.top_k):
+            results += (f'{item}'.ljust(40, '-') + f'{weight}'.ljust(14) +
+                        f'(+/- {error}, count-min '
+                        f'{self.frequency.estimate(item)})\n')
+        error = self.distinct_sales.relative_error
+        results += (
+            '\n' + 'Records read'.ljust(50, '-') + f'{self.records}\n' +
+            'Distinct sales (approx.)'.ljust(50, '-') +
+            f'{self.distinct_sales.count()} (+/- {error:.2%})\n\n')
+        return results
@@ -0,0 +1,35 @@
+"""
+Module for streaming sales records from JSON files.
+
+This module reads sales records one at a time instead of loading the
+whole file, so memory stays bounded no matter how big the input is. It
+accepts a single JSON array of records or objects concatenated one after
+the other, as written by a producer appending records to a stream. Text
+after the array is an error. The files may be compressed with gzip,
+bzip2 or xz; the decoding and decompression are done by the json_stream
+module.
+
+Functions:
+    - iter_sales(file_name, chunk_size): Yield the records of a file.
+"""
+import sys
+
+from json_stream import CHUNK_SIZE, iter_json_records, open_text
+
+
+def iter_sales(file_name, chunk_size=CHUNK_SIZE):
+    """
+    Yield the sales records of a JSON file one at a time.
+
+    Parameters:
+        file_name (str): The path to the sales file, '-' for stdin.
+        chunk_size (int): The number of characters read at a time.
+
+    Yields:
+        dict: The sales records of the file.
+    """
+    if file_name == '-':
+        yield from iter_json_records(sys.stdin, chunk_size)
+        return
+    with open_text(file_name) as opened_file:
+        yield from iter_json_records(opened_file, chunk_size)
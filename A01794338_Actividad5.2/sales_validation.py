@@ -0,0 +1,128 @@
+"""
+Module for validating sales records during aggregation.
+
+This module provides a validator that aggregate_sales calls for every
+sale inside its single aggregation pass, so checking the records costs
+no extra parse or scan. When the sales are priced as of their date,
+the validator is given the price index and also rejects the sales
+whose SALE_Date cannot be parsed. Rejected rows are written with their
+reason to a quarantine file (one JSON object per line) and counted per
+reason. When the names are resolved by a product index, a sale is an
+unknown_product only when the index could not match its name.
+
+Classes:
+    - SalesValidationError: Raised by the fail-fast policy.
+    - SalesValidator: Checks sales and quarantines the rejected ones.
+"""
+import json
+import math
+from collections import Counter
+
+from price_index import sale_day
+
+FAIL_FAST = 'fail-fast'
+SKIP = 'skip'
+POLICIES = (FAIL_FAST, SKIP)
+
+
+class SalesValidationError(ValueError):
+    """
+    Error raised when a sale is rejected under the fail-fast policy.
+    """
+
+
+class SalesValidator:
+    """
+    Class that validates sales and quarantines the rejected ones.
+
+    Methods:
+        - check(row, sale, sales_dict): Return whether a sale is valid.
+        - reject(row, sale, reason): Quarantine and count a sale.
+        - summary(): Format the rejection counters for the report.
+        - close(): Close the quarantine file.
+    """
+    def __init__(self, policy=SKIP, quarantine_file=None, price_index=None):
+        assert policy in POLICIES, f'Policy must be one of {POLICIES}'
+        self.policy = policy
+        self.check_dates = price_index is not None and price_index.dated
+        self.quarantine_file = quarantine_file
+        self.quarantine = None
+        self.counters = Counter()
+        self.accepted = 0
+
+    def check(self, row, sale, sales_dict):
+        """
+        Check a sale and reject it when it cannot be aggregated.
+
+        Parameters:
+            - row (int): The position of the sale in the sales file.
+            - sale (dict): The sale to check.
+            - sales_dict (dict): The aggregation keyed by known products.
+
+        Returns:
+            bool: True when the sale can be added to the aggregation.
+        """
+        if not isinstance(sale, dict):
+            reason = 'not_an_object'
+        elif 'Product' not in sale:
+            reason = 'missing_product'
+        elif 'Quantity' not in sale:
+            reason = 'missing_quantity'
+        elif (isinstance(sale['Quantity'], bool) or
+              not isinstance(sale['Quantity'], (int, float)) or
+              not math.isfinite(sale['Quantity'])):
+            reason = 'invalid_quantity'
+        elif not isinstance(sale['Product'], str):
+            reason = 'invalid_product'
+        elif sale['Product'] not in sales_dict:
+            reason = 'unknown_product'
+        elif self.check_dates and sale_day(sale.get('SALE_Date')) is None:
+            reason = 'invalid_date'
+        else:
+            self.accepted += 1
+            return True
+        self.reject(row, sale, reason)
+        return False
+
+    def reject(self, row, sale, reason):
+        """
+        Quarantine and count a rejected sale.
+
+        Parameters:
+            - row (int): The position of the sale in the sales file.
+            - sale: The rejected sale.
+            - reason (str): The reason of the rejection.
+
+        Raises:
+            SalesValidationError: When the policy is fail-fast.
+        """
+        self.counters[reason] += 1
+        if self.quarantine_file:
+            if self.quarantine is None:
+                self.quarantine = open(self.quarantine_file, 'a',
+                                       encoding='utf-8')
+            record = {'row': row, 'reason': reason, 'sale': sale}
+            self.quarantine.write(json.dumps(record) + '\n')
+        if self.policy == FAIL_FAST:
+            self.close()
+            raise SalesValidationError(f'Row {row} rejected: {reason}')
+
+    def summary(self):
+        """
+        Format the validation counters to be appended to the report.
+
+        Returns:
+            str: A formatted string with the accepted and rejected rows.
+        """
+        summary = 'Accepted rows'.ljust(50, '-') + f'{self.accepted}\n'
+        for reason, count in sorted(self.counters.items()):
+            summary += f'Rejected: {reason}'.ljust(50, '-') + f'{count}\n'
+        return summary + '\n'
+
+    def close(self):
+        """
+        Close the quarantine file if it was opened.
+        """
+        if self.quarantine is not None:
+            self.quarantine.close()
+            self.quarantine = None
@@ -0,0 +1,287 @@
+"""
+A watch mode that computes sales as soon as sales files land.
+
+This program polls an inbox directory for *.salesRecord.json, .ndjson
+or .csv files (optionally compressed as .gz, .bz2 or .xz), queues new
+or changed files and processes them on a bounded pool of worker
+threads sharing a single in-memory catalogue. The report of each file
+is appended to the results file as soon as that file is done, and a
+ledger kept in the inbox records what was processed, so files are not
+processed twice across restarts.
+
+Usage:
+    python sales_watch.py priceCatalogue.json inbox/
+    python sales_watch.py priceCatalogue.json inbox/ --workers 8 --once
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from catalogue import Catalogue
+from computeSales import (read_json, read_sales, compute_results,
+                          format_results, write_results_file)
+from product_index import MATCH_MODES, NORMALIZED
+
+PATTERN_SUFFIXES = tuple('.salesRecord.' + sales_format + extension
+                         for sales_format in ('json', 'ndjson', 'csv')
+                         for extension in ('', '.gz', '.bz2', '.xz'))
+LEDGER_NAME = '.salesWatchLedger.json'
+
+
+def positive_int(value):
+    """
+    Parse a command line value that must be a positive integer.
+
+    Parameters:
+        value (str): The value given on the command line.
+
+    Returns:
+        int: The parsed value.
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(
+            f'{value!r} is not a positive integer')
+    return number
+
+
+def file_signature(path):
+    """
+    Return the values used to detect that a file changed.
+
+    Parameters:
+        path (str): The path of the file.
+
+    Returns:
+        list: The modification time in nanoseconds and the size.
+    """
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+class SalesWatcher:
+    """
+    Class that watches an inbox directory and processes sales files.
+
+    Methods:
+        - poll(): Scan the inbox once and queue new or changed files.
+        - process(name, signature): Compute and append the report of
+          a sales file.
+        - report(sales_file, catalogue): Compute the report of a sales
+          file.
+        - log_failure(future): Print the unexpected error of a file.
+        - run(interval, once): Poll the inbox until interrupted.
+    """
+    def __init__(self, catalogue, inbox, results_file, workers=4):
+        self.catalogue = catalogue
+        self.inbox = inbox
+        self.results_file = results_file
+        self.ledger_file = os.path.join(inbox, LEDGER_NAME)
+        self.ledger = self.read_ledger()
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.lock = threading.Lock()
+        self.pending = set()
+        self.last_seen = {}
+
+    def read_ledger(self):
+        """
+        Read the ledger of processed files.
+
+        Returns:
+            dict: The file names mapped to the signature they had when
+                  they were processed.
+        """
+        if not os.path.exists(self.ledger_file):
+            return {}
+        data = read_json(self.ledger_file)
+        assert isinstance(data, dict), 'Ledger does not have correct format'
+        return data
+
+    def write_ledger(self):
+        """
+        Write the ledger atomically so a crash never leaves it truncated.
+        """
+        temp_file = self.ledger_file + '.tmp'
+        with open(temp_file, 'w', encoding='utf-8') as file:
+            json.dump(self.ledger, file, indent=4)
+        os.replace(temp_file, self.ledger_file)
+
+    def poll(self, wait_stable=True):
+        """
+        Scan the inbox once and queue new or changed files.
+
+        A file is queued once its signature did not change between two
+        polls, so files still being copied are not read half written.
+
+        Parameters:
+            - wait_stable (bool): Whether to wait for a stable signature.
+
+        Returns:
+            list: The futures of the queued files.
+        """
+        futures = []
+        for name in sorted(os.listdir(self.inbox)):
+            if not name.endswith(PATTERN_SUFFIXES):
+                continue
+            try:
+                signature = file_signature(os.path.join(self.inbox, name))
+            except FileNotFoundError:
+                continue
+            previous = self.last_seen.get(name)
+            self.last_seen[name] = signature
+            if wait_stable and previous != signature:
+                continue
+            with self.lock:
+                entry = self.ledger.get(name)
+                if name in self.pending or (
+                        entry and entry['signature'] == signature):
+                    continue
+                self.pending.add(name)
+            future = self.executor.submit(self.process, name, signature)
+            future.add_done_callback(self.log_failure)
+            futures.append(future)
+        return futures
+
+    def process(self, name, signature):
+        """
+        Compute the report of a sales file and append it to the results.
+
+        Any error raised by the file is recorded in the ledger, so the
+        file is not processed again until it changes. A catalogue that
+        cannot be reloaded is not the fault of the file, which is left
+        out of the ledger and retried on a later poll. The file is
+        removed from the pending set whatever happens; an error writing
+        the results or the ledger is raised to the future, see
+        log_failure.
+
+        Parameters:
+            - name (str): The file name inside the inbox.
+            - signature (list): The signature the file had when queued.
+        """
+        sales_file = os.path.join(self.inbox, name)
+        try:
+            try:
+                catalogue = self.catalogue.refresh()
+            except Exception as exc:
+                print(f'Could not reload the catalogue, {sales_file} will '
+                      f'be retried: {type(exc).__name__}: {exc}',
+                      file=sys.stderr)
+                return
+            results = error = None
+            try:
+                results = self.report(sales_file, catalogue)
+            except Exception as exc:
+                error = f'{type(exc).__name__}: {exc}'
+                print(f'Could not process {sales_file}: {error}',
+                      file=sys.stderr)
+            with self.lock:
+                if error is None:
+                    write_results_file(results, self.results_file)
+                self.ledger[name] = {'signature': signature, 'error': error}
+                self.write_ledger()
+        finally:
+            with self.lock:
+                self.pending.discard(name)
+
+    def report(self, sales_file, catalogue):
+        """
+        Compute the report of a sales file.
+
+        Parameters:
+            - sales_file (str): The path of the sales file.
+            - catalogue (tuple): The prices dictionary, price index and
+              product index returned by Catalogue.refresh.
+
+        Returns:
+            str: The formatted report.
+        """
+        start_time = time.time()
+        prices_dictionary, price_index, product_index = catalogue
+        product_index = product_index.for_job()
+        sales_datum = read_sales(sales_file)
+        total_sales_dict, total_sales = compute_results(
+            prices_dictionary, sales_datum, price_index=price_index,
+            product_index=product_index)
+        elapsed_time = time.time() - start_time
+        results_list = [total_sales, elapsed_time, sales_file]
+        return format_results(total_sales_dict, prices_dictionary,
+                              results_list, product_index.summary())
+
+    @staticmethod
+    def log_failure(future):
+        """
+        Print the error a queued file failed with outside of its report,
+        if any.
+
+        Parameters:
+            - future (Future): The future of a processed file.
+        """
+        exception = future.exception()
+        if exception is not None:
+            print(f'Worker failed: {type(exception).__name__}: '
+                  f'{exception}', file=sys.stderr)
+
+    def run(self, interval=1.0, once=False):
+        """
+        Poll the inbox until interrupted.
+
+        Parameters:
+            - interval (float): Seconds to wait between polls.
+            - once (bool): Process the files present now and return.
+        """
+        try:
+            if once:
+                for future in self.poll(wait_stable=False):
+                    future.result()
+                return
+            while True:
+                self.poll()
+                time.sleep(interval)
+        finally:
+            self.executor.shutdown(wait=True)
+
+
+def main():
+    """
+    Main function of the watch mode.
+
+    Loads the catalogue and watches the inbox until interrupted.
+    """
+    parser = argparse.ArgumentParser(
+        description='Compute sales for files as they land in a directory.')
+    parser.add_argument('prices_file', help='Path to the price catalogue')
+    parser.add_argument('inbox', help='Directory receiving sales files')
+    parser.add_argument('--results-file', default='SalesResults.txt',
+                        help='File the reports are appended to')
+    parser.add_argument('--workers', type=positive_int, default=4,
+                        help='Number of files processed at the same time')
+    parser.add_argument('--interval', type=float, default=1.0,
+                        help='Seconds between two scans of the inbox')
+    parser.add_argument('--once', action='store_true',
+                        help='Process the files present now and exit')
+    parser.add_argument('--match', choices=MATCH_MODES, default=NORMALIZED,
+                        help='How product names that are not catalogue '
+                             'titles are matched, as in computeSales')
+    parser.add_argument('--match-cutoff', type=float, default=0.85,
+                        help='Minimum similarity of a fuzzy match')
+    args = parser.parse_args()
+
+    catalogue = Catalogue(args.prices_file, args.match, args.match_cutoff)
+    catalogue.load()
+    watcher = SalesWatcher(catalogue, args.inbox, args.results_file,
+                           workers=args.workers)
+    try:
+        watcher.run(interval=args.interval, once=args.once)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+import os
+import sys
+import unittest
+
+DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRECTORY)
+
+from computeSales import compute_results, get_prices_dict
+from price_index import PriceIndex, SaleDateError, sale_day
+
+PRICE_DATUM = [{'title': 'Honey', 'price': 18.5, 'effective_date': '2023-12-02'},
+               {'title': 'Honey', 'price': 17.01},
+               {'title': 'Honey', 'price': 20.0, 'effective_date': '2023-12-20'},
+               {'title': 'Brown eggs', 'price': 28.1}]
+
+
+def sale(date, product='Honey', quantity=1):
+    return {'SALE_ID': 1, 'SALE_Date': date, 'Product': product, 'Quantity': quantity}
+
+
+class TestPriceIndex(unittest.TestCase):
+    def setUp(self):
+        self.price_index = PriceIndex(PRICE_DATUM)
+
+    def test_sale_is_priced_with_the_version_effective_on_its_date(self):
+        self.assertEqual(self.price_index.price_for(sale('01/12/23')), 17.01)
+        self.assertEqual(self.price_index.price_for(sale('02/12/23')), 18.5)
+        self.assertEqual(self.price_index.price_for(sale('19/12/23')), 18.5)
+        self.assertEqual(self.price_index.price_for(sale('20/12/23')), 20.0)
+        self.assertEqual(self.price_index.price_for(sale('01/01/24', 'Brown eggs')), 28.1)
+
+    def test_day_before_the_first_version_gets_the_first_version(self):
+        price_index = PriceIndex([{'title': 'Honey', 'price': 18.5, 'effective_date': '2023-12-02'}])
+        self.assertEqual(price_index.price_for(sale('01/01/20')), 18.5)
+
+    def test_current_prices_are_the_latest_versions(self):
+        self.assertTrue(self.price_index.dated)
+        self.assertEqual(self.price_index.current_prices(), {'Honey': 20.0, 'Brown eggs': 28.1})
+
+    def test_catalogue_without_dates_is_not_dated(self):
+        self.assertFalse(PriceIndex([{'title': 'Honey', 'price': 17.01}]).dated)
+
+    def test_invalid_sale_date_raises_saledateerror(self):
+        for date in (None, '2023-12-01', '31/02/23'):
+            self.assertRaises(SaleDateError, self.price_index.price_for, sale(date))
+        self.assertIsNone(sale_day('not a date'))
+
+    def test_dated_results_add_every_sale_at_its_own_price(self):
+        sales = [sale('01/12/23', quantity=2), sale('05/12/23'), sale('25/12/23'),
+                 sale('25/12/23', 'Brown eggs')]
+        total_sales_dict, total_sales = compute_results(
+            self.price_index.current_prices(), sales, price_index=self.price_index)
+        self.assertAlmostEqual(total_sales_dict['Honey'], 2 * 17.01 + 18.5 + 20.0)
+        self.assertEqual(total_sales, round(2 * 17.01 + 18.5 + 20.0 + 28.1, 2))
+
+    def test_undated_results_match_the_prices_dictionary(self):
+        price_datum = [{'title': 'Honey', 'price': 17.01}]
+        sales = [sale('01/12/23', quantity=3)]
+        undated = compute_results(get_prices_dict(price_datum), sales, price_index=PriceIndex(price_datum))
+        self.assertEqual(undated, compute_results(get_prices_dict(price_datum), sales))
+
+
+if __name__ == '__main__':
+    unittest.main()
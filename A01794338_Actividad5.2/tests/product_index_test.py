@@ -0,0 +1,78 @@
+import os
+import sys
+import unittest
+
+DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRECTORY)
+
+from computeSales import compute_quantity_results
+from product_index import EXACT, FUZZY, NORMALIZED, ProductIndex, normalize_product
+
+PRICES = {'Sweet fresh stawberry': 29.45, 'Brown eggs': 28.1, 'Honey': 17.01}
+
+
+class TestProductIndex(unittest.TestCase):
+    def test_normalize_product_folds_case_and_whitespace(self):
+        self.assertEqual(normalize_product('  Sweet FRESH\tstawberry '), 'sweet fresh stawberry')
+
+    def test_exact_mode_only_matches_titles(self):
+        product_index = ProductIndex(PRICES, EXACT)
+        self.assertEqual(product_index.resolve('Honey'), 'Honey')
+        self.assertIsNone(product_index.resolve('honey', 2))
+        self.assertEqual(product_index.unmatched, {'honey': 2})
+
+    def test_normalized_mode_is_the_default_and_is_not_fuzzy(self):
+        product_index = ProductIndex(PRICES)
+        self.assertEqual(product_index.mode, NORMALIZED)
+        self.assertEqual(product_index.resolve('sweet fresh  Stawberry', 3), 'Sweet fresh stawberry')
+        self.assertIsNone(product_index.resolve('Brown egs'))
+        self.assertEqual(product_index.corrected, {('sweet fresh  Stawberry', 'Sweet fresh stawberry'): 3})
+
+    def test_fuzzy_mode_matches_close_names_above_the_cutoff(self):
+        product_index = ProductIndex(PRICES, FUZZY, cutoff=0.85)
+        self.assertEqual(product_index.resolve('Brown egs'), 'Brown eggs')
+        self.assertIsNone(product_index.resolve('Bread'))
+        self.assertIsNone(ProductIndex(PRICES, FUZZY, cutoff=0.99).resolve('Brown egs'))
+
+    def test_names_that_are_not_strings_are_unmatched(self):
+        product_index = ProductIndex(PRICES, FUZZY)
+        self.assertIsNone(product_index.resolve(7, 1))
+        self.assertEqual(product_index.unmatched, {7: 1})
+
+    def test_canonical_sales_copies_only_the_corrected_sales(self):
+        product_index = ProductIndex(PRICES)
+        sales = [{'Product': 'Honey', 'Quantity': 1}, {'Product': 'HONEY', 'Quantity': 2},
+                 {'Product': 'Nope', 'Quantity': 'x'}, 'not a sale']
+        canonical = list(product_index.canonical_sales(sales))
+        self.assertIs(canonical[0], sales[0])
+        self.assertEqual(canonical[1], {'Product': 'Honey', 'Quantity': 2})
+        self.assertEqual(sales[1]['Product'], 'HONEY')
+        self.assertIs(canonical[2], sales[2])
+        self.assertEqual(product_index.unmatched, {'Nope': 0})
+
+    def test_canonical_sales_can_leave_unmatched_names_to_a_validator(self):
+        product_index = ProductIndex(PRICES)
+        list(product_index.canonical_sales([{'Product': 'Nope', 'Quantity': 1}], count_unmatched=False))
+        self.assertEqual(product_index.unmatched, {})
+
+    def test_quantities_of_names_of_the_same_title_are_merged(self):
+        product_index = ProductIndex(PRICES)
+        total_sales_dict, total_sales = compute_quantity_results(
+            PRICES, {'Honey': 1, 'honey': 2, 'Nope': 5}, product_index)
+        self.assertAlmostEqual(total_sales_dict['Honey'], 3 * 17.01)
+        self.assertEqual(total_sales, round(3 * 17.01, 2))
+        summary = product_index.summary()
+        self.assertIn('Matched: honey -> Honey', summary)
+        self.assertIn('Unmatched: Nope', summary)
+
+    def test_jobs_count_their_names_separately(self):
+        product_index = ProductIndex(PRICES)
+        job = product_index.for_job()
+        job.resolve('HONEY')
+        self.assertEqual(product_index.corrected, {})
+        self.assertEqual(product_index.summary(), '')
+        self.assertIs(job.find_title, product_index.find_title)
+
+
+if __name__ == '__main__':
+    unittest.main()
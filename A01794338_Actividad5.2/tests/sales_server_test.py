@@ -0,0 +1,69 @@
+import io
+import json
+import os
+import sys
+import unittest
+
+DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRECTORY)
+
+from catalogue import Catalogue
+from sales_server import handle_line, serve_stdio
+
+PRICES_FILE = os.path.join(DIRECTORY, 'priceCatalogue.json')
+SALES_FILE = os.path.join(DIRECTORY, 'TC1.salesRecord.json')
+RECORDS = [{'Product': 'Brown eggs', 'Quantity': 2}, {'Product': 'brown  EGGS', 'Quantity': 1}]
+
+
+def answer(catalogue, job):
+    line = job if isinstance(job, str) else json.dumps(job)
+    return json.loads(handle_line(catalogue, line))
+
+
+class TestSalesServer(unittest.TestCase):
+    def setUp(self):
+        self.catalogue = Catalogue(PRICES_FILE)
+        self.catalogue.load()
+
+    def test_inline_records_are_totaled(self):
+        response = answer(self.catalogue, {'records': RECORDS, 'output': 'totals'})
+        self.assertTrue(response['ok'])
+        self.assertAlmostEqual(response['totals']['Brown eggs'], 3 * 28.1)
+        self.assertEqual(response['unmatched'], {})
+
+    def test_sales_file_gives_the_report_of_computesales(self):
+        response = answer(self.catalogue, {'sales_file': SALES_FILE})
+        self.assertTrue(response['ok'])
+        self.assertIn('Total sales', response['results'])
+        self.assertIn('$2481.86', response['results'])
+
+    def test_unknown_products_are_reported_as_unmatched(self):
+        records = RECORDS + [{'Product': 'Nope', 'Quantity': 3}]
+        response = answer(self.catalogue, {'records': records, 'output': 'totals'})
+        self.assertTrue(response['ok'])
+        self.assertEqual(response['unmatched'], {'Nope': 3})
+        self.assertNotIn('Nope', response['totals'])
+        self.assertIn('Unmatched: Nope', answer(self.catalogue, {'records': records})['results'])
+
+    def test_malformed_lines_are_answered_with_an_error(self):
+        for line, error in (('{"records": [', 'JSONDecodeError'),
+                            ('[1, 2]', 'AssertionError'),
+                            ('{"records": {"Product": "Honey"}}', 'AssertionError'),
+                            ('{"output": "totals"}', 'KeyError'),
+                            ('{"sales_file": "missing.json"}', 'FileNotFoundError')):
+            response = answer(self.catalogue, line)
+            self.assertFalse(response['ok'])
+            self.assertTrue(response['error'].startswith(error), response['error'])
+
+    def test_stdio_loop_answers_every_job_in_order(self):
+        jobs = [json.dumps({'records': RECORDS, 'output': 'totals'}), '', 'not json',
+                json.dumps({'records': [{'Product': 'Nope', 'Quantity': 1}], 'output': 'totals'})]
+        output_stream = io.StringIO()
+        serve_stdio(self.catalogue, io.StringIO('\n'.join(jobs) + '\n'), output_stream)
+        answers = [json.loads(line) for line in output_stream.getvalue().splitlines()]
+        self.assertEqual([response['ok'] for response in answers], [True, False, True])
+        self.assertEqual(answers[2]['unmatched'], {'Nope': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import random
+import sys
+import unittest
+from collections import Counter
+
+DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRECTORY)
+
+from sales_sketch import CountMinSketch, HyperLogLog, SalesSketch, SpaceSaving
+
+
+def skewed_stream(count, items, seed=0):
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(items)]
+    names = [f'Product {rank}' for rank in range(items)]
+    return [(name, rng.randint(1, 9)) for name in rng.choices(names, weights, k=count)]
+
+
+class TestSketches(unittest.TestCase):
+    def setUp(self):
+        self.stream = skewed_stream(20000, 500)
+        self.truth = Counter()
+        for item, weight in self.stream:
+            self.truth[item] += weight
+        self.total = sum(self.truth.values())
+
+    def test_space_saving_overestimates_by_at_most_total_over_capacity(self):
+        capacity = 40
+        sketch = SpaceSaving(capacity)
+        for item, weight in self.stream:
+            sketch.update(item, weight)
+        bound = self.total / capacity
+        reported = {}
+        for item, weight, error in sketch.top(capacity):
+            reported[item] = weight
+            self.assertGreaterEqual(weight, self.truth[item])
+            self.assertLessEqual(weight - self.truth[item], error)
+            self.assertLessEqual(error, bound)
+        heavy = [item for item, weight in self.truth.items() if weight > bound]
+        self.assertTrue(heavy)
+        for item in heavy:
+            self.assertIn(item, reported)
+
+    def test_count_min_overestimates_by_at_most_epsilon_total(self):
+        sketch = CountMinSketch(epsilon=0.01, delta=0.01)
+        for item, weight in self.stream:
+            sketch.update(item, weight)
+        misses = 0
+        for item, weight in self.truth.items():
+            estimate = sketch.estimate(item)
+            self.assertGreaterEqual(estimate, weight)
+            if estimate - weight > sketch.epsilon * self.total:
+                misses += 1
+        self.assertLessEqual(misses, sketch.delta * len(self.truth))
+
+    def test_hyperloglog_error_is_within_three_standard_errors(self):
+        for count in (100, 5000, 60000):
+            sketch = HyperLogLog(precision=12)
+            for value in range(count):
+                sketch.add(value)
+                sketch.add(value)
+            self.assertLessEqual(abs(sketch.count() - count), 3 * sketch.relative_error * count + 1)
+
+
+class TestSalesSketch(unittest.TestCase):
+    def test_only_catalogue_products_with_numeric_quantities_are_counted(self):
+        sketch = SalesSketch({'Honey': 2.0, 'Brown eggs': 3.0}, top_k=2)
+        for sale in ({'SALE_ID': 1, 'Product': 'Honey', 'Quantity': 4},
+                     {'SALE_ID': 1, 'Product': 'Brown eggs', 'Quantity': 1},
+                     {'SALE_ID': 2, 'Product': 'Nope', 'Quantity': 9},
+                     {'SALE_ID': 3, 'Product': 'Honey', 'Quantity': '2'},
+                     {'SALE_ID': 3, 'Product': 'Honey', 'Quantity': True},
+                     'not a sale'):
+            sketch.add(sale)
+        self.assertEqual(sketch.records, 6)
+        self.assertEqual(sketch.revenue.top(2), [('Honey', 8.0, 0), ('Brown eggs', 3.0, 0)])
+        self.assertEqual(sketch.distinct_sales.count(), 3)
+        self.assertIn('Records read', sketch.format_results())
+
+    def test_returns_never_evict_a_product(self):
+        sketch = SpaceSaving(1)
+        sketch.update('Honey', 3)
+        sketch.update('Brown eggs', -2)
+        sketch.update('Honey', -1)
+        self.assertEqual(sketch.top(1), [('Honey', 2, 0)])
+        self.assertEqual(sketch.total, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
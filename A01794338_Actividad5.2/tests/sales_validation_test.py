@@ -0,0 +1,84 @@
+import json
+import math
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRECTORY)
+
+from computeSales import compute_results
+from price_index import PriceIndex
+from product_index import ProductIndex
+from sales_validation import FAIL_FAST, SalesValidationError, SalesValidator
+
+PRICES = {'Honey': 17.0, 'Brown eggs': 28.0}
+SALES = [{'Product': 'Honey', 'Quantity': 2},
+         'not a sale',
+         {'Quantity': 1},
+         {'Product': 'Honey'},
+         {'Product': 'Honey', 'Quantity': '2'},
+         {'Product': 'Honey', 'Quantity': math.nan},
+         {'Product': 7, 'Quantity': 1},
+         {'Product': 'Nope', 'Quantity': 3},
+         {'Product': 'brown  EGGS', 'Quantity': 1}]
+
+
+class TestSalesValidator(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.quarantine_file = os.path.join(self.directory, 'quarantine.jsonl')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_every_bad_row_is_rejected_with_its_reason(self):
+        validator = SalesValidator(quarantine_file=self.quarantine_file)
+        total_sales_dict, total_sales = compute_results(PRICES, SALES, validator)
+        validator.close()
+        self.assertEqual(total_sales, 34.0)
+        self.assertEqual(validator.accepted, 1)
+        self.assertEqual(dict(validator.counters), {
+            'not_an_object': 1, 'missing_product': 1, 'missing_quantity': 1,
+            'invalid_quantity': 2, 'invalid_product': 1, 'unknown_product': 2})
+        with open(self.quarantine_file, encoding='utf-8') as file:
+            rows = [json.loads(line)['row'] for line in file]
+        self.assertEqual(rows, [1, 2, 3, 4, 5, 6, 7, 8])
+
+    def test_fail_fast_policy_raises_on_the_first_bad_row(self):
+        validator = SalesValidator(FAIL_FAST)
+        with self.assertRaisesRegex(SalesValidationError, 'Row 1 rejected: not_an_object'):
+            compute_results(PRICES, SALES, validator)
+
+    def test_unknown_product_is_reported_once_with_a_product_index(self):
+        validator = SalesValidator()
+        product_index = ProductIndex(PRICES)
+        _, total_sales = compute_results(PRICES, SALES, validator, product_index=product_index)
+        self.assertEqual(total_sales, 62.0)
+        self.assertEqual(validator.counters['unknown_product'], 1)
+        self.assertEqual(product_index.unmatched, {})
+        self.assertNotIn('Unmatched', product_index.summary())
+
+    def test_invalid_dates_are_rejected_for_a_dated_catalogue(self):
+        price_index = PriceIndex([{'title': 'Honey', 'price': 17.0},
+                                  {'title': 'Honey', 'price': 20.0, 'effective_date': '2023-12-02'}])
+        validator = SalesValidator(price_index=price_index)
+        sales = [{'Product': 'Honey', 'Quantity': 1, 'SALE_Date': '01/12/23'},
+                 {'Product': 'Honey', 'Quantity': 1, 'SALE_Date': '31/02/23'},
+                 {'Product': 'Honey', 'Quantity': 1}]
+        _, total_sales = compute_results(price_index.current_prices(), sales, validator, price_index)
+        self.assertEqual(total_sales, 17.0)
+        self.assertEqual(validator.counters['invalid_date'], 2)
+
+    def test_summary_lists_accepted_and_rejected_rows(self):
+        validator = SalesValidator()
+        compute_results(PRICES, SALES[:2], validator)
+        summary = validator.summary()
+        self.assertIn('Accepted rows' + '-' * 37 + '1', summary)
+        self.assertIn('Rejected: not_an_object', summary)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,497 @@
+"""
+Module for sharing hotel room availability between processes.
+
+This module provides a table kept in shared memory that maps every
+(hotel_name, location) pair to its number of available rooms, so worker
+processes check and reserve rooms with a memory read instead of parsing
+the hotels JSON file. Reservations are an atomic check-and-decrement
+under a lock shared by all the processes, and the owner of the table
+persists the room counts back to the JSON file in the background.
+
+The segment holds a version counter, a keys version counter, the hotel
+keys encoded as JSON and one signed 64-bit room count per hotel, the
+keys and the room counts having spare capacity so hotels can be added:
+
+    | version | keys version | keys length | keys capacity | slots |
+    | keys JSON (keys capacity, padded to 8) | rooms (slots) ... |
+
+Hotels are added, renamed and removed under the lock and every process
+reloads the keys when the keys version changes. Any change to the JSON
+file while the table is in use goes through update_file, which reads,
+changes and writes the file under the same file lock as the persister
+and always writes the current room counts, so neither overwrites the
+changes of the other.
+
+The lock is a multiprocessing.Lock created by the owner and handed to
+the workers, either inherited or passed as a Process argument.
+
+Classes:
+    - NoRoomsError: Raised when a hotel has no room left.
+    - AvailabilityTable: Room counts of every hotel in shared memory.
+
+Functions:
+    - hotel_position(data, hotel): Find a hotel in the hotels list.
+"""
+import json
+import struct
+import threading
+from multiprocessing import shared_memory
+
+from json_stream import load_json, open_text
+from storage import file_lock, write_json_atomic
+
+HEADER = struct.Struct('qqqqq')
+KEY_BYTES = 128
+
+
+class NoRoomsError(AssertionError):
+    """
+    Error raised when a room is reserved at a hotel that has none left.
+    """
+
+
+def hotel_position(data, hotel):
+    """
+    Return the position of the first entry of a hotel in a hotels list.
+
+    Parameters:
+        - data (list): The hotels read from the JSON file.
+        - hotel (dict): A dictionary with hotel data.
+
+    Returns:
+        int: The position of the hotel, -1 when it is not in the list.
+    """
+    for position, element in enumerate(data):
+        if (element['hotel_name'] == hotel['hotel_name'] and
+                element['location'] == hotel['location']):
+            return position
+    return -1
+
+
+class AvailabilityTable:
+    """
+    Class that keeps the room counts of every hotel in shared memory.
+
+    Methods:
+        - create(path, lock, capacity): Build a table from a hotels
+          JSON file.
+        - attach(name, lock): Open a table created by another process.
+        - hotel_is_registered(hotel): Check if a hotel is in the table.
+        - rooms(hotel): Return the available rooms of a hotel.
+        - reserve(hotel): Atomically check and take a room.
+        - release(hotel): Give a room back.
+        - set_rooms(hotel, rooms): Overwrite the rooms of a hotel.
+        - add(hotel, position): Add a hotel to the table.
+        - rename(hotel, new_hotel): Change the key of a hotel.
+        - remove(hotel): Take a hotel out of the table.
+        - sync_positions(positions): Record the positions of the hotels.
+        - update_file(path, change): Change the JSON file and write the
+          room counts to it.
+        - persist(path): Write the room counts to the JSON file.
+        - start_persisting(path, interval): Persist in the background.
+        - close(): Detach from the shared memory.
+    """
+    def __init__(self, memory, lock, owner=False):
+        self.memory = memory
+        self.lock = lock
+        self.owner = owner
+        _, _, _, keys_capacity, slots = HEADER.unpack_from(memory.buf, 0)
+        self.keys_offset = HEADER.size
+        keys_end = HEADER.size + keys_capacity
+        offset = keys_end + (-keys_end % 8)
+        self.counts = memory.buf[offset:offset + 8 * slots].cast('q')
+        self.entries = []
+        self.keys = {}
+        self.keys_version = None
+        with lock:
+            self.load_keys()
+        self.persisted_version = None
+        self.stop_event = None
+        self.persister = None
+
+    @classmethod
+    def create(cls, path, lock, capacity=None):
+        """
+        Build a table in a new shared memory segment from a JSON file.
+
+        When a hotel appears more than once, the first entry is used, as
+        Hotel.hotel_is_registered would find it first.
+
+        Parameters:
+            - path (str): The path to the hotels JSON file.
+            - lock (multiprocessing.Lock): The lock shared by the workers.
+            - capacity (int): The number of hotels the table can hold,
+              twice the hotels of the file plus 64 when None.
+
+        Returns:
+            AvailabilityTable: The table, owned by the calling process.
+        """
+        with open_text(path) as file:
+            data = load_json(file)
+        assert isinstance(data, list), 'Data does not have correct format'
+        keys = []
+        rooms = []
+        seen = set()
+        for position, element in enumerate(data):
+            key = (element['hotel_name'], element['location'])
+            if key not in seen:
+                seen.add(key)
+                keys.append([key[0], key[1], position])
+                rooms.append(element['rooms'])
+        if capacity is None:
+            capacity = 2 * len(keys) + 64
+        assert capacity >= len(keys), 'Capacity is below the hotels count'
+        encoded = json.dumps(keys).encode('utf-8')
+        keys_capacity = max(2 * len(encoded), KEY_BYTES * capacity)
+        keys_end = HEADER.size + keys_capacity
+        offset = keys_end + (-keys_end % 8)
+        memory = shared_memory.SharedMemory(
+            create=True, size=offset + 8 * capacity)
+        HEADER.pack_into(memory.buf, 0, 0, 0, len(encoded), keys_capacity,
+                         capacity)
+        memory.buf[HEADER.size:HEADER.size + len(encoded)] = encoded
+        struct.pack_into(f'{len(rooms)}q', memory.buf, offset, *rooms)
+        return cls(memory, lock, owner=True)
+
+    @classmethod
+    def attach(cls, name, lock):
+        """
+        Open a table created by another process.
+
+        Parameters:
+            - name (str): The name of the shared memory segment.
+            - lock (multiprocessing.Lock): The lock of the table.
+
+        Returns:
+            AvailabilityTable: The attached table.
+        """
+        return cls(shared_memory.SharedMemory(name=name), lock)
+
+    @property
+    def name(self):
+        """
+        str: The name of the shared memory segment.
+        """
+        return self.memory.name
+
+    @property
+    def version(self):
+        """
+        int: The number of changes made to the table.
+        """
+        return HEADER.unpack_from(self.memory.buf, 0)[0]
+
+    def load_keys(self):
+        """
+        Read the hotel keys from the shared memory.
+
+        Must be called holding the lock.
+        """
+        header = HEADER.unpack_from(self.memory.buf, 0)
+        keys_end = self.keys_offset + header[2]
+        self.entries = json.loads(
+            bytes(self.memory.buf[self.keys_offset:keys_end]))
+        self.keys = {(entry[0], entry[1]): (slot, entry[2])
+                     for slot, entry in enumerate(self.entries)
+                     if entry is not None}
+        self.keys_version = header[1]
+
+    def refresh_keys(self):
+        """
+        Reload the hotel keys if another process changed them.
+        """
+        if HEADER.unpack_from(self.memory.buf, 0)[1] != self.keys_version:
+            with self.lock:
+                self.load_keys()
+
+    def write_keys(self):
+        """
+        Write the hotel keys to the shared memory.
+
+        Must be called holding the lock.
+        """
+        encoded = json.dumps(self.entries).encode('utf-8')
+        header = list(HEADER.unpack_from(self.memory.buf, 0))
+        assert len(encoded) <= header[3], 'Availability table is full'
+        self.memory.buf[self.keys_offset:
+                        self.keys_offset + len(encoded)] = encoded
+        header[0] += 1
+        header[1] += 1
+        header[2] = len(encoded)
+        HEADER.pack_into(self.memory.buf, 0, *header)
+        self.load_keys()
+
+    def slot(self, hotel):
+        """
+        Return the slot of a hotel, failing if it is not registered.
+
+        Must be called holding the lock, so that a hotel removed by
+        another process cannot leave a stale slot behind.
+
+        Parameters:
+            - hotel (dict): A dictionary with hotel data.
+
+        Returns:
+            int: The position of the hotel in the room counts.
+        """
+        if HEADER.unpack_from(self.memory.buf, 0)[1] != self.keys_version:
+            self.load_keys()
+        key = (hotel['hotel_name'], hotel['location'])
+        assert key in self.keys, 'Hotel is not registered'
+        return self.keys[key][0]
+
+    def bump_version(self):
+        """
+        Record a change so the persister knows the table is dirty.
+        """
+        struct.pack_into('q', self.memory.buf, 0, self.version + 1)
+
+    def hotel_is_registered(self, hotel):
+        """
+        Check if a hotel is registered.
+
+        Parameters:
+            - hotel (dict): A dictionary with hotel data.
+
+        Returns:
+            tuple: A tuple containing a boolean indicating whether the
+            hotel is registered and the index of the hotel in the hotels
+            JSON file.
+        """
+        self.refresh_keys()
+        key = (hotel['hotel_name'], hotel['location'])
+        if key in self.keys:
+            return (True, self.keys[key][1])
+        return (False, -1)
+
+    def rooms(self, hotel):
+        """
+        Return the available rooms of a hotel.
+
+        Parameters:
+            - hotel (dict): A dictionary with hotel data.
+
+        Returns:
+            int: The number of available rooms.
+        """
+        with self.lock:
+            return self.counts[self.slot(hotel)]
+
+    def reserve(self, hotel):
+        """
+        Atomically check that a room is available and take it.
+
+        Parameters:
+            - hotel (dict): A dictionary with hotel data.
+
+        Raises:
+            NoRoomsError: When the hotel has no room left.
+        """
+        with self.lock:
+            slot = self.slot(hotel)
+            if self.counts[slot] < 1:
+                raise NoRoomsError('No rooms available')
+            self.counts[slot] -= 1
+            self.bump_version()
+
+    def release(self, hotel):
+        """
+        Give a room back to a hotel.
+
+        Parameters:
+            - hotel (dict): A dictionary with hotel data.
+        """
+        with self.lock:
+            slot = self.slot(hotel)
+            self.counts[slot] += 1
+            self.bump_version()
+
+    def set_rooms(self, hotel, rooms):
+        """
+        Overwrite the available rooms of a hotel.
+
+        Parameters:
+            - hotel (dict): A dictionary with hotel data.
+            - rooms (int): The new number of available rooms.
+        """
+        with self.lock:
+            slot = self.slot(hotel)
+            self.counts[slot] = rooms
+            self.bump_version()
+
+    def add(self, hotel, position):
+        """
+        Add a hotel to the table, unless it is already registered.
+
+        The hotel takes the first slot freed by remove, or a new one.
+
+        Parameters:
+            - hotel (dict): A dictionary with hotel data and its rooms.
+            - position (int): The index of the hotel in the JSON file.
+        """
+        with self.lock:
+            self.load_keys()
+            if (hotel['hotel_name'], hotel['location']) in self.keys:
+                return
+            entry = [hotel['hotel_name'], hotel['location'], position]
+            if None in self.entries:
+                slot = self.entries.index(None)
+                self.entries[slot] = entry
+            else:
+                slot = len(self.entries)
+                assert slot < len(self.counts), 'Availability table is full'
+                self.entries.append(entry)
+            self.counts[slot] = hotel['rooms']
+            self.write_keys()
+
+    def rename(self, hotel, new_hotel):
+        """
+        Change the name or location of a hotel, keeping its rooms.
+
+        Parameters:
+            - hotel (dict): The hotel data before the change.
+            - new_hotel (dict): The hotel data after the change.
+        """
+        new_key = (new_hotel['hotel_name'], new_hotel['location'])
+        with self.lock:
+            self.load_keys()
+            key = (hotel['hotel_name'], hotel['location'])
+            assert key in self.keys, 'Hotel is not registered'
+            if new_key == key:
+                return
+            assert new_key not in self.keys, 'Hotel is already registered'
+            slot, position = self.keys[key]
+            self.entries[slot] = [new_key[0], new_key[1], position]
+            self.write_keys()
+
+    def remove(self, hotel):
+        """
+        Take a hotel out of the table, freeing its slot for the next
+        hotel added.
+
+        Parameters:
+            - hotel (dict): A dictionary with hotel data.
+        """
+        with self.lock:
+            self.load_keys()
+            key = (hotel['hotel_name'], hotel['location'])
+            assert key in self.keys, 'Hotel is not registered'
+            self.entries[self.keys[key][0]] = None
+            self.write_keys()
+
+    def sync_positions(self, positions):
+        """
+        Record the positions of the hotels in the JSON file.
+
+        Parameters:
+            - positions (dict): The hotel keys mapped to the index of
+              their first entry in the JSON file.
+        """
+        with self.lock:
+            self.load_keys()
+            changed = False
+            for entry in self.entries:
+                if entry is None:
+                    continue
+                position = positions.get((entry[0], entry[1]))
+                if position is not None and position != entry[2]:
+                    entry[2] = position
+                    changed = True
+            if changed:
+                self.write_keys()
+
+    def update_file(self, path, change=None):
+        """
+        Change the hotels JSON file and write the room counts to it.
+
+        The file is read, changed and written under the file lock, so
+        the writes of every process using the table and of the persister
+        are applied one after the other. The positions of the hotels are
+        updated when the change moved them.
+
+        Parameters:
+            - path (str): The path to the hotels JSON file.
+            - change (function): Called with the list of hotels, which
+              it changes in place, before the room counts are written.
+
+        Returns:
+            The value returned by change.
+        """
+        with file_lock(path):
+            with open_text(path) as file:
+                data = load_json(file)
+            assert isinstance(data, list), 'Data does not have correct format'
+            result = None
+            positions = {}
+            if change is not None:
+                result = change(data)
+            for position, element in enumerate(data):
+                positions.setdefault(
+                    (element['hotel_name'], element['location']), position)
+            if change is not None:
+                self.sync_positions(positions)
+            with self.lock:
+                self.load_keys()
+                version = self.version
+                counts = list(self.counts)
+                keys = dict(self.keys)
+            for key, (slot, _) in keys.items():
+                if key in positions:
+                    data[positions[key]]['rooms'] = counts[slot]
+            write_json_atomic(path, data)
+            self.persisted_version = version
+        return result
+
+    def persist(self, path):
+        """
+        Write the room counts to the hotels JSON file atomically.
+
+        Parameters:
+            - path (str): The path to the hotels JSON file.
+
+        Returns:
+            bool: True when the file was written, False when nothing
+            changed since the last time.
+        """
+        if self.version == self.persisted_version:
+            return False
+        self.update_file(path)
+        return True
+
+    def start_persisting(self, path, interval=1.0):
+        """
+        Persist the room counts in a background thread.
+
+        Parameters:
+            - path (str): The path to the hotels JSON file.
+            - interval (float): Seconds between two writes.
+        """
+        self.stop_event = threading.Event()
+
+        def run():
+            while not self.stop_event.wait(interval):
+                self.persist(path)
+            self.persist(path)
+
+        self.persister = threading.Thread(target=run, daemon=True)
+        self.persister.start()
+
+    def stop_persisting(self):
+        """
+        Stop the background persister after a last write.
+        """
+        if self.persister is not None:
+            self.stop_event.set()
+            self.persister.join()
+            self.persister = None
+
+    def close(self):
+        """
+        Detach from the shared memory, removing it if this process
+        created it.
+        """
+        self.stop_persisting()
+        self.counts.release()
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
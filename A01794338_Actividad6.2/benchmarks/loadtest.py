@@ -0,0 +1,329 @@
+"""
+Closed-loop load generator for the hotel reservation classes.
+
+This program generates customers, hotels and reservations files in a
+temporary directory and drives a configurable mix of operations against
+them from several concurrent threads or processes. Every worker sends
+its next operation as soon as the previous one finished. At the end it
+prints, as JSON, the throughput and the p50/p95/p99/max latency of each
+operation, the errors, the bookings rejected for lack of rooms, the
+operations skipped because the worker had nothing to cancel or modify,
+the workers that failed and the rooms oversold or lost by concurrent
+updates.
+
+Operations:
+    - create_customer: Customer.create with a new customer.
+    - reserve: Hotel.reserve_room followed by Reservation.create.
+    - cancel: Reservation.cancel of a booking made by the same worker,
+      then Hotel.cancel_reservation unless the room went to a waiter.
+    - modify: Customer.modify_info of a customer created by the worker.
+    - lookup: Hotel.hotel_is_registered of a random hotel.
+
+Usage (from the A01794338_Actividad6.2 directory):
+    python benchmarks/loadtest.py --workers 8 --operations 200
+    python benchmarks/loadtest.py --mode process \\
+        --mix reserve=6,cancel=2,lookup=2
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from availability import NoRoomsError
+from customer import Customer
+from hotel import Hotel
+from reservation import Reservation
+
+DEFAULT_MIX = 'create_customer=2,reserve=4,cancel=2,modify=1,lookup=4'
+OPERATIONS = ('create_customer', 'reserve', 'cancel', 'modify', 'lookup')
+
+
+def parse_mix(mix):
+    """
+    Parse an operation mix such as 'reserve=3,lookup=1'.
+
+    Parameters:
+        - mix (str): The operations with their relative weights.
+
+    Returns:
+        dict: The operations mapped to their weights.
+    """
+    weights = {}
+    for item in mix.split(','):
+        operation, weight = item.split('=')
+        assert operation in OPERATIONS, f'Unknown operation {operation}'
+        weights[operation] = float(weight)
+    return weights
+
+
+def generate_dataset(directory, customers, hotels, rooms):
+    """
+    Write the customers, hotels and reservations files.
+
+    Parameters:
+        - directory (str): The directory receiving the files.
+        - customers (int): The number of customers.
+        - hotels (int): The number of hotels.
+        - rooms (int): The rooms of every hotel.
+
+    Returns:
+        dict: The paths of the files and the generated hotels.
+    """
+    customer_list = [{'first_name': f'Customer{i}',
+                      'last_name': f'Last{i % 500}',
+                      'phone_number': f'55-{i:08d}'}
+                     for i in range(customers)]
+    hotel_list = [{'hotel_name': f'Hotel {i}', 'location': f'City {i}',
+                   'rooms': rooms} for i in range(hotels)]
+    reservation_list = [dict(hotel, reservations=[]) for hotel in hotel_list]
+    paths = {}
+    for name, data in (('customers', customer_list), ('hotels', hotel_list),
+                       ('reservations', reservation_list)):
+        paths[name] = os.path.join(directory, f'{name}.json')
+        with open(paths[name], 'w', encoding='utf-8') as file:
+            json.dump(data, file, indent=4)
+    paths['hotel_list'] = hotel_list
+    return paths
+
+
+def run_worker(worker_id, paths, weights, operations, seed):
+    """
+    Run a closed loop of operations and collect their latencies.
+
+    Parameters:
+        - worker_id (int): The number of the worker.
+        - paths (dict): The paths of the data files and the hotels.
+        - weights (dict): The operations mapped to their weights.
+        - operations (int): The number of operations to run.
+        - seed (int): The seed of the random generator.
+
+    Returns:
+        dict: The latencies, errors and bookings of the worker.
+    """
+    rng = random.Random(seed + worker_id)
+    customer = Customer()
+    customer.path = paths['customers']
+    hotel = Hotel()
+    hotel.path = paths['hotels']
+    reservation = Reservation(paths['reservations'])
+    names = list(weights)
+    relative_weights = list(weights.values())
+    own_customers = []
+    bookings = []
+    latencies = defaultdict(list)
+    errors = defaultdict(Counter)
+    rejected = Counter()
+    skipped = Counter()
+    booked = Counter()
+    for number in range(operations):
+        operation = rng.choices(names, relative_weights)[0]
+        if ((operation == 'cancel' and not bookings) or
+                (operation == 'modify' and not own_customers)):
+            skipped[operation] += 1
+            continue
+        chosen = rng.choice(paths['hotel_list'])
+        key = {'hotel_name': chosen['hotel_name'],
+               'location': chosen['location']}
+        start_time = time.perf_counter()
+        try:
+            if operation == 'create_customer':
+                new_customer = {
+                    'first_name': f'Load{worker_id}-{number}',
+                    'last_name': f'Worker{worker_id}',
+                    'phone_number': f'99-{worker_id:03d}{number:06d}'}
+                customer.create(new_customer, paths['customers'])
+                own_customers.append(new_customer)
+            elif operation == 'reserve':
+                guest = {'first_name': f'Guest{worker_id}-{number}'}
+                hotel.reserve_room(key)
+                booked[chosen['hotel_name']] += 1
+                reservation.create(key, guest)
+                bookings.append((key, guest))
+            elif operation == 'cancel':
+                booked_key, guest = bookings.pop(rng.randrange(len(bookings)))
+                if reservation.cancel(booked_key, guest) is None:
+                    hotel.cancel_reservation(booked_key)
+                    booked[booked_key['hotel_name']] -= 1
+            elif operation == 'modify':
+                index = rng.randrange(len(own_customers))
+                element = own_customers[index]
+                new_value = f'98-{worker_id:03d}{number:06d}'
+                customer.modify_info(element, 'phone_number', new_value)
+                own_customers[index] = dict(element, phone_number=new_value)
+            else:
+                hotel.hotel_is_registered(key)
+        except NoRoomsError:
+            rejected[operation] += 1
+        except AssertionError as error:
+            errors[operation][f'AssertionError: {error}'] += 1
+        except (OSError, ValueError, KeyError, TypeError) as error:
+            errors[operation][type(error).__name__] += 1
+        latencies[operation].append(time.perf_counter() - start_time)
+    return {'latencies': dict(latencies),
+            'errors': {key: dict(value) for key, value in errors.items()},
+            'rejected': dict(rejected), 'skipped': dict(skipped),
+            'booked': dict(booked)}
+
+
+def run_worker_safely(worker_id, *arguments):
+    """
+    Run a worker, turning an unexpected error into a failed result.
+
+    Parameters:
+        - worker_id (int): The number of the worker.
+        - arguments: The other arguments of run_worker.
+
+    Returns:
+        dict: The result of run_worker, or an empty result naming the
+        error that stopped the worker.
+    """
+    try:
+        return run_worker(worker_id, *arguments)
+    except Exception as error:
+        return {'latencies': {}, 'errors': {}, 'rejected': {},
+                'skipped': {}, 'booked': {},
+                'failed': f'{type(error).__name__}: {error}'}
+
+
+def percentile(values, fraction):
+    """
+    Return the nearest-rank percentile of sorted values.
+
+    Parameters:
+        - values (list): The sorted values.
+        - fraction (float): The percentile between 0 and 1.
+
+    Returns:
+        float: The value at that percentile.
+    """
+    rank = max(math.ceil(fraction * len(values)) - 1, 0)
+    return values[rank]
+
+
+def summarize(results, elapsed_time, paths, rooms):
+    """
+    Merge the results of the workers into the final report.
+
+    Parameters:
+        - results (list): The results returned by every worker, see
+          run_worker_safely.
+        - elapsed_time (float): The wall-clock duration of the run.
+        - paths (dict): The paths of the data files and the hotels.
+        - rooms (int): The initial rooms of every hotel.
+
+    Returns:
+        dict: The throughput, latencies, errors and oversell counts.
+    """
+    latencies = defaultdict(list)
+    errors = defaultdict(Counter)
+    rejected = Counter()
+    skipped = Counter()
+    booked = Counter()
+    failed = {}
+    for worker_id, result in enumerate(results):
+        if 'failed' in result:
+            failed[worker_id] = result['failed']
+        for operation, values in result['latencies'].items():
+            latencies[operation].extend(values)
+        for operation, counts in result['errors'].items():
+            errors[operation].update(counts)
+        rejected.update(result['rejected'])
+        skipped.update(result['skipped'])
+        booked.update(result['booked'])
+    total = sum(len(values) for values in latencies.values())
+    report = {'elapsed_seconds': round(elapsed_time, 3),
+              'operations': total,
+              'throughput_ops_per_second': round(total / elapsed_time, 1),
+              'latency_ms': {}, 'errors': {key: dict(value)
+                                           for key, value in errors.items()},
+              'rejected_no_rooms': dict(rejected),
+              'skipped_nothing_to_do': dict(skipped),
+              'failed_workers': failed}
+    for operation, values in sorted(latencies.items()):
+        values.sort()
+        report['latency_ms'][operation] = {
+            'count': len(values),
+            'p50': round(percentile(values, 0.50) * 1000, 3),
+            'p95': round(percentile(values, 0.95) * 1000, 3),
+            'p99': round(percentile(values, 0.99) * 1000, 3),
+            'max': round(values[-1] * 1000, 3)}
+    oversold = sum(max(count - rooms, 0) for count in booked.values())
+    hotel = Hotel()
+    try:
+        final_rooms = {element['hotel_name']: element['rooms']
+                       for element in hotel.read_file(paths['hotels'])}
+        lost_updates = sum(
+            abs(final_rooms.get(element['hotel_name'], rooms) -
+                (rooms - booked[element['hotel_name']]))
+            for element in paths['hotel_list'])
+    except (OSError, ValueError, AssertionError):
+        lost_updates = None
+    report['oversold_rooms'] = oversold
+    report['lost_room_updates'] = lost_updates
+    return report
+
+
+def main():
+    """
+    Generate the dataset, run the workers and print the report.
+    """
+    parser = argparse.ArgumentParser(
+        description='Closed-loop load test of the hotel reservation classes.')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--mode', choices=('thread', 'process'),
+                        default='thread')
+    parser.add_argument('--operations', type=int, default=200,
+                        help='Operations run by every worker')
+    parser.add_argument('--mix', default=DEFAULT_MIX,
+                        help='Operations with their relative weights')
+    parser.add_argument('--customers', type=int, default=1000)
+    parser.add_argument('--hotels', type=int, default=20)
+    parser.add_argument('--rooms', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='File the JSON report is written to')
+    args = parser.parse_args()
+
+    weights = parse_mix(args.mix)
+    with tempfile.TemporaryDirectory() as directory:
+        paths = generate_dataset(directory, args.customers, args.hotels,
+                                 args.rooms)
+        arguments = [(worker_id, paths, weights, args.operations, args.seed)
+                     for worker_id in range(args.workers)]
+        start_time = time.perf_counter()
+        if args.mode == 'process':
+            with multiprocessing.Pool(args.workers) as pool:
+                results = pool.starmap(run_worker_safely, arguments)
+        else:
+            results = [None] * args.workers
+
+            def target(worker_id, *rest):
+                results[worker_id] = run_worker_safely(worker_id, *rest)
+
+            threads = [threading.Thread(target=target, args=argument)
+                       for argument in arguments]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        elapsed_time = time.perf_counter() - start_time
+        report = summarize(results, elapsed_time, paths, args.rooms)
+    report['config'] = vars(args)
+    output = json.dumps(report, indent=4)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
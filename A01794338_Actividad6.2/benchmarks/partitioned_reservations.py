@@ -0,0 +1,100 @@
+"""
+Benchmark of the cost of a booking as the number of hotels grows.
+
+For every hotel count, this program builds the same data in the single
+reservations file layout and in the partitioned layout, then times a
+series of create/cancel pairs on random hotels with both. The single
+file cost grows with the number of hotels while the partitioned cost
+stays flat.
+
+Usage (from the A01794338_Actividad6.2 directory):
+    python benchmarks/partitioned_reservations.py
+    python benchmarks/partitioned_reservations.py --hotels 10 100 1000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from reservation import Reservation
+from reservation_store import migrate
+
+CUSTOMER = {'first_name': 'Isabella', 'last_name': 'Gomez',
+            'phone_number': '234-567-8901'}
+
+
+def build_hotels(count):
+    """
+    Generate a reservations list with a given number of hotels.
+
+    Parameters:
+        - count (int): The number of hotels.
+
+    Returns:
+        list: The hotels with a few reservations each.
+    """
+    return [{'hotel_name': f'Hotel {i}', 'location': f'City {i % 97}',
+             'rooms': 100, 'reservations': [CUSTOMER] * 5}
+            for i in range(count)]
+
+
+def time_bookings(reservation, hotels, bookings):
+    """
+    Time create/cancel pairs on random hotels.
+
+    Parameters:
+        - reservation (Reservation): The storage to benchmark.
+        - hotels (list): The hotels to book.
+        - bookings (int): The number of create/cancel pairs.
+
+    Returns:
+        float: The mean milliseconds per booking.
+    """
+    rng = random.Random(7)
+    start_time = time.perf_counter()
+    for _ in range(bookings):
+        hotel = rng.choice(hotels)
+        reservation.create(hotel, CUSTOMER)
+        reservation.cancel(hotel, CUSTOMER)
+    return (time.perf_counter() - start_time) * 1000 / (2 * bookings)
+
+
+def main():
+    """
+    Run the benchmark and print one row per hotel count.
+    """
+    parser = argparse.ArgumentParser(
+        description='Compare the booking cost of both storage layouts.')
+    parser.add_argument('--hotels', type=int, nargs='+',
+                        default=[10, 100, 1000, 5000])
+    parser.add_argument('--bookings', type=int, default=50)
+    args = parser.parse_args()
+
+    results = []
+    for count in args.hotels:
+        hotels = build_hotels(count)
+        keys = [{'hotel_name': hotel['hotel_name'],
+                 'location': hotel['location']} for hotel in hotels]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'reservations.json')
+            with open(path, 'w', encoding='utf-8') as file:
+                json.dump(hotels, file, indent=4)
+            single = Reservation(path)
+            partitioned = migrate(path, os.path.join(directory, 'shards'))
+            results.append({
+                'hotels': count,
+                'single_file_ms': round(
+                    time_bookings(single, keys, args.bookings), 3),
+                'partitioned_ms': round(
+                    time_bookings(partitioned, keys, args.bookings), 3)})
+        print(json.dumps(results[-1]))
+
+
+if __name__ == '__main__':
+    main()
@@ -6,12 +6,15 @@ from Customer, which includes methods for
 managing hotel-specific operations such as
 checking if a hotel is registered, modifying
 stored information, making room reservations,
-and canceling reservations.
+and canceling reservations. Its methods are measured by the metrics
+module like those it inherits from Customer.
 
 Classes:
     - Hotel: A class for managing hotel information, inheriting from Customer.
 """
+from availability import NoRoomsError, hotel_position
 from customer import Customer
+from metrics import instrumented
 
 
 class Hotel(Customer):
@@ -22,17 +25,85 @@ class Hotel(Customer):
         Customer: A class for managing customer information.
 
     Methods:
+        - create(new_element, path): Register a new hotel.
+        - delete(element): Delete a hotel.
         - hotel_is_registered(hotel_name): Check if a hotel is registered.
         - modify_info(hotel, feature, new_value): Modify stored information
           in a JSON file.
         - reserve_room(hotel): Reserve a room in a hotel.
         - cancel_reservation(hotel): Cancel a reservation in a hotel.
+        - use_availability(table): Check and reserve rooms through a
+          shared-memory availability table.
     """
     def __init__(self):
         super(Customer, self).__init__()
         self.path = ''
         self.new_element = {}
+        self.index = None
+        self.index_signature = None
+        self.availability = None
 
+    def use_availability(self, table):
+        """
+        Check and reserve rooms through a shared-memory table.
+
+        Once a table is set, hotel_is_registered, reserve_room and
+        cancel_reservation no longer parse or rewrite the JSON file;
+        the owner of the table persists the room counts instead. create,
+        delete and modify_info change the JSON file through the table,
+        which keeps its hotels in step and serializes the writes with
+        the persister.
+
+        Parameters:
+            - table (AvailabilityTable): The availability table, None
+              to go back to the JSON file.
+        """
+        self.availability = table
+
+    @instrumented
+    def create(self, new_element, path):
+        """
+        Register a new hotel.
+
+        Parameters:
+            - new_element (dict): A dictionary with hotel data.
+            - path (str): The path to the JSON file containing the information.
+        """
+        if self.availability is None:
+            super().create(new_element, path)
+            return
+        assert isinstance(new_element, dict), 'New_element has to be dict'
+        self.path = path
+        self.new_element = new_element
+
+        def add(data):
+            if new_element not in data:
+                data.append(new_element)
+                self.availability.add(new_element, len(data) - 1)
+        self.availability.update_file(path, add)
+        self.index = None
+
+    @instrumented
+    def delete(self, element):
+        """
+        Delete a hotel and save changes to a JSON file.
+
+        Parameters:
+            - element (dict): Hotel data.
+        """
+        if self.availability is None:
+            super().delete(element)
+            return
+
+        def remove(data):
+            assert element in data, 'Element is not in the list'
+            data.remove(element)
+            if hotel_position(data, element) < 0:
+                self.availability.remove(element)
+        self.availability.update_file(self.path, remove)
+        self.index = None
+
+    @instrumented
     def hotel_is_registered(self, hotel):
         """
         Check if a hotel is registered.
@@ -45,13 +116,16 @@ class Hotel(Customer):
             hotel is registered and the index of the hotel in the list
             of registered hotels.
         """
-        data = self.read_file(self.path)
+        if self.availability is not None:
+            return self.availability.hotel_is_registered(hotel)
+        data = self.snapshot()
         for i, element in enumerate(data):
             if (element['hotel_name'] == hotel['hotel_name'] and
                     element['location'] == hotel['location']):
                 return (True, i)
         return (False, -1)
 
+    @instrumented
     def modify_info(self, element, feature, new_value):
         """
         Modify stored information for a customer in a JSON file.
@@ -61,6 +135,17 @@ class Hotel(Customer):
             - feature (str): The field of the customer's information to modify.
             - new_value (str,int): The new value for the specified field.
         """
+        if self.availability is not None:
+            def change(data):
+                idx = hotel_position(data, element)
+                assert idx >= 0, 'Hotel is not registered'
+                assert feature in data[idx].keys(), 'Feature not found'
+                if feature == 'rooms':
+                    self.availability.set_rooms(element, new_value)
+                data[idx][feature] = new_value
+                self.availability.rename(element, data[idx])
+            self.availability.update_file(self.path, change)
+            return
         data = self.read_file(self.path)
         hotel_in_list, idx = self.hotel_is_registered(element)
         assert hotel_in_list, 'Hotel is not registered'
@@ -68,6 +153,7 @@ class Hotel(Customer):
         data[idx][feature] = new_value
         self.write_file(data)
 
+    @instrumented
     def reserve_room(self, hotel):
         """
         Make a reservation at a hotel.
@@ -78,25 +164,41 @@ class Hotel(Customer):
         Parameters:
             - hotel (dict): A dictionary containing the information
              of the hotel.
+
+        Raises:
+            NoRoomsError: When the hotel has no room left.
         """
+        if self.availability is not None:
+            self.availability.reserve(hotel)
+            return
         data = self.read_file(self.path)
         hotel_in_list, idx = self.hotel_is_registered(hotel)
         assert hotel_in_list, 'Hotel is not registered'
-        assert data[idx]['rooms'] >= 1, 'No rooms available'
+        if data[idx]['rooms'] < 1:
+            raise NoRoomsError('No rooms available')
         data[idx]['rooms'] -= 1
         self.write_file(data)
 
+    @instrumented
     def cancel_reservation(self, hotel):
         """
         Cancel a reservation at a hotel.
 
         This method cancels a reservation at a hotel based on the provided
-        hotel information.
+        hotel information. Waiting customers are not handled here: the
+        waitlists are kept by Reservation, which books the freed room for
+        the next waiter on cancel, and the room is only given back with
+        this method when Reservation.cancel returns None.
 
         Parameters:
             - hotel (dict): A dictionary containing the information
             of the hotel.
         """
+        if self.availability is not None:
+            assert self.availability.hotel_is_registered(hotel)[0], \
+                'Hotel not registered'
+            self.availability.release(hotel)
+            return
         data = self.read_file(self.path)
         hotel_in_list, idx = self.hotel_is_registered(hotel)
         assert hotel_in_list, 'Hotel not registered'
@@ -0,0 +1,387 @@
+"""
+Module for measuring the operations of the hotel reservation classes.
+
+The methods of Customer, Hotel and Reservation are wrapped with the
+instrumented decorator. While no listener is registered the wrapper
+only checks that the listener list is empty and calls the method, so
+the instrumentation can stay in place under load. Once a listener is
+added, every call is timed and reported to it, as are the bytes the
+call read from or wrote to the data files:
+
+    registry = MetricsRegistry()
+    add_listener(registry)
+    ...
+    print(registry.format_text())
+
+A listener is any object with these two methods:
+
+    - on_call(operation, seconds, error): A call finished. The
+      operation is the class and method name, such as
+      'Hotel.reserve_room', and error is the exception raised or None.
+    - on_bytes(operation, direction, count): A call read ('read') or
+      wrote ('written') count bytes of a data file. The bytes are
+      reported to every instrumented call in progress in the thread,
+      so Hotel.reserve_room also counts the bytes of its read_file.
+
+Classes:
+    - Histogram: Latency counts in fixed buckets.
+    - MetricsRegistry: Listener keeping counters and histograms.
+    - TraceListener: Listener writing a line per call.
+
+Functions:
+    - add_listener(listener): Start reporting to a listener.
+    - remove_listener(listener): Stop reporting to a listener.
+    - instrumented(function): Measure the calls of a method.
+    - record_bytes(direction, count): Report bytes read or written.
+    - record_file(direction, path): Report the size of a file.
+"""
+import bisect
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+LISTENERS = []
+CONTEXT = threading.local()
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+           0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def add_listener(listener):
+    """
+    Start reporting the instrumented calls to a listener.
+
+    Parameters:
+        - listener: An object with on_call and on_bytes methods.
+    """
+    if listener not in LISTENERS:
+        LISTENERS.append(listener)
+
+
+def remove_listener(listener):
+    """
+    Stop reporting the instrumented calls to a listener.
+
+    Parameters:
+        - listener: A listener given to add_listener.
+    """
+    if listener in LISTENERS:
+        LISTENERS.remove(listener)
+
+
+def active_operations():
+    """
+    Return the instrumented calls in progress in the current thread.
+
+    Returns:
+        list: The operation names, the outermost call first.
+    """
+    operations = getattr(CONTEXT, 'operations', None)
+    if operations is None:
+        operations = CONTEXT.operations = []
+    return operations
+
+
+def measure(operation, function, args, kwargs):
+    """
+    Call a function, reporting its duration to the listeners.
+
+    Parameters:
+        - operation (str): The name reported for the call.
+        - function: The function to call.
+        - args (tuple): The positional arguments of the call.
+        - kwargs (dict): The keyword arguments of the call.
+
+    Returns:
+        The result of the function.
+    """
+    operations = active_operations()
+    operations.append(operation)
+    error = None
+    start_time = time.perf_counter()
+    try:
+        return function(*args, **kwargs)
+    except BaseException as exception:
+        error = exception
+        raise
+    finally:
+        seconds = time.perf_counter() - start_time
+        operations.pop()
+        for listener in list(LISTENERS):
+            listener.on_call(operation, seconds, error)
+
+
+def instrumented(function):
+    """
+    Measure the calls of a method while a listener is registered.
+
+    The operation is named after the class of the instance, so methods
+    inherited by Hotel are reported as Hotel methods, and a method
+    calling the method it overrides is measured once.
+
+    Parameters:
+        - function: The method to measure.
+
+    Returns:
+        function: The wrapped method.
+    """
+    name = function.__name__
+
+    @functools.wraps(function)
+    def wrapper(self, *args, **kwargs):
+        if not LISTENERS:
+            return function(self, *args, **kwargs)
+        operation = f'{type(self).__name__}.{name}'
+        operations = active_operations()
+        if operations and operations[-1] == operation:
+            return function(self, *args, **kwargs)
+        return measure(operation, function, (self,) + args, kwargs)
+    return wrapper
+
+
+def record_bytes(direction, count):
+    """
+    Report bytes read or written by the calls in progress.
+
+    Parameters:
+        - direction (str): 'read' or 'written'.
+        - count (int): The number of bytes.
+    """
+    if not LISTENERS:
+        return
+    for operation in active_operations():
+        for listener in list(LISTENERS):
+            listener.on_bytes(operation, direction, count)
+
+
+def record_file(direction, path):
+    """
+    Report the size of a file read or written by the calls in progress.
+
+    The size is only looked up while a listener is registered.
+
+    Parameters:
+        - direction (str): 'read' or 'written'.
+        - path (str): The path of the file.
+    """
+    if LISTENERS:
+        record_bytes(direction, os.path.getsize(path))
+
+
+class Histogram:
+    """
+    Class that counts latencies in fixed buckets.
+
+    Methods:
+        - add(seconds): Count a latency.
+        - percentile(fraction): Estimate a latency percentile.
+        - to_dict(): Return the counts and statistics.
+    """
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def add(self, seconds):
+        """
+        Count a latency.
+
+        Parameters:
+            - seconds (float): The latency.
+        """
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.maximum = max(self.maximum, seconds)
+
+    def percentile(self, fraction):
+        """
+        Estimate a latency percentile by the upper bound of its bucket.
+
+        Parameters:
+            - fraction (float): The percentile between 0 and 1.
+
+        Returns:
+            float: The upper bound of the bucket holding the percentile,
+            the maximum latency for the last bucket.
+        """
+        rank = fraction * self.count
+        seen = 0
+        for position, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                if position < len(self.buckets):
+                    return min(self.buckets[position], self.maximum)
+                return self.maximum
+        return 0.0
+
+    def to_dict(self):
+        """
+        Return the bucket counts and the latency statistics.
+
+        Returns:
+            dict: The counts per bucket upper bound and the statistics
+            in milliseconds.
+        """
+        bounds = [str(bound) for bound in self.buckets] + ['+Inf']
+        return {
+            'buckets': dict(zip(bounds, self.counts)),
+            'mean_ms': round(self.total / self.count * 1000, 3)
+            if self.count else 0.0,
+            'p50_ms': round(self.percentile(0.50) * 1000, 3),
+            'p95_ms': round(self.percentile(0.95) * 1000, 3),
+            'p99_ms': round(self.percentile(0.99) * 1000, 3),
+            'max_ms': round(self.maximum * 1000, 3)}
+
+
+class MetricsRegistry:
+    """
+    Class that keeps the counters and histograms of every operation.
+
+    Methods:
+        - on_call(operation, seconds, error): Count a finished call.
+        - on_bytes(operation, direction, count): Count bytes.
+        - to_dict(): Return the metrics of every operation.
+        - to_json(): Return the metrics as JSON.
+        - format_text(): Return the metrics as a text table.
+        - reset(): Forget every metric.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.operations = {}
+
+    def entry(self, operation):
+        """
+        Return the metrics of an operation, creating them if needed.
+
+        Parameters:
+            - operation (str): The name of the operation.
+
+        Returns:
+            dict: The counters and the histogram of the operation.
+        """
+        metrics = self.operations.get(operation)
+        if metrics is None:
+            metrics = self.operations[operation] = {
+                'calls': 0, 'errors': 0, 'bytes_read': 0,
+                'bytes_written': 0, 'latency': Histogram()}
+        return metrics
+
+    def on_call(self, operation, seconds, error):
+        """
+        Count a finished call.
+
+        Parameters:
+            - operation (str): The name of the operation.
+            - seconds (float): The duration of the call.
+            - error (BaseException): The exception raised, or None.
+        """
+        with self.lock:
+            metrics = self.entry(operation)
+            metrics['calls'] += 1
+            if error is not None:
+                metrics['errors'] += 1
+            metrics['latency'].add(seconds)
+
+    def on_bytes(self, operation, direction, count):
+        """
+        Count bytes read or written by an operation.
+
+        Parameters:
+            - operation (str): The name of the operation.
+            - direction (str): 'read' or 'written'.
+            - count (int): The number of bytes.
+        """
+        with self.lock:
+            self.entry(operation)['bytes_' + direction] += count
+
+    def to_dict(self):
+        """
+        Return the metrics of every operation.
+
+        Returns:
+            dict: The operations mapped to their counters and latency
+            histogram.
+        """
+        with self.lock:
+            return {operation: dict(metrics,
+                                    latency=metrics['latency'].to_dict())
+                    for operation, metrics in sorted(self.operations.items())}
+
+    def to_json(self):
+        """
+        Return the metrics of every operation as JSON.
+
+        Returns:
+            str: The metrics, see to_dict.
+        """
+        return json.dumps(self.to_dict(), indent=4)
+
+    def format_text(self):
+        """
+        Return the metrics of every operation as a text table.
+
+        Returns:
+            str: One line per operation.
+        """
+        lines = ['Operation'.ljust(32) + 'Calls'.rjust(8) +
+                 'Errors'.rjust(8) + 'p50 ms'.rjust(10) +
+                 'p99 ms'.rjust(10) + 'Max ms'.rjust(10) +
+                 'Read'.rjust(12) + 'Written'.rjust(12)]
+        for operation, metrics in self.to_dict().items():
+            latency = metrics['latency']
+            lines.append(
+                operation.ljust(32) + f"{metrics['calls']:8d}" +
+                f"{metrics['errors']:8d}" + f"{latency['p50_ms']:10.3f}" +
+                f"{latency['p99_ms']:10.3f}" + f"{latency['max_ms']:10.3f}" +
+                f"{metrics['bytes_read']:12d}" +
+                f"{metrics['bytes_written']:12d}")
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        """
+        Forget every metric.
+        """
+        with self.lock:
+            self.operations = {}
+
+
+class TraceListener:
+    """
+    Class that writes a line for every finished call.
+
+    Methods:
+        - on_call(operation, seconds, error): Write the call.
+        - on_bytes(operation, direction, count): Ignore the bytes.
+    """
+    def __init__(self, stream=None):
+        self.stream = stream
+        self.lock = threading.Lock()
+
+    def on_call(self, operation, seconds, error):
+        """
+        Write the operation, duration and error of a call.
+
+        Parameters:
+            - operation (str): The name of the operation.
+            - seconds (float): The duration of the call.
+            - error (BaseException): The exception raised, or None.
+        """
+        stream = self.stream if self.stream is not None else sys.stderr
+        status = 'ok' if error is None else f'{type(error).__name__}: {error}'
+        with self.lock:
+            stream.write(f'{operation} {seconds * 1000:.3f} ms {status}\n')
+
+    def on_bytes(self, operation, direction, count):
+        """
+        Ignore the bytes read or written.
+
+        Parameters:
+            - operation (str): The name of the operation.
+            - direction (str): 'read' or 'written'.
+            - count (int): The number of bytes.
+        """
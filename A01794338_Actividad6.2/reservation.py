@@ -3,12 +3,18 @@ Module for managing hotel reservations.
 
 This module provides a class and methods to read and write reservation data
 to JSON files, check if a hotel is registered, create reservations, and cancel
-existing reservations.
+existing reservations. Calls to these methods are timed and reported
+through the metrics module. Changes to the file are made under a lock
+file, so concurrent processes never lose each other's changes.
 
 Classes:
     - Reservation: A class for managing hotel reservations.
 """
-import json
+from contextlib import contextmanager
+
+from metrics import instrumented, record_file
+from json_stream import load_json, open_text
+from storage import file_lock, get_store
 
 
 class Reservation:
@@ -18,17 +24,24 @@ class Reservation:
     Methods:
         - read_file(path): Read data from a JSON file.
         - write_file(data, path): Write data to a JSON file.
+        - snapshot(): Return an immutable snapshot of the JSON file.
         - hotel_is_registered(hotel_name): Check if a hotel is registered.
         - create(hotel_name, customer): Create a new reservation for a hotel.
         - cancel(hotel_name, customer): Cancel an existing reservation for
           a hotel.
+        - use_waitlist(waitlist): Queue customers when a hotel is full.
+        - create_or_wait(hotel, customer, priority): Create a reservation
+          or join the waitlist of the hotel.
+        - transaction(): Hold the lock of the reservations file.
     """
     def __init__(self, path_reservation):
         self.path_reservation = path_reservation
+        self.waitlist = None
 
+    @instrumented
     def read_file(self, path):
         """
-        Read data from a JSON file.
+        Read data from a JSON file, compressed or not.
 
         Parameters:
             - path (str): The path to the JSON file.
@@ -36,23 +49,37 @@ class Reservation:
         Returns:
             dict: Data read from the JSON file.
         """
-        with open(path, 'r', encoding='utf-8') as file:
-            data = json.load(file)
+        with open_text(path) as file:
+            data = load_json(file)
         file.close()
+        record_file('read', path)
         assert isinstance(data, list), 'Data does not have correct format'
         return data
 
+    @instrumented
     def write_file(self, data):
         """
         Write data to a JSON file.
 
+        The file is replaced atomically and the new version becomes the
+        current snapshot, so readers never see a half-written file.
+
         Parameters:
             - data (dict): The data to write to the JSON file.
         """
-        with open(self.path_reservation, 'w', encoding='utf-8') as file:
-            json.dump(data, file, indent=4)
-        file.close()
+        get_store(self.path_reservation).publish(data)
 
+    @instrumented
+    def snapshot(self):
+        """
+        Return an immutable snapshot of the JSON file.
+
+        Returns:
+            tuple: The records of the file as read-only mappings.
+        """
+        return get_store(self.path_reservation).snapshot().data
+
+    @instrumented
     def hotel_is_registered(self, hotel):
         """
         Check if a hotel is registered.
@@ -65,23 +92,33 @@ class Reservation:
             the hotel is registered and the index of the hotel in
             the list of registered hotels.
         """
-        data = self.read_file(self.path_reservation)
+        data = self.snapshot()
         for i, element in enumerate(data):
             if (element['hotel_name'] == hotel['hotel_name'] and
                     element['location'] == hotel['location']):
                 return (True, i)
         return (False, -1)
 
-    def create(self, hotel, customer):
+    @contextmanager
+    def transaction(self):
         """
-        Create a new reservation for a hotel.
+        Hold the exclusive lock of the reservations file.
+
+        Every change reads, changes and writes the file inside the lock,
+        so concurrent changes are applied one after the other.
+        """
+        with file_lock(self.path_reservation):
+            yield
+
+    def add_reservation(self, data_reservation, hotel, customer):
+        """
+        Add a reservation to the reservations read from the file.
 
         Parameters:
+            - data_reservation (list): The hotels with their reservations.
             - hotel (dict): A dictionary with hotel data.
             - customer (dict): The customer data for the reservation.
-
         """
-        data_reservation = self.read_file(self.path_reservation)
         hotel_in_list, idx = self.hotel_is_registered(hotel)
         if (hotel_in_list and
                 data_reservation[idx].get('reservations') is not None):
@@ -91,19 +128,126 @@ class Reservation:
             data_reservation.append(hotel)
             data_reservation[-1]['reservations'] = [customer]
             data_reservation[-1]['rooms'] -= 1
-        self.write_file(data_reservation)
 
+    @instrumented
+    def create(self, hotel, customer):
+        """
+        Create a new reservation for a hotel.
+
+        Parameters:
+            - hotel (dict): A dictionary with hotel data.
+            - customer (dict): The customer data for the reservation.
+
+        """
+        with self.transaction():
+            data_reservation = self.read_file(self.path_reservation)
+            self.add_reservation(data_reservation, hotel, customer)
+            self.write_file(data_reservation)
+
+    def use_waitlist(self, waitlist):
+        """
+        Queue customers when a hotel is full.
+
+        Once a waitlist is set, create_or_wait adds the customer to it
+        when the hotel is full, and cancel books the freed room for the
+        next waiting customer in the same write.
+
+        Parameters:
+            - waitlist (Waitlist): The waitlists of the hotels, None to
+              stop using them.
+        """
+        self.waitlist = waitlist
+
+    @instrumented
+    def create_or_wait(self, hotel, customer, priority=0):
+        """
+        Create a reservation or, when the hotel is full, join its waitlist.
+
+        The rooms are checked and taken while holding the lock of the
+        file, so concurrent callers never book more rooms than there are.
+        The rooms of the reservations file are the only ones checked, as
+        they are the ones cancel gives back or hands to the next waiter;
+        a hotel not in the file yet starts with the rooms of its data.
+
+        Parameters:
+            - hotel (dict): A dictionary with hotel data.
+            - customer (dict): The customer data for the reservation.
+            - priority (int): The waitlist priority, lower values are
+              served first.
+
+        Returns:
+            tuple: A tuple containing a boolean indicating whether the
+            reservation was created and the position in the waitlist,
+            0 when the reservation was created.
+        """
+        assert self.waitlist is not None, 'No waitlist in use'
+        with self.transaction():
+            data_reservation = self.read_file(self.path_reservation)
+            hotel_in_list, idx = self.hotel_is_registered(hotel)
+            rooms = (data_reservation[idx]['rooms'] if hotel_in_list
+                     else hotel['rooms'])
+            if rooms < 1:
+                return (False, self.waitlist.enqueue(hotel, customer,
+                                                     priority))
+            self.add_reservation(data_reservation, hotel, customer)
+            self.write_file(data_reservation)
+        return (True, 0)
+
+    def release_room(self, element, hotel, write):
+        """
+        Give the room of a canceled reservation back, or to the next
+        waiting customer, and write the change.
+
+        The waiter is only removed from the waitlist once the write
+        succeeded; if it fails, the waitlist is left as it was.
+
+        Parameters:
+            - element (dict): The hotel data with its reservations, the
+              canceled one already removed.
+            - hotel (dict): A dictionary with hotel data.
+            - write (function): Writes the changed hotel data.
+
+        Returns:
+            dict: The waiting customer who got the room, None when the
+            room was made available.
+        """
+        if self.waitlist is None:
+            element['rooms'] += 1
+            write()
+            return None
+        with self.waitlist.transaction():
+            waiter = self.waitlist.take(hotel)
+            if waiter is None:
+                element['rooms'] += 1
+            else:
+                element['reservations'] += [waiter]
+            write()
+        return waiter
+
+    @instrumented
     def cancel(self, hotel, customer):
         """
         Cancel an existing reservation for a hotel.
 
+        When a waitlist is in use and a customer is waiting, the room is
+        booked for that customer instead of being made available. This
+        is the only place waiting customers get a room, so callers give
+        the room back with Hotel.cancel_reservation only when no waiter
+        is returned.
+
         Parameters:
             - hotel (dict): A dictionary with hotel data.
             - customer (dict): The customer data of the reservation to cancel.
+
+        Returns:
+            dict: The waiting customer who got the room, None when the
+            room was made available.
         """
-        data_reservation = self.read_file(self.path_reservation)
-        hotel_in_list, idx = self.hotel_is_registered(hotel)
-        assert hotel_in_list, 'Hotel not registered'
-        data_reservation[idx]['reservations'].remove(customer)
-        data_reservation[idx]['rooms'] += 1
-        self.write_file(data_reservation)
+        with self.transaction():
+            data_reservation = self.read_file(self.path_reservation)
+            hotel_in_list, idx = self.hotel_is_registered(hotel)
+            assert hotel_in_list, 'Hotel not registered'
+            data_reservation[idx]['reservations'].remove(customer)
+            return self.release_room(
+                data_reservation[idx], hotel,
+                lambda: self.write_file(data_reservation))
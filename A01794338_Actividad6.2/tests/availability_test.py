@@ -0,0 +1,148 @@
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+from availability import AvailabilityTable
+from hotel import Hotel
+
+PATH = 'hotels.json'
+HOTEL = {'hotel_name': 'Westin', 'location': 'Los Angeles', 'rooms': 103}
+HOTEL_2 = {'hotel_name': 'Grand Hyatt', 'location': 'Tokyo', 'rooms': 0}
+HOTEL_3 = {'hotel_name': 'Hilton', 'location': 'Mexico City', 'rooms': 115}
+
+
+def book_rooms(name, lock, attempts, results):
+    table = AvailabilityTable.attach(name, lock)
+    booked = 0
+    for _ in range(attempts):
+        try:
+            table.reserve(HOTEL)
+            booked += 1
+        except AssertionError:
+            pass
+    results.put(booked)
+    table.close()
+
+
+class TestAvailabilityTable(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, PATH)
+        shutil.copy(PATH, self.path)
+        self.lock = multiprocessing.Lock()
+        self.table = AvailabilityTable.create(self.path, self.lock)
+
+    def tearDown(self):
+        self.table.close()
+        shutil.rmtree(self.directory)
+
+    def test_registered_method_matches_hotel_class(self):
+        new_hotel = Hotel()
+        new_hotel.path = self.path
+        self.assertEqual(self.table.hotel_is_registered(HOTEL), new_hotel.hotel_is_registered(HOTEL))
+        self.assertEqual(self.table.hotel_is_registered(HOTEL_3), (False, -1))
+
+    def test_reserve_method_raises_assertionerror_when_no_rooms(self):
+        self.assertRaises(AssertionError, self.table.reserve, HOTEL_2)
+
+    def test_reserve_method_raises_assertionerror_when_hotel_not_registered(self):
+        self.assertRaises(AssertionError, self.table.reserve, HOTEL_3)
+
+    def test_attached_table_sees_the_same_rooms(self):
+        other = AvailabilityTable.attach(self.table.name, self.lock)
+        self.table.reserve(HOTEL)
+        self.assertEqual(other.rooms(HOTEL), 102)
+        other.close()
+
+    def test_workers_never_oversell(self):
+        results = multiprocessing.Queue()
+        workers = [multiprocessing.Process(target=book_rooms, args=(self.table.name, self.lock, 40, results))
+                   for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        booked = sum(results.get() for _ in workers)
+        for worker in workers:
+            worker.join()
+        self.assertEqual(booked, 103)
+        self.assertEqual(self.table.rooms(HOTEL), 0)
+
+    def test_persist_method_writes_rooms_to_file(self):
+        self.table.reserve(HOTEL)
+        self.assertTrue(self.table.persist(self.path))
+        self.assertFalse(self.table.persist(self.path))
+        with open(self.path, 'r', encoding='utf-8') as file:
+            self.assertEqual(json.load(file)[1]['rooms'], 102)
+
+    def test_hotel_reserves_through_the_table(self):
+        new_hotel = Hotel()
+        new_hotel.path = self.path
+        new_hotel.use_availability(self.table)
+        new_hotel.reserve_room(HOTEL)
+        new_hotel.cancel_reservation(HOTEL)
+        new_hotel.reserve_room(HOTEL)
+        self.assertEqual(self.table.rooms(HOTEL), 102)
+        self.assertRaises(AssertionError, new_hotel.reserve_room, HOTEL_2)
+        self.table.start_persisting(self.path, interval=0.01)
+        self.table.stop_persisting()
+        self.assertEqual(new_hotel.read_file(self.path)[1]['rooms'], 102)
+
+    def test_hotel_create_and_rename_update_the_table(self):
+        new_hotel = Hotel()
+        new_hotel.path = self.path
+        new_hotel.use_availability(self.table)
+        other = AvailabilityTable.attach(self.table.name, self.lock)
+        new_hotel.create(HOTEL_3, self.path)
+        new_hotel.reserve_room(HOTEL_3)
+        self.assertEqual(other.rooms(HOTEL_3), 114)
+        renamed = dict(HOTEL_3, hotel_name='Hilton Reforma')
+        new_hotel.modify_info(HOTEL_3, 'hotel_name', 'Hilton Reforma')
+        self.assertEqual(other.hotel_is_registered(HOTEL_3), (False, -1))
+        self.assertEqual(other.rooms(renamed), 114)
+        other.close()
+        data = new_hotel.read_file(self.path)
+        self.assertEqual(data[-1], dict(renamed, rooms=114))
+
+    def test_modify_info_keeps_rooms_not_yet_persisted(self):
+        new_hotel = Hotel()
+        new_hotel.path = self.path
+        new_hotel.use_availability(self.table)
+        new_hotel.reserve_room(HOTEL)
+        new_hotel.modify_info(HOTEL_2, 'location', 'Kyoto')
+        data = new_hotel.read_file(self.path)
+        self.assertEqual(data[1]['rooms'], 102)
+        self.assertEqual(data[2]['location'], 'Kyoto')
+        self.assertFalse(self.table.persist(self.path))
+
+    def test_hotel_delete_removes_the_hotel_from_the_table(self):
+        new_hotel = Hotel()
+        new_hotel.path = self.path
+        new_hotel.use_availability(self.table)
+        new_hotel.delete(HOTEL_2)
+        self.assertEqual(self.table.hotel_is_registered(HOTEL_2), (False, -1))
+        self.assertEqual(self.table.hotel_is_registered(HOTEL), (True, 1))
+        self.assertEqual(self.table.hotel_is_registered({'hotel_name': 'Sheraton', 'location': 'New York'}), (True, 2))
+
+    def test_removed_slots_are_reused(self):
+        table = AvailabilityTable.create(self.path, self.lock, capacity=4)
+        table.remove(HOTEL)
+        table.add(HOTEL_3, 3)
+        table.remove(HOTEL_3)
+        table.add(HOTEL, 0)
+        self.assertEqual(table.rooms(HOTEL), 103)
+        self.assertEqual(table.hotel_is_registered(HOTEL_3), (False, -1))
+        table.close()
+
+    def test_attached_table_does_not_reserve_a_removed_hotel(self):
+        other = AvailabilityTable.attach(self.table.name, self.lock)
+        other.rooms(HOTEL)
+        self.table.remove(HOTEL)
+        self.table.add(dict(HOTEL_3, rooms=0), 3)
+        self.assertRaises(AssertionError, other.reserve, HOTEL)
+        self.assertRaises(AssertionError, other.reserve, HOTEL_3)
+        other.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
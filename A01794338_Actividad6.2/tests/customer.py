@@ -5,10 +5,66 @@ This module provides a class Customer for managing customer data,
 including methods for reading and writing data to JSON files,
 creating, deleting, displaying, and modifying customer information.
 
+The public methods report their calls, latency and the bytes they read
+and write to the listeners of the metrics module.
+
+Records are listed from the immutable snapshot of the file, as the
+other readers do: a listing walks the snapshot one record at a time,
+copying only the records it yields, so a page costs no file read while
+the snapshot is current and stays consistent while writers publish new
+versions. display_info writes its output in large buffered blocks
+instead of one print call per line.
+
 Classes:
     - Customer: A class for managing customer information.
+
+Functions:
+    - format_record(number, element): Format a record as display_info.
 """
-import json
+import os
+import sys
+from itertools import islice
+
+from customer_index import CustomerIndex
+from metrics import instrumented, record_file
+from json_stream import load_json, open_text
+from storage import get_store
+
+BUFFER_SIZE = 1 << 16
+
+
+def format_record(number, element):
+    """
+    Format a record the way display_info shows it.
+
+    Parameters:
+        - number (int): The position of the record, starting at 1.
+        - element (dict): The record.
+
+    Returns:
+        str: The formatted record.
+    """
+    lines = [f'------{number}------\n']
+    for key, value in element.items():
+        lines.append(f'{key}: {value}\n')
+    lines.append('-'*15 + '\n\n')
+    return ''.join(lines)
+
+
+def match_fields(conditions):
+    """
+    Return a filter keeping the records with the given field values.
+
+    Parameters:
+        - conditions (dict): The fields mapped to their expected values.
+
+    Returns:
+        function: A function returning True for the matching records.
+    """
+    def matches(element):
+        return all(element.get(key) == value
+                   for key, value in conditions.items())
+    return matches
 
 
 class Customer:
@@ -18,21 +74,32 @@ class Customer:
     Methods:
         - read_file(path): Read data from a JSON file.
         - write_file(data): Write data to a JSON file.
+        - snapshot(): Return an immutable snapshot of the JSON file.
         - create(new_element, path): Create a new customer and save it to
           a JSON file.
         - delete(element): Delete a customer and save changes to a JSON file.
         - display_info(): Display customers stored information from
           a JSON file.
+        - iter_records(offset, limit, fields, where): Yield the stored
+          records from the snapshot.
+        - page(cursor, limit, fields, where): Return a page of records
+          and the cursor of the next page.
         - modify_info(customer, feature, new_value): Modify stored information
           for a customer.
+        - search_by_name(first_name): Find customers by first name.
+        - search_by_last_name(last_name): Find customers by last name.
+        - search_by_phone_prefix(prefix): Find customers by phone prefix.
     """
     def __init__(self):
         self.path = ''
         self.new_element = {}
+        self.index = None
+        self.index_signature = None
 
+    @instrumented
     def read_file(self, path):
         """
-        Read data from a JSON file.
+        Read data from a JSON file, compressed or not.
 
         Parameters:
             - path (str): The path to the JSON file.
@@ -40,23 +107,40 @@ class Customer:
         Returns:
             dict: Data read from the JSON file.
         """
-        with open(path, 'r', encoding='utf-8') as file:
-            data = json.load(file)
+        with open_text(path) as file:
+            data = load_json(file)
         file.close()
+        record_file('read', path)
         assert isinstance(data, list), 'Data does not have correct format'
         return data
 
+    @instrumented
     def write_file(self, data):
         """
         Write data to a JSON file.
 
+        The file is replaced atomically and the new version becomes the
+        current snapshot, so readers never see a half-written file.
+
         Parameters:
             - data (dict): The data to write to the JSON file.
         """
-        with open(self.path, 'w', encoding='utf-8') as file:
-            json.dump(data, file, indent=4)
-        file.close()
+        get_store(self.path).publish(data)
+
+    @instrumented
+    def snapshot(self):
+        """
+        Return an immutable snapshot of the JSON file.
+
+        Taking a snapshot needs no lock and the snapshot stays
+        consistent while writers publish newer versions.
 
+        Returns:
+            tuple: The records of the file as read-only mappings.
+        """
+        return get_store(self.path).snapshot().data
+
+    @instrumented
     def create(self, new_element, path):
         """
         Create a new customer profile.
@@ -70,10 +154,13 @@ class Customer:
         self.path = path
         self.new_element = new_element
         list_info = self.read_file(self.path)
+        in_sync = self.index_in_sync()
         if self.new_element not in list_info:
             list_info.append(self.new_element)
             self.write_file(list_info)
+            self.update_index(in_sync, added=self.new_element)
 
+    @instrumented
     def delete(self, element):
         """
         Delete a customer and save changes to a JSON file.
@@ -82,21 +169,108 @@ class Customer:
             - element (str): Customer data.
         """
         data = self.read_file(self.path)
+        in_sync = self.index_in_sync()
         assert element in data, 'Element is not in the list'
         data.remove(element)
         self.write_file(data)
+        self.update_index(in_sync, removed=element)
 
-    def display_info(self):
+    @instrumented
+    def display_info(self, *, offset=0, limit=None, fields=None, where=None,
+                     stream=None, buffer_size=BUFFER_SIZE):
         """
         Display stored information from a JSON file.
+
+        The records are taken from the snapshot of the file and written
+        in blocks of about buffer_size characters, each block being
+        flushed as soon as it is full.
+
+        Parameters:
+            - offset, limit, fields, where: See iter_records.
+            - stream (file): The output stream, sys.stdout when None.
+            - buffer_size (int): The characters written at a time.
         """
-        data = self.read_file(self.path)
-        for i, element in enumerate(data, start=1):
-            print(f'------{i}------')
-            for key, value in element.items():
-                print(f'{key}: {value}')
-            print('-'*15 + '\n')
+        if stream is None:
+            stream = sys.stdout
+        buffer = []
+        size = 0
+        for number, element in self.iter_records(offset, limit, fields,
+                                                  where):
+            text = format_record(number, element)
+            buffer.append(text)
+            size += len(text)
+            if size >= buffer_size:
+                stream.write(''.join(buffer))
+                stream.flush()
+                buffer = []
+                size = 0
+        if buffer:
+            stream.write(''.join(buffer))
+            stream.flush()
+
+    def iter_records(self, offset=0, limit=None, fields=None, where=None,
+                     after=0):
+        """
+        Yield copies of the stored records one at a time, walking the
+        snapshot of the JSON file.
+
+        Parameters:
+            - offset (int): The number of matching records to skip.
+            - limit (int): The maximum number of records, all when None.
+            - fields (list): The fields to keep, all when None.
+            - where (dict, function): Keep the records having the given
+              field values, or for which the function returns True.
+            - after (int): Skip the first records of the file without
+              filtering them, as given by a page cursor.
 
+        Yields:
+            tuple: The position of the record in the file, starting at
+            1, and the record.
+        """
+        if limit is not None and limit <= 0:
+            return
+        if isinstance(where, dict):
+            where = match_fields(where)
+        records = islice(self.snapshot(), after, None)
+        matched = 0
+        for number, element in enumerate(records, start=after + 1):
+            if where is not None and not where(element):
+                continue
+            matched += 1
+            if matched <= offset:
+                continue
+            if fields is None:
+                element = dict(element)
+            else:
+                element = {key: element[key] for key in fields
+                           if key in element}
+            yield number, element
+            if limit is not None and matched - offset >= limit:
+                return
+
+    @instrumented
+    def page(self, cursor=0, limit=20, fields=None, where=None):
+        """
+        Return a page of the stored records.
+
+        Parameters:
+            - cursor (int): The cursor returned with the previous page,
+              0 for the first page.
+            - limit (int): The maximum number of records of the page.
+            - fields, where: See iter_records.
+
+        Returns:
+            tuple: The (position, record) pairs of the page and the
+            cursor of the next page, None after the last page.
+        """
+        assert limit > 0, 'Limit must be positive'
+        records = list(self.iter_records(limit=limit + 1, fields=fields,
+                                         where=where, after=cursor))
+        if len(records) <= limit:
+            return records, None
+        return records[:limit], records[limit - 1][0]
+
+    @instrumented
     def modify_info(self, element, feature, new_value):
         """
         Modify stored information for a customer in a JSON file.
@@ -107,8 +281,109 @@ class Customer:
             - new_value (str,int): The new value for the specified field.
         """
         data = self.read_file(self.path)
+        in_sync = self.index_in_sync()
         assert element in data, 'Customer not found'
         index = data.index(element)
         assert feature in data[index].keys(), 'Feature not found'
+        removed = dict(data[index])
         data[index][feature] = new_value
         self.write_file(data)
+        self.update_index(in_sync, removed=removed, added=data[index])
+
+    def file_signature(self):
+        """
+        Return the values used to detect that the JSON file changed.
+
+        Returns:
+            tuple: The inode, modification time and size of the file.
+        """
+        stat = os.stat(self.path)
+        return (self.path, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def index_in_sync(self):
+        """
+        Check if the search index still matches the JSON file.
+
+        Returns:
+            bool: True when the index was built or updated from the
+            current contents of the file.
+        """
+        return (self.index is not None and
+                self.index_signature == self.file_signature())
+
+    def update_index(self, in_sync, removed=None, added=None):
+        """
+        Apply a change to the search index after writing the JSON file.
+
+        The index is dropped, to be rebuilt by the next search, when it
+        was not in sync with the file before the change.
+
+        Parameters:
+            - in_sync (bool): Whether the index matched the file before
+              the change.
+            - removed (dict): The customer removed from the file.
+            - added (dict): The customer added to the file.
+        """
+        if not in_sync:
+            self.index = None
+            return
+        if removed is not None:
+            self.index.remove(removed)
+        if added is not None:
+            self.index.add(added)
+        self.index_signature = self.file_signature()
+
+    def get_index(self):
+        """
+        Return the search index, building it if the file changed.
+
+        Returns:
+            CustomerIndex: The index of the customers in the JSON file.
+        """
+        if not self.index_in_sync():
+            signature = self.file_signature()
+            self.index = CustomerIndex(self.read_file(self.path))
+            self.index_signature = signature
+        return self.index
+
+    @instrumented
+    def search_by_name(self, first_name):
+        """
+        Find customers by first name, ignoring case and accents.
+
+        Parameters:
+            - first_name (str): The first name to look for.
+
+        Returns:
+            list: The matching customers.
+        """
+        return self.get_index().search_name(first_name)
+
+    @instrumented
+    def search_by_last_name(self, last_name):
+        """
+        Find customers by last name, ignoring case and accents.
+
+        Parameters:
+            - last_name (str): The last name to look for.
+
+        Returns:
+            list: The matching customers.
+        """
+        return self.get_index().search_last_name(last_name)
+
+    @instrumented
+    def search_by_phone_prefix(self, prefix, limit=None):
+        """
+        Find customers whose phone number starts with some digits.
+
+        A prefix without any digit matches no customer.
+
+        Parameters:
+            - prefix (str): The first digits of the phone number.
+            - limit (int): The maximum number of customers to return.
+
+        Returns:
+            list: The matching customers ordered by phone number.
+        """
+        return self.get_index().search_phone_prefix(prefix, limit)
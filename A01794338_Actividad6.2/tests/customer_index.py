@@ -0,0 +1,191 @@
+"""
+Module for searching customers without scanning the customers file.
+
+This module provides an in-memory index over customer records with a
+hash map on the normalized first and last names and a sorted array of
+phone digits searched with bisect for phone prefixes. Records can be
+added and removed one at a time, so the index is maintained
+incrementally instead of being rebuilt after every change. Searches
+return copies of the indexed records, so callers cannot change them.
+
+Classes:
+    - CustomerIndex: An index of customers by name and phone prefix.
+"""
+import json
+import re
+import unicodedata
+from bisect import bisect_left, insort
+
+NON_DIGITS = re.compile(r'\D')
+
+
+def normalize_name(name):
+    """
+    Normalize a name so that case, accents and spaces do not matter.
+
+    Parameters:
+        - name (str): The name to normalize.
+
+    Returns:
+        str: The normalized name.
+    """
+    name = str(name)
+    if name.isascii():
+        return ' '.join(name.lower().split())
+    decomposed = unicodedata.normalize('NFKD', name)
+    stripped = ''.join(char for char in decomposed
+                       if not unicodedata.combining(char))
+    return ' '.join(stripped.casefold().split())
+
+
+def record_identity(element):
+    """
+    Return a hashable value identifying a customer record by content.
+
+    Parameters:
+        - element (dict): A dictionary with customer data.
+
+    Returns:
+        The identity of the record.
+    """
+    try:
+        return tuple(sorted(element.items()))
+    except TypeError:
+        return json.dumps(element, sort_keys=True)
+
+
+def normalize_phone(phone_number):
+    """
+    Keep only the digits of a phone number.
+
+    Parameters:
+        - phone_number (str): The phone number to normalize.
+
+    Returns:
+        str: The digits of the phone number.
+    """
+    return NON_DIGITS.sub('', str(phone_number))
+
+
+class CustomerIndex:
+    """
+    Class that indexes customers by name, last name and phone prefix.
+
+    Methods:
+        - add(element): Add a customer to the index.
+        - remove(element): Remove a customer from the index.
+        - search_name(first_name): Find customers by first name.
+        - search_last_name(last_name): Find customers by last name.
+        - search_phone_prefix(prefix): Find customers by phone prefix.
+    """
+    def __init__(self, data=()):
+        self.records = {}
+        self.identities = {}
+        self.first_names = {}
+        self.last_names = {}
+        self.phones = []
+        self.next_id = 0
+        for element in data:
+            self.add(element, keep_sorted=False)
+        self.phones.sort()
+
+    def add(self, element, keep_sorted=True):
+        """
+        Add a customer to the index.
+
+        Parameters:
+            - element (dict): A dictionary with customer data.
+            - keep_sorted (bool): Whether to insert the phone number in
+              order, False when the caller sorts the phones afterwards.
+        """
+        record_id = self.next_id
+        self.next_id += 1
+        self.records[record_id] = dict(element)
+        identity = record_identity(element)
+        self.identities.setdefault(identity, []).append(record_id)
+        self.first_names.setdefault(
+            normalize_name(element.get('first_name', '')), []
+        ).append(record_id)
+        self.last_names.setdefault(
+            normalize_name(element.get('last_name', '')), []
+        ).append(record_id)
+        phone = (normalize_phone(element.get('phone_number', '')), record_id)
+        if keep_sorted:
+            insort(self.phones, phone)
+        else:
+            self.phones.append(phone)
+
+    def remove(self, element):
+        """
+        Remove one occurrence of a customer from the index.
+
+        Parameters:
+            - element (dict): A dictionary with customer data.
+        """
+        identity = record_identity(element)
+        record_ids = self.identities.get(identity)
+        assert record_ids, 'Element is not in the index'
+        record_id = record_ids.pop(0)
+        if not record_ids:
+            del self.identities[identity]
+        del self.records[record_id]
+        for names, field in ((self.first_names, 'first_name'),
+                             (self.last_names, 'last_name')):
+            name = normalize_name(element.get(field, ''))
+            names[name].remove(record_id)
+            if not names[name]:
+                del names[name]
+        phone = (normalize_phone(element.get('phone_number', '')), record_id)
+        del self.phones[bisect_left(self.phones, phone)]
+
+    def search_name(self, first_name):
+        """
+        Find customers by first name.
+
+        Parameters:
+            - first_name (str): The first name to look for.
+
+        Returns:
+            list: The matching customers.
+        """
+        record_ids = self.first_names.get(normalize_name(first_name), [])
+        return [dict(self.records[record_id]) for record_id in record_ids]
+
+    def search_last_name(self, last_name):
+        """
+        Find customers by last name.
+
+        Parameters:
+            - last_name (str): The last name to look for.
+
+        Returns:
+            list: The matching customers.
+        """
+        record_ids = self.last_names.get(normalize_name(last_name), [])
+        return [dict(self.records[record_id]) for record_id in record_ids]
+
+    def search_phone_prefix(self, prefix, limit=None):
+        """
+        Find customers whose phone number starts with some digits.
+
+        Separators are ignored, so '55-33' and '5533' are the same prefix.
+        A prefix without any digit matches no customer.
+
+        Parameters:
+            - prefix (str): The first digits of the phone number.
+            - limit (int): The maximum number of customers to return.
+
+        Returns:
+            list: The matching customers ordered by phone number.
+        """
+        digits = normalize_phone(prefix)
+        if not digits:
+            return []
+        position = bisect_left(self.phones, (digits, -1))
+        results = []
+        while (position < len(self.phones) and
+               self.phones[position][0].startswith(digits) and
+               (limit is None or len(results) < limit)):
+            results.append(dict(self.records[self.phones[position][1]]))
+            position += 1
+        return results
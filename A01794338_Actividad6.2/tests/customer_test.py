@@ -1,3 +1,6 @@
+import os
+import shutil
+import tempfile
 import unittest
 import sys
 from io import StringIO
@@ -70,5 +73,78 @@ class TestCustomer(unittest.TestCase):
         self.cust.create(CUSTOMER, PATH)
         self.assertRaises(AssertionError, self.cust.modify_info, CUSTOMER, 'name', 'Omar')
 
+    def test_search_by_last_name_ignores_case(self):
+        self.cust.create(CUSTOMER_3, PATH)
+        self.assertIn(CUSTOMER_3, self.cust.search_by_last_name(' garcia '))
+
+    def test_search_by_name_returns_empty_list_when_not_found(self):
+        self.cust.create(CUSTOMER, PATH)
+        self.assertEqual(self.cust.search_by_name('Nobody'), [])
+
+    def test_search_by_phone_prefix_without_digits_returns_nothing(self):
+        self.cust.create(CUSTOMER, PATH)
+        self.assertTrue(self.cust.search_by_phone_prefix('2'))
+        for prefix in ('', '-', ' () '):
+            self.assertEqual(self.cust.search_by_phone_prefix(prefix), [])
+
+    def test_search_by_phone_prefix_ignores_separators(self):
+        self.cust.create(CUSTOMER, PATH)
+        self.assertIn(CUSTOMER_2, self.cust.search_by_phone_prefix('5533'))
+        self.assertNotIn(CUSTOMER_3, self.cust.search_by_phone_prefix('55-33'))
+
+    def test_search_index_is_updated_on_create_and_delete(self):
+        self.cust.create(CUSTOMER, PATH)
+        self.cust.search_by_last_name('Garcia')
+        self.cust.create(CUSTOMER_1, PATH)
+        self.assertIn(CUSTOMER_1, self.cust.search_by_phone_prefix('245'))
+        self.cust.delete(CUSTOMER_1)
+        self.assertNotIn(CUSTOMER_1, self.cust.search_by_last_name('Garcia'))
+
+    def test_search_index_is_updated_on_modify(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, PATH)
+        shutil.copy(PATH, path)
+        self.cust.create(CUSTOMER, path)
+        self.cust.search_by_last_name('Gomez')
+        self.cust.modify_info(CUSTOMER, 'last_name', 'Gómez Ruiz')
+        modified = dict(CUSTOMER, last_name='Gómez Ruiz')
+        self.assertIn(modified, self.cust.search_by_last_name('gomez ruiz'))
+        self.assertNotIn(CUSTOMER, self.cust.search_by_last_name('Gomez'))
+
+    def test_search_results_are_copies(self):
+        self.cust.create(CUSTOMER, PATH)
+        self.cust.search_by_name('Isabella')[0]['first_name'] = 'Changed'
+        self.assertIn(CUSTOMER, self.cust.search_by_name('Isabella'))
+
+    def test_page_cursor_walks_every_record_once(self):
+        self.cust.create(CUSTOMER, PATH)
+        data = self.cust.read_file(PATH)
+        records, cursor = self.cust.page(limit=4)
+        self.assertEqual(cursor, 4)
+        rest, cursor = self.cust.page(cursor, limit=4)
+        self.assertIsNone(cursor)
+        self.assertEqual([element for _, element in records + rest], data)
+
+    def test_iter_records_filters_and_projects_fields(self):
+        self.cust.create(CUSTOMER, PATH)
+        records = list(self.cust.iter_records(fields=['phone_number'], where={'first_name': 'Sergio'}))
+        self.assertEqual(records, [(1, {'phone_number': '55-33-98-01-18'}), (3, {'phone_number': '956-745-8509'})])
+        self.assertEqual(list(self.cust.iter_records(offset=1, limit=1, where={'first_name': 'Sergio'})), [(3, self.cust.read_file(PATH)[2])])
+
+    def test_display_method_prints_a_page_in_the_same_format(self):
+        captured_output = StringIO()
+        self.cust.create(CUSTOMER, PATH)
+        self.cust.display_info(offset=1, limit=1, stream=captured_output, buffer_size=1)
+        self.assertEqual(captured_output.getvalue(), "------2------\nfirst_name: Selef\nlast_name: Garcia\nphone_number: 55-45-96-54-23\n---------------\n\n")
+
+    def test_iter_records_reads_the_snapshot_and_yields_copies(self):
+        self.cust.create(CUSTOMER, PATH)
+        snapshot = self.cust.snapshot()
+        records = [element for _, element in self.cust.iter_records()]
+        self.assertEqual(records, [dict(element) for element in snapshot])
+        records[0]['first_name'] = 'Changed'
+        self.assertNotEqual(self.cust.snapshot()[0]['first_name'], 'Changed')
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,303 @@
+"""
+Module for auditing the consistency of the hotel data files.
+
+This module provides a class that cross-checks the customers, hotels
+and reservations files with hash joins: each file is read once and
+indexed in a dictionary, so the audit is linear in the number of
+records instead of the nested lookups of hotel_is_registered. It
+reports:
+
+    - duplicate_hotels: hotels registered more than once in hotels.json.
+    - duplicate_reservations: hotels listed more than once in
+      reservations.json.
+    - orphan_reservations: reservation entries of hotels that are not
+      in hotels.json.
+    - unknown_customers: reserved customers that are not in
+      customers.json.
+    - room_mismatches: hotels whose rooms differ between hotels.json
+      and reservations.json.
+
+The optional repair needs two explicit policies. The duplicates policy
+picks the entry kept for a hotel listed more than once: the first, the
+last or the one with the most rooms. In reservations.json the
+reservations of the other entries are moved to the kept one. The rooms
+policy settles the room mismatches: keep both files as they are, copy
+the rooms of hotels.json into reservations.json, or the other way
+round. The repair also registers the hotels of orphan reservations and
+adds the unknown customers. Reservations themselves are never deleted,
+and every entry or room count that is dropped is listed in the result.
+
+Usage:
+    python integrity.py customers.json hotels.json reservations.json
+    python integrity.py customers.json hotels.json reservations.json \\
+        --repair --duplicates most_rooms --rooms hotels
+
+Classes:
+    - IntegrityAudit: Cross-checks the three data files.
+"""
+import argparse
+import json
+
+from customer import Customer
+from customer_index import record_identity
+from storage import get_store
+
+FIRST = 'first'
+LAST = 'last'
+MOST_ROOMS = 'most_rooms'
+DUPLICATE_POLICIES = (FIRST, LAST, MOST_ROOMS)
+KEEP = 'keep'
+FROM_HOTELS = 'hotels'
+FROM_RESERVATIONS = 'reservations'
+ROOMS_POLICIES = (KEEP, FROM_HOTELS, FROM_RESERVATIONS)
+
+
+def hotel_key(element):
+    """
+    Return the key identifying a hotel.
+
+    Parameters:
+        - element (dict): A dictionary with hotel data.
+
+    Returns:
+        tuple: The hotel name and location.
+    """
+    return (element['hotel_name'], element['location'])
+
+
+def find_duplicates(data):
+    """
+    Return the positions of the hotels listed more than once.
+
+    Parameters:
+        - data (list): The hotels, from hotels.json or reservations.json.
+
+    Returns:
+        dict: The keys of every hotel mapped to their positions.
+    """
+    positions = {}
+    for position, element in enumerate(data):
+        positions.setdefault(hotel_key(element), []).append(position)
+    return positions
+
+
+def deduplicate(data, policy, name, discarded):
+    """
+    Keep one entry of every hotel listed more than once.
+
+    The reservations of the dropped entries are moved to the kept one,
+    whose rooms go down by the number of reservations it received.
+
+    Parameters:
+        - data (list): The hotels, from hotels.json or reservations.json.
+        - policy (str): One of DUPLICATE_POLICIES.
+        - name (str): The name of the file, for the discarded list.
+        - discarded (list): Receives the dropped entries.
+
+    Returns:
+        list: The hotels with one entry per hotel.
+    """
+    kept = []
+    for positions in find_duplicates(data).values():
+        if policy == FIRST:
+            chosen = positions[0]
+        elif policy == LAST:
+            chosen = positions[-1]
+        else:
+            chosen = max(positions, key=lambda i: data[i]['rooms'])
+        element = data[chosen]
+        for position in positions:
+            if position == chosen:
+                continue
+            discarded.append({'file': name, 'reason': 'duplicate',
+                              'position': position, 'entry': data[position],
+                              'kept_position': chosen})
+            moved = [customer for customer
+                     in data[position].get('reservations') or []
+                     if customer not in (element.get('reservations') or [])]
+            if moved:
+                element['reservations'] = (
+                    element.get('reservations') or []) + moved
+                element['rooms'] -= len(moved)
+        kept.append((chosen, element))
+    return [element for _, element in sorted(kept, key=lambda item: item[0])]
+
+
+class IntegrityAudit:
+    """
+    Class that cross-checks the customers, hotels and reservations files.
+
+    Methods:
+        - run(): Read the files once and return the findings.
+        - repair(duplicates, rooms): Fix the findings following the
+          given policies.
+    """
+    def __init__(self, path_customers, path_hotels, path_reservations):
+        self.path_customers = path_customers
+        self.path_hotels = path_hotels
+        self.path_reservations = path_reservations
+        self.customers = []
+        self.hotels = []
+        self.reservations = []
+        self.report = None
+
+    def run(self):
+        """
+        Read the three files once and return the findings.
+
+        Returns:
+            dict: The findings of the audit and the record counts.
+        """
+        reader = Customer()
+        self.customers = reader.read_file(self.path_customers)
+        self.hotels = reader.read_file(self.path_hotels)
+        self.reservations = reader.read_file(self.path_reservations)
+
+        known_customers = {record_identity(element)
+                           for element in self.customers}
+        hotel_positions = find_duplicates(self.hotels)
+
+        report = {'duplicate_hotels': [], 'duplicate_reservations': [],
+                  'orphan_reservations': [], 'unknown_customers': [],
+                  'room_mismatches': []}
+        for finding, data, positions_of in (
+                ('duplicate_hotels', self.hotels, hotel_positions),
+                ('duplicate_reservations', self.reservations,
+                 find_duplicates(self.reservations))):
+            for (name, location), positions in positions_of.items():
+                if len(positions) > 1:
+                    report[finding].append({
+                        'hotel_name': name, 'location': location,
+                        'positions': positions,
+                        'rooms': [data[i]['rooms'] for i in positions]})
+        for position, element in enumerate(self.reservations):
+            key = hotel_key(element)
+            for customer in element.get('reservations') or []:
+                if record_identity(customer) not in known_customers:
+                    report['unknown_customers'].append({
+                        'hotel_name': key[0], 'location': key[1],
+                        'customer': customer})
+            if key not in hotel_positions:
+                report['orphan_reservations'].append({
+                    'hotel_name': key[0], 'location': key[1],
+                    'position': position,
+                    'reservations': len(element.get('reservations') or [])})
+                continue
+            hotel_rooms = self.hotels[hotel_positions[key][0]]['rooms']
+            if element.get('rooms') != hotel_rooms:
+                report['room_mismatches'].append({
+                    'hotel_name': key[0], 'location': key[1],
+                    'hotels_rooms': hotel_rooms,
+                    'reservations_rooms': element.get('rooms')})
+        report['counts'] = {
+            'customers': len(self.customers), 'hotels': len(self.hotels),
+            'reservations': len(self.reservations),
+            'findings': sum(len(value) for value in report.values())}
+        self.report = report
+        return report
+
+    def repair(self, *, duplicates, rooms):
+        """
+        Fix the findings of the last audit following explicit policies.
+
+        Parameters:
+            - duplicates (str): Which entry of a hotel listed more than
+              once is kept, one of DUPLICATE_POLICIES.
+            - rooms (str): Where the rooms of a mismatch are taken from,
+              one of ROOMS_POLICIES; 'keep' leaves both files unchanged.
+
+        Returns:
+            dict: The policies used, the number of changes made to each
+            file and the entries and room counts that were discarded.
+        """
+        assert duplicates in DUPLICATE_POLICIES, \
+            f'Duplicates policy must be one of {DUPLICATE_POLICIES}'
+        assert rooms in ROOMS_POLICIES, \
+            f'Rooms policy must be one of {ROOMS_POLICIES}'
+        if self.report is None:
+            self.run()
+        changes = {'hotels': 0, 'customers': 0, 'reservations': 0}
+        discarded = []
+
+        hotels = deduplicate(self.hotels, duplicates, 'hotels', discarded)
+        reservations = deduplicate(self.reservations, duplicates,
+                                   'reservations', discarded)
+        changes['hotels'] = len(self.hotels) - len(hotels)
+        changes['reservations'] = len(self.reservations) - len(reservations)
+
+        registered = {hotel_key(element): element for element in hotels}
+        for element in reservations:
+            if hotel_key(element) not in registered:
+                new_hotel = {key: value for key, value in element.items()
+                             if key != 'reservations'}
+                registered[hotel_key(element)] = new_hotel
+                hotels.append(new_hotel)
+                changes['hotels'] += 1
+
+        known_customers = {record_identity(element)
+                           for element in self.customers}
+        for finding in self.report['unknown_customers']:
+            identity = record_identity(finding['customer'])
+            if identity not in known_customers:
+                known_customers.add(identity)
+                self.customers.append(finding['customer'])
+                changes['customers'] += 1
+
+        for element in reservations:
+            hotel = registered[hotel_key(element)]
+            if rooms == KEEP or element.get('rooms') == hotel['rooms']:
+                continue
+            source, target, name = ((hotel, element, 'reservations')
+                                    if rooms == FROM_HOTELS else
+                                    (element, hotel, 'hotels'))
+            discarded.append({'file': name, 'reason': 'rooms',
+                              'hotel_name': element['hotel_name'],
+                              'location': element['location'],
+                              'rooms': target.get('rooms'),
+                              'replaced_by': source['rooms']})
+            target['rooms'] = source['rooms']
+            changes[name] += 1
+
+        for path, data, name in ((self.path_hotels, hotels, 'hotels'),
+                                 (self.path_customers, self.customers,
+                                  'customers'),
+                                 (self.path_reservations, reservations,
+                                  'reservations')):
+            if changes[name]:
+                get_store(path).publish(data)
+        self.hotels = hotels
+        self.reservations = reservations
+        self.report = None
+        return {'policies': {'duplicates': duplicates, 'rooms': rooms},
+                'changes': changes, 'discarded': discarded}
+
+
+def main():
+    """
+    Audit the data files and print the findings as JSON.
+    """
+    parser = argparse.ArgumentParser(
+        description='Cross-check customers, hotels and reservations.')
+    parser.add_argument('customers', help='Path to the customers file')
+    parser.add_argument('hotels', help='Path to the hotels file')
+    parser.add_argument('reservations', help='Path to the reservations file')
+    parser.add_argument('--repair', action='store_true',
+                        help='Fix the findings following the policies')
+    parser.add_argument('--duplicates', choices=DUPLICATE_POLICIES,
+                        help='Entry kept for a hotel listed more than once')
+    parser.add_argument('--rooms', choices=ROOMS_POLICIES,
+                        help='File the rooms of a mismatch are taken from')
+    args = parser.parse_args()
+    if args.repair and (args.duplicates is None or args.rooms is None):
+        parser.error('--repair needs --duplicates and --rooms')
+
+    audit = IntegrityAudit(args.customers, args.hotels, args.reservations)
+    report = audit.run()
+    if args.repair:
+        report['repaired'] = audit.repair(duplicates=args.duplicates,
+                                          rooms=args.rooms)
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+import os
+import shutil
+import tempfile
+import unittest
+from customer import Customer
+from integrity import IntegrityAudit
+from storage import get_store
+
+FILES = ('customers.json', 'hotels.json', 'reservations.json')
+CUSTOMER = {'first_name': 'Carmen', 'last_name': 'Ruiz', 'phone_number': '55-10-20-30-40'}
+
+class TestIntegrityAudit(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.paths = [os.path.join(self.directory, name) for name in FILES]
+        for name, path in zip(FILES, self.paths):
+            shutil.copy(name, path)
+        self.audit = IntegrityAudit(*self.paths)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_run_method_reports_duplicate_hotels(self):
+        report = self.audit.run()
+        self.assertEqual([(finding['hotel_name'], finding['positions']) for finding in report['duplicate_hotels']],
+                         [('Sheraton', [3, 4])])
+
+    def test_run_method_reports_orphan_reservations(self):
+        report = self.audit.run()
+        self.assertEqual([finding['hotel_name'] for finding in report['orphan_reservations']],
+                         ['InterContinental', 'Ritz-Carlton'])
+
+    def test_run_method_reports_unknown_customers_and_room_mismatches(self):
+        report = self.audit.run()
+        self.assertEqual(len(report['unknown_customers']), 2)
+        self.assertEqual(report['room_mismatches'][0]['reservations_rooms'], 85)
+
+    def test_repair_method_leaves_no_findings(self):
+        self.audit.run()
+        self.audit.repair(duplicates='most_rooms', rooms='hotels')
+        report = IntegrityAudit(*self.paths).run()
+        self.assertEqual(report['counts']['findings'], 0)
+        self.assertEqual(report['counts']['reservations'], 3)
+
+    def test_repair_method_follows_duplicates_policy_and_reports_dropped_entries(self):
+        result = self.audit.repair(duplicates='most_rooms', rooms='hotels')
+        hotels = get_store(self.paths[1]).snapshot().data
+        self.assertEqual([element['rooms'] for element in hotels if element['hotel_name'] == 'Sheraton'], [84])
+        dropped = [(entry['file'], entry['reason']) for entry in result['discarded']]
+        self.assertEqual(dropped, [('hotels', 'duplicate'), ('reservations', 'rooms')])
+        self.assertEqual(result['discarded'][0]['entry']['rooms'], 0)
+        self.assertEqual((result['discarded'][1]['rooms'], result['discarded'][1]['replaced_by']), (85, 84))
+
+    def test_repair_method_keeps_room_counts_by_default_policy(self):
+        result = self.audit.repair(duplicates='first', rooms='keep')
+        reservations = get_store(self.paths[2]).snapshot().data
+        self.assertEqual(reservations[0]['rooms'], 85)
+        self.assertEqual(len(IntegrityAudit(*self.paths).run()['room_mismatches']), 1)
+        self.assertEqual([entry['reason'] for entry in result['discarded']], ['duplicate'])
+
+    def test_repair_method_raises_assertionerror_without_valid_policy(self):
+        self.assertRaises(AssertionError, self.audit.repair, duplicates='any', rooms='keep')
+        self.assertRaises(TypeError, self.audit.repair)
+
+    def test_duplicate_reservations_are_reported_and_merged(self):
+        store = get_store(self.paths[2])
+        reservations = [dict(element) for element in Customer().read_file(self.paths[2])]
+        reservations.append({'hotel_name': 'Sheraton', 'location': 'New York', 'rooms': 80,
+                             'reservations': [CUSTOMER]})
+        store.publish(reservations)
+        report = self.audit.run()
+        self.assertEqual([(finding['positions'], finding['rooms']) for finding in report['duplicate_reservations']],
+                         [([0, 3], [85, 80])])
+        self.audit.repair(duplicates='first', rooms='keep')
+        merged = get_store(self.paths[2]).snapshot().data
+        self.assertEqual(len(merged), 3)
+        self.assertIn(CUSTOMER, merged[0]['reservations'])
+        self.assertEqual(merged[0]['rooms'], 84)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import io
+import json
+import unittest
+from json_stream import iter_json_records, load_json
+
+
+def records(text, chunk_size=3):
+    return list(iter_json_records(io.StringIO(text), chunk_size))
+
+
+class TestJsonStream(unittest.TestCase):
+    def test_array_is_read_one_record_at_a_time(self):
+        data = [{'hotel_name': 'Westin', 'rooms': index} for index in range(20)]
+        self.assertEqual(records(json.dumps(data), 5), data)
+
+    def test_numbers_cut_by_a_chunk_boundary_are_read_in_full(self):
+        self.assertEqual(records('[1.5]'), [1.5])
+        self.assertEqual(records('[12e3, 2.25E-3]', 2), [12000.0, 0.00225])
+
+    def test_concatenated_objects_are_accepted(self):
+        self.assertEqual(records('{"a": 1} {"b": 2}'), [{'a': 1}, {'b': 2}])
+
+    def test_truncated_array_raises_jsondecodeerror(self):
+        for text in ('[', '[1', '[1,', '[{"a": 1}'):
+            self.assertRaises(json.JSONDecodeError, records, text)
+
+    def test_text_after_the_array_raises_jsondecodeerror(self):
+        for text in ('[1] 2 {"a": 1}', '[1][2]', '{"a": 1} [2]'):
+            self.assertRaises(json.JSONDecodeError, records, text)
+
+    def test_load_json_reads_arrays_and_objects(self):
+        self.assertEqual(load_json(io.StringIO('[1, 2]'), 2), [1, 2])
+        self.assertEqual(load_json(io.StringIO('{"a": [1]}'), 2), {'a': [1]})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from io import StringIO
+from hotel import Hotel
+from metrics import Histogram, MetricsRegistry, TraceListener, add_listener, remove_listener
+from reservation import Reservation
+
+HOTEL = {'hotel_name': 'Westin', 'location': 'Los Angeles', 'rooms': 103}
+CUSTOMER = {'first_name': 'Isabella', 'last_name': 'Gomez', 'phone_number': '234-567-8901'}
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.new_hotel = Hotel()
+        self.new_hotel.path = os.path.join(self.directory, 'hotels.json')
+        shutil.copy('hotels.json', self.new_hotel.path)
+        self.registry = MetricsRegistry()
+        add_listener(self.registry)
+
+    def tearDown(self):
+        remove_listener(self.registry)
+        shutil.rmtree(self.directory)
+
+    def test_registry_counts_calls_and_bytes(self):
+        self.new_hotel.reserve_room(HOTEL)
+        metrics = self.registry.to_dict()
+        size = os.path.getsize(self.new_hotel.path)
+        self.assertEqual(metrics['Hotel.reserve_room']['calls'], 1)
+        self.assertEqual(metrics['Hotel.read_file']['bytes_read'], size)
+        self.assertEqual(metrics['Hotel.write_file']['bytes_written'], size)
+        self.assertGreaterEqual(metrics['Hotel.reserve_room']['bytes_written'], size)
+        self.assertEqual(metrics['Hotel.reserve_room']['latency']['buckets']['+Inf'], 0)
+
+    def test_registry_counts_errors(self):
+        self.assertRaises(AssertionError, self.new_hotel.reserve_room, {'hotel_name': 'Nowhere', 'location': 'None'})
+        self.assertEqual(self.registry.to_dict()['Hotel.reserve_room']['errors'], 1)
+
+    def test_reservation_create_is_exported_as_json_and_text(self):
+        path = os.path.join(self.directory, 'reservations.json')
+        shutil.copy('reservations.json', path)
+        Reservation(path).create(dict(HOTEL), CUSTOMER)
+        self.assertEqual(json.loads(self.registry.to_json())['Reservation.create']['calls'], 1)
+        self.assertIn('Reservation.create', self.registry.format_text())
+
+    def test_no_calls_are_reported_without_listeners(self):
+        remove_listener(self.registry)
+        self.new_hotel.hotel_is_registered(HOTEL)
+        self.assertEqual(self.registry.to_dict(), {})
+
+    def test_trace_listener_writes_a_line_per_call(self):
+        stream = StringIO()
+        tracer = TraceListener(stream)
+        add_listener(tracer)
+        try:
+            self.new_hotel.hotel_is_registered(HOTEL)
+        finally:
+            remove_listener(tracer)
+        self.assertRegex(stream.getvalue(), r'Hotel.snapshot .* ok\nHotel.hotel_is_registered .* ok\n')
+
+    def test_histogram_percentiles(self):
+        histogram = Histogram()
+        for seconds in [0.0002] * 98 + [0.3, 20.0]:
+            histogram.add(seconds)
+        self.assertEqual(histogram.percentile(0.5), 0.00025)
+        self.assertEqual(histogram.percentile(0.99), 0.5)
+        self.assertEqual(histogram.percentile(1.0), 20.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
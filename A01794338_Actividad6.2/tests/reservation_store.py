@@ -0,0 +1,370 @@
+"""
+Module for managing hotel reservations partitioned per hotel.
+
+This module provides a class that stores the reservations of every
+(hotel_name, location) pair in its own shard file inside a directory,
+next to a small manifest listing the shards. Creating or canceling a
+reservation only reads and rewrites the shard of the affected hotel,
+and every shard has its own lock, so writers working on different
+hotels never wait for each other.
+
+The methods inherited from Reservation that work on the whole file
+(read_file and write_file on the manifest path, snapshot) are routed to
+the shards, so they never read or overwrite the manifest as if it were
+a reservations file. The overridden methods are measured by the
+metrics module like those of Reservation.
+
+Classes:
+    - PartitionedReservation: A Reservation stored one shard per hotel.
+
+Functions:
+    - migrate(path_reservation, directory): Split a reservations file
+      into shards.
+"""
+import hashlib
+import os
+import re
+import warnings
+from contextlib import contextmanager
+
+from reservation import Reservation
+from json_stream import load_json, open_text
+from metrics import instrumented
+from storage import file_lock, freeze, write_json_atomic
+
+MANIFEST = 'manifest.json'
+
+
+class PartitionedReservation(Reservation):
+    """
+    Class that manages hotel reservations stored one shard per hotel.
+
+    Inherits from:
+        Reservation: A class for managing hotel reservations.
+
+    Methods:
+        - shard_name(hotel): Return the shard file name of a hotel.
+        - read_shard(hotel): Read the shard of a hotel.
+        - write_shard(data): Write the shard of a hotel atomically.
+        - read_manifest(): Read the manifest of the shards.
+        - read_file(path): Read a reservations file, or every shard.
+        - write_file(data): Replace every shard.
+        - snapshot(): Return an immutable copy of every shard.
+        - hotel_is_registered(hotel): Check if a hotel has a shard.
+        - create(hotel, customer): Create a new reservation for a hotel.
+        - create_or_wait(hotel, customer, priority): Create a reservation
+          or join the waitlist of the hotel.
+        - cancel(hotel, customer): Cancel an existing reservation for
+          a hotel.
+    """
+    def __init__(self, directory):
+        super().__init__(os.path.join(directory, MANIFEST))
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def shard_name(self, hotel):
+        """
+        Return the shard file name of a hotel.
+
+        The name is derived from the hotel key, so finding a shard never
+        requires reading the manifest.
+
+        Parameters:
+            - hotel (dict): A dictionary with hotel data.
+
+        Returns:
+            str: The file name of the shard.
+        """
+        key = f"{hotel['hotel_name']}\0{hotel['location']}"
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]
+        slug = re.sub(r'[^a-z0-9]+', '-', key.lower()).strip('-')[:40]
+        return f'{slug}-{digest}.json'
+
+    @contextmanager
+    def locked(self, name):
+        """
+        Hold an exclusive lock on a shard or on the manifest.
+
+        Parameters:
+            - name (str): The file name to lock.
+        """
+        with file_lock(os.path.join(self.directory, name)):
+            yield
+
+    def write_json(self, name, data):
+        """
+        Write a JSON file of the directory atomically.
+
+        Parameters:
+            - name (str): The file name inside the directory.
+            - data: The data to write.
+        """
+        write_json_atomic(os.path.join(self.directory, name), data)
+
+    def read_manifest(self):
+        """
+        Read the manifest of the shards.
+
+        Returns:
+            dict: The shard file names mapped to their hotel key.
+        """
+        if not os.path.exists(self.path_reservation):
+            return {}
+        with open_text(self.path_reservation) as file:
+            data = load_json(file)
+        assert isinstance(data, dict), 'Manifest does not have correct format'
+        return data
+
+    @instrumented
+    def read_file(self, path):
+        """
+        Read a reservations file, or every shard for the manifest path.
+
+        Parameters:
+            - path (str): The path to a JSON file.
+
+        Returns:
+            list: The hotels with their reservations, in manifest order
+            for the manifest path.
+        """
+        if os.path.abspath(path) != os.path.abspath(self.path_reservation):
+            return super().read_file(path)
+        data = []
+        for hotel in self.read_manifest().values():
+            shard = self.read_shard(hotel)
+            if shard is not None:
+                data.append(shard)
+        return data
+
+    @instrumented
+    def write_file(self, data):
+        """
+        Replace every shard with the hotels of a reservations list.
+
+        The shards of hotels missing from the list are removed, so the
+        store holds exactly the given hotels, as Reservation.write_file
+        would leave its file.
+
+        Parameters:
+            - data (list): The hotels with their reservations.
+        """
+        assert isinstance(data, list), 'Data does not have correct format'
+        with self.locked(MANIFEST):
+            old_manifest = self.read_manifest()
+            manifest = {}
+            for element in data:
+                name = self.shard_name(element)
+                assert name not in manifest, \
+                    f"Duplicate hotel {element['hotel_name']}, " \
+                    f"{element['location']}"
+                with self.locked(name):
+                    self.write_shard(element)
+                manifest[name] = {'hotel_name': element['hotel_name'],
+                                  'location': element['location']}
+            self.write_json(MANIFEST, manifest)
+            for name in old_manifest.keys() - manifest.keys():
+                with self.locked(name):
+                    os.remove(os.path.join(self.directory, name))
+
+    @instrumented
+    def snapshot(self):
+        """
+        Return an immutable copy of every shard.
+
+        Returns:
+            tuple: The hotels with their reservations as read-only
+            mappings.
+        """
+        return freeze(self.read_file(self.path_reservation))
+
+    def register_shard(self, hotel):
+        """
+        Add the shard of a hotel to the manifest.
+
+        Parameters:
+            - hotel (dict): A dictionary with hotel data.
+        """
+        with self.locked(MANIFEST):
+            manifest = self.read_manifest()
+            manifest[self.shard_name(hotel)] = {
+                'hotel_name': hotel['hotel_name'],
+                'location': hotel['location']}
+            self.write_json(MANIFEST, manifest)
+
+    def read_shard(self, hotel):
+        """
+        Read the shard of a hotel.
+
+        Parameters:
+            - hotel (dict): A dictionary with hotel data.
+
+        Returns:
+            dict: The hotel data with its reservations, None when the
+            hotel has no shard.
+        """
+        path = os.path.join(self.directory, self.shard_name(hotel))
+        if not os.path.exists(path):
+            return None
+        with open_text(path) as file:
+            data = load_json(file)
+        assert isinstance(data, dict), 'Shard does not have correct format'
+        return data
+
+    def write_shard(self, data):
+        """
+        Write the shard of a hotel atomically.
+
+        Parameters:
+            - data (dict): The hotel data with its reservations.
+        """
+        self.write_json(self.shard_name(data), data)
+
+    @instrumented
+    def hotel_is_registered(self, hotel):
+        """
+        Check if a hotel has a shard.
+
+        Parameters:
+            - hotel (dict): A dictionary with hotel data.
+
+        Returns:
+            tuple: A tuple containing a boolean indicating whether the
+            hotel is registered and the index of the hotel in the list
+            returned by read_file and snapshot, as for Reservation.
+        """
+        name = self.shard_name(hotel)
+        if not os.path.exists(os.path.join(self.directory, name)):
+            return (False, -1)
+        position = 0
+        for other in self.read_manifest():
+            if other == name:
+                return (True, position)
+            if os.path.exists(os.path.join(self.directory, other)):
+                position += 1
+        return (False, -1)
+
+    def reserve_in_shard(self, hotel, customer, priority=None):
+        """
+        Add a reservation to the shard of a hotel while holding its lock.
+
+        Parameters:
+            - hotel (dict): A dictionary with hotel data.
+            - customer (dict): The customer data for the reservation.
+            - priority (int): When given and the hotel is full, the
+              customer joins the waitlist with this priority instead.
+
+        Returns:
+            tuple: A tuple containing a boolean indicating whether the
+            reservation was created and the position in the waitlist,
+            0 when the reservation was created.
+        """
+        name = self.shard_name(hotel)
+        with self.locked(name):
+            data = self.read_shard(hotel)
+            rooms = hotel['rooms'] if data is None else data['rooms']
+            if priority is not None and rooms < 1:
+                return (False, self.waitlist.enqueue(hotel, customer,
+                                                     priority))
+            new_shard = data is None
+            if new_shard:
+                data = dict(hotel)
+                data['reservations'] = []
+            elif data.get('reservations') is None:
+                data['reservations'] = []
+            data['reservations'] += [customer]
+            data['rooms'] -= 1
+            self.write_shard(data)
+        if new_shard:
+            self.register_shard(hotel)
+        return (True, 0)
+
+    @instrumented
+    def create(self, hotel, customer):
+        """
+        Create a new reservation for a hotel.
+
+        Parameters:
+            - hotel (dict): A dictionary with hotel data.
+            - customer (dict): The customer data for the reservation.
+        """
+        self.reserve_in_shard(hotel, customer)
+
+    @instrumented
+    def create_or_wait(self, hotel, customer, priority=0):
+        """
+        Create a reservation or, when the hotel is full, join its waitlist.
+
+        Parameters:
+            - hotel (dict): A dictionary with hotel data.
+            - customer (dict): The customer data for the reservation.
+            - priority (int): The waitlist priority, lower values are
+              served first.
+
+        Returns:
+            tuple: See reserve_in_shard.
+        """
+        assert self.waitlist is not None, 'No waitlist in use'
+        return self.reserve_in_shard(hotel, customer, priority)
+
+    @instrumented
+    def cancel(self, hotel, customer):
+        """
+        Cancel an existing reservation for a hotel.
+
+        Parameters:
+            - hotel (dict): A dictionary with hotel data.
+            - customer (dict): The customer data of the reservation to cancel.
+
+        Returns:
+            dict: The waiting customer who got the room, None when the
+            room was made available.
+        """
+        with self.locked(self.shard_name(hotel)):
+            data = self.read_shard(hotel)
+            assert data is not None, 'Hotel not registered'
+            data['reservations'].remove(customer)
+            return self.release_room(data, hotel,
+                                     lambda: self.write_shard(data))
+
+
+def migrate(path_reservation, directory):
+    """
+    Split a single reservations file into one shard per hotel.
+
+    When a hotel appears more than once, its entries are merged into the
+    first one, as Reservation.hotel_is_registered would find it first:
+    the reservations of the later entries are appended to it and, as
+    every reservation holds a room, its rooms are reduced by their
+    number. A warning names every merged hotel.
+
+    Parameters:
+        - path_reservation (str): The path to the reservations file.
+        - directory (str): The directory receiving the shards.
+
+    Returns:
+        PartitionedReservation: The partitioned reservations.
+    """
+    store = PartitionedReservation(directory)
+    data = store.read_file(path_reservation)
+    manifest = store.read_manifest()
+    shards = {}
+    for element in data:
+        name = store.shard_name(element)
+        if name in manifest:
+            continue
+        shard = shards.get(name)
+        if shard is None:
+            shards[name] = dict(element)
+            continue
+        merged = element.get('reservations') or []
+        shard['reservations'] = (shard.get('reservations') or []) + merged
+        shard['rooms'] -= len(merged)
+        warnings.warn(f"Merged duplicate entry of {element['hotel_name']}, "
+                      f"{element['location']} with {len(merged)} "
+                      f"reservations")
+    for name, shard in shards.items():
+        store.write_shard(shard)
+        manifest[name] = {'hotel_name': shard['hotel_name'],
+                          'location': shard['location']}
+    store.write_json(MANIFEST, manifest)
+    return store
@@ -0,0 +1,114 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import warnings
+from metrics import MetricsRegistry, add_listener, remove_listener
+from reservation_store import PartitionedReservation, migrate
+
+PATH = 'reservations.json'
+HOTEL_1 = {'hotel_name': 'Sheraton', 'location': 'New York', 'rooms': 85}
+HOTEL_2 = {'hotel_name': 'InterContinental', 'location': 'London', 'rooms': 57}
+HOTEL_3 = {'hotel_name': 'Westin', 'location': 'Los Angeles', 'rooms': 104}
+CUSTOMER = {'first_name': 'Isabella', 'last_name': 'Gomez', 'phone_number': '234-567-8901'}
+CUSTOMER_1 = {'first_name': 'Omar', 'last_name': 'Esparza', 'phone_number': '55-33-98-01-18'}
+
+class TestPartitionedReservation(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = migrate(PATH, self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_migrate_creates_one_shard_per_hotel(self):
+        data = self.store.read_file(PATH)
+        keys = {(element['hotel_name'], element['location']) for element in data}
+        self.assertEqual(len(self.store.read_manifest()), len(keys))
+
+    def test_migrate_keeps_reservations(self):
+        shard = self.store.read_shard(HOTEL_1)
+        self.assertEqual(shard, self.store.read_file(PATH)[0])
+
+    def test_registered_method_returns_True_if_hotel_exists(self):
+        self.assertEqual(True, self.store.hotel_is_registered(HOTEL_1)[0])
+
+    def test_registered_method_returns_the_index_of_the_hotel(self):
+        hotel_in_list, idx = self.store.hotel_is_registered(HOTEL_2)
+        self.assertEqual(True, hotel_in_list)
+        self.assertEqual(self.store.snapshot()[idx]['hotel_name'], HOTEL_2['hotel_name'])
+        self.assertEqual(self.store.hotel_is_registered(HOTEL_3), (False, -1))
+
+    def test_partitioned_methods_are_measured(self):
+        registry = MetricsRegistry()
+        add_listener(registry)
+        try:
+            self.store.create(HOTEL_1, CUSTOMER_1)
+            self.store.cancel(HOTEL_1, CUSTOMER_1)
+            self.store.hotel_is_registered(HOTEL_1)
+        finally:
+            remove_listener(registry)
+        metrics = registry.to_dict()
+        for name in ('create', 'cancel', 'hotel_is_registered'):
+            self.assertEqual(metrics[f'PartitionedReservation.{name}']['calls'], 1)
+
+    def test_registered_method_returns_False_if_hotel_does_not_exists(self):
+        self.assertEqual(False, self.store.hotel_is_registered(HOTEL_3)[0])
+
+    def test_create_method_only_rewrites_the_affected_shard(self):
+        other = os.path.join(self.directory, self.store.shard_name(HOTEL_2))
+        before = os.stat(other).st_mtime_ns
+        rooms = self.store.read_shard(HOTEL_1)['rooms']
+        self.store.create(HOTEL_1, CUSTOMER_1)
+        self.assertEqual(self.store.read_shard(HOTEL_1)['rooms'], rooms - 1)
+        self.assertEqual(os.stat(other).st_mtime_ns, before)
+
+    def test_create_method_adds_shard_when_hotel_not_registered(self):
+        self.store.create(HOTEL_3, CUSTOMER)
+        shard = self.store.read_shard(HOTEL_3)
+        self.assertEqual(shard['reservations'], [CUSTOMER])
+        self.assertEqual(shard['rooms'], 103)
+        self.assertIn(self.store.shard_name(HOTEL_3), self.store.read_manifest())
+
+    def test_cancel_method_frees_the_room(self):
+        self.store.create(HOTEL_3, CUSTOMER)
+        self.store.cancel(HOTEL_3, CUSTOMER)
+        shard = self.store.read_shard(HOTEL_3)
+        self.assertEqual(shard['reservations'], [])
+        self.assertEqual(shard['rooms'], 104)
+
+    def test_cancel_method_raises_assertionerror_if_hotel_does_not_exists(self):
+        self.assertRaises(AssertionError, self.store.cancel, HOTEL_3, CUSTOMER)
+
+    def test_migrate_merges_duplicate_hotels(self):
+        path = os.path.join(self.directory, 'duplicates.json')
+        data = self.store.read_file(PATH)
+        duplicate = dict(data[0], reservations=[CUSTOMER], rooms=10)
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(data + [duplicate], file)
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            store = migrate(path, os.path.join(self.directory, 'merged'))
+        shard = store.read_shard(HOTEL_1)
+        self.assertEqual(shard['reservations'], data[0]['reservations'] + [CUSTOMER])
+        self.assertEqual(shard['rooms'], data[0]['rooms'] - 1)
+        self.assertEqual(len(caught), 1)
+
+    def test_inherited_file_methods_use_the_shards(self):
+        data = self.store.read_file(self.store.path_reservation)
+        self.assertEqual(data, self.store.read_file(PATH))
+        self.store.write_file(data[:1])
+        self.assertEqual(self.store.read_file(self.store.path_reservation), data[:1])
+        self.assertEqual(list(self.store.read_manifest()), [self.store.shard_name(HOTEL_1)])
+        self.assertEqual(False, self.store.hotel_is_registered(HOTEL_2)[0])
+        self.assertEqual(self.store.snapshot()[0]['rooms'], data[0]['rooms'])
+
+    def test_store_is_found_again_by_a_new_instance(self):
+        self.store.create(HOTEL_3, CUSTOMER)
+        other_store = PartitionedReservation(self.directory)
+        self.assertEqual(other_store.read_shard(HOTEL_3)['reservations'], [CUSTOMER])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,292 @@
+"""
+Module for copy-on-write storage of the JSON data files.
+
+Writers never modify a data file in place: they write a new version to
+a temporary file and atomically rename it over the old one, so a reader
+opening the file sees either the old or the new version, never a half
+written one. Every version read or published is also kept in memory as
+an immutable snapshot, frozen all the way down: records are read-only
+mappings and lists are tuples. Readers grab the current snapshot
+reference without any lock and can keep using it for as long as they
+need, while writers go on publishing newer versions. The stores of at
+most MAX_STORES files are kept, the oldest one being dropped first.
+
+Data files compressed with gzip, bzip2 or xz are handled transparently
+by the json_stream module: they are recognized by their magic bytes,
+also when rewritten, a new file getting the codec of its extension
+(.gz, .bz2, .xz), and are decompressed as a stream without an
+uncompressed copy on disk.
+
+A snapshot is decoded one record at a time by the streaming decoder of
+json_stream, so loading it never holds the whole text of the file on
+top of its records.
+
+Writers that read, change and write a file hold its file_lock, which
+keeps other processes out with fcntl.flock on POSIX systems and
+msvcrt.locking on Windows, on a lock file kept in the temporary
+directory. Where neither is available, only the threads of the process
+are kept apart.
+
+Classes:
+    - Snapshot: An immutable version of a data file.
+    - SnapshotStore: The versions of a single data file.
+
+Functions:
+    - get_store(path): Return the shared store of a data file.
+    - file_lock(path): Hold the exclusive lock of a data file.
+    - write_json_atomic(path, data): Replace a JSON file atomically.
+"""
+import hashlib
+import json
+import os
+import stat
+import tempfile
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+from types import MappingProxyType
+
+from json_stream import detect_codec, load_json, open_text
+from metrics import record_bytes
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+Snapshot = namedtuple('Snapshot', ['version', 'signature', 'data'])
+
+STORES = {}
+STORES_LOCK = threading.Lock()
+MAX_STORES = 64
+THREAD_LOCKS = {}
+LOCK_DIRECTORY = os.path.join(tempfile.gettempdir(), 'hotel-locks')
+
+
+def lock_path(path):
+    """
+    Return the path of the lock file of a data file.
+
+    The data file itself cannot be locked, since every write replaces
+    it with a new file. The lock files of every data file are kept in
+    LOCK_DIRECTORY, named after a hash of the real path of the data
+    file, so no lock file is left next to the data.
+
+    Parameters:
+        - path (str): The path of the data file.
+
+    Returns:
+        str: The path of the lock file.
+    """
+    os.makedirs(LOCK_DIRECTORY, exist_ok=True)
+    digest = hashlib.sha1(os.path.realpath(path).encode('utf-8'))
+    return os.path.join(LOCK_DIRECTORY, digest.hexdigest() + '.lock')
+
+
+def acquire(lock_file):
+    """
+    Take the exclusive lock of an open lock file, waiting for it.
+
+    Parameters:
+        - lock_file (file): The lock file, opened in binary mode.
+    """
+    if fcntl is not None:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        return
+    lock_file.seek(0)
+    while True:
+        try:
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            continue
+
+
+def release(lock_file):
+    """
+    Release the lock taken by acquire.
+
+    Parameters:
+        - lock_file (file): The lock file, opened in binary mode.
+    """
+    if fcntl is not None:
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+        return
+    lock_file.seek(0)
+    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def file_lock(path):
+    """
+    Hold the exclusive lock of a data file.
+
+    Parameters:
+        - path (str): The path of the data file.
+    """
+    if fcntl is None and msvcrt is None:
+        key = os.path.abspath(path)
+        with STORES_LOCK:
+            thread_lock = THREAD_LOCKS.setdefault(key, threading.Lock())
+        with thread_lock:
+            yield
+        return
+    with open(lock_path(path), 'a+b') as lock_file:
+        acquire(lock_file)
+        try:
+            yield
+        finally:
+            release(lock_file)
+
+
+def file_signature(path):
+    """
+    Return the values identifying the current version of a file.
+
+    Parameters:
+        - path (str): The path of the file.
+
+    Returns:
+        tuple: The inode, modification time and size of the file.
+    """
+    status = os.stat(path)
+    return (status.st_ino, status.st_mtime_ns, status.st_size)
+
+
+def freeze(data):
+    """
+    Return a deeply read-only copy of the records of a data file.
+
+    Parameters:
+        - data (list): The records read from a data file.
+
+    Returns:
+        tuple: The records, dictionaries being copied into read-only
+        mappings and lists into tuples at every level.
+    """
+    if isinstance(data, dict):
+        return MappingProxyType({key: freeze(value)
+                                 for key, value in data.items()})
+    if isinstance(data, list):
+        return tuple(freeze(value) for value in data)
+    return data
+
+
+def write_json_atomic(path, data):
+    """
+    Replace a JSON file atomically, keeping the codec of the file it
+    replaces, or the one of its extension for a new file.
+
+    Parameters:
+        - path (str): The path of the JSON file.
+        - data: The data to write.
+
+    Returns:
+        tuple: The signature of the written version, see file_signature.
+    """
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        mode = 0o644
+    directory = os.path.dirname(os.path.abspath(path))
+    descriptor, temp_path = tempfile.mkstemp(
+        dir=directory, prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        codec = detect_codec(path, 'w')
+        if codec is None:
+            with os.fdopen(descriptor, 'w', encoding='utf-8') as file:
+                json.dump(data, file, indent=4)
+        else:
+            with os.fdopen(descriptor, 'wb') as raw_file, \
+                    codec.open(raw_file, 'wt', encoding='utf-8') as file:
+                json.dump(data, file, indent=4)
+        os.chmod(temp_path, mode)
+        signature = file_signature(temp_path)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    record_bytes('written', signature[2])
+    return signature
+
+
+class SnapshotStore:
+    """
+    Class that keeps the latest immutable snapshot of a data file.
+
+    Methods:
+        - snapshot(): Return the current snapshot of the file.
+        - publish(data): Write a new version and make it current.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.current = None
+
+    def snapshot(self):
+        """
+        Return the current snapshot, reading the file only if another
+        writer replaced it since the last snapshot.
+
+        Returns:
+            Snapshot: The version number, file signature and records.
+        """
+        current = self.current
+        signature = file_signature(self.path)
+        if current is not None and current.signature == signature:
+            return current
+        with open_text(self.path) as file:
+            data = load_json(file)
+        record_bytes('read', signature[2])
+        assert isinstance(data, list), 'Data does not have correct format'
+        version = current.version + 1 if current is not None else 1
+        snapshot = Snapshot(version, signature, freeze(data))
+        self.current = snapshot
+        return snapshot
+
+    def publish(self, data):
+        """
+        Write a new version of the file and make it the current snapshot.
+
+        Parameters:
+            - data (list): The records of the new version.
+
+        Returns:
+            Snapshot: The published snapshot.
+        """
+        frozen = freeze(data)
+        signature = write_json_atomic(self.path, data)
+        current = self.current
+        version = current.version + 1 if current is not None else 1
+        snapshot = Snapshot(version, signature, frozen)
+        self.current = snapshot
+        return snapshot
+
+
+def get_store(path):
+    """
+    Return the store of a data file, shared by every object using it.
+
+    Looking up a known store takes no lock. When a new store makes more
+    than MAX_STORES, the oldest one is dropped and its file is simply
+    read again the next time it is needed.
+
+    Parameters:
+        - path (str): The path of the data file.
+
+    Returns:
+        SnapshotStore: The store of the file.
+    """
+    key = os.path.abspath(path)
+    store = STORES.get(key)
+    if store is None:
+        with STORES_LOCK:
+            store = STORES.get(key)
+            if store is None:
+                store = STORES[key] = SnapshotStore(key)
+                while len(STORES) > MAX_STORES:
+                    del STORES[next(iter(STORES))]
+    return store
@@ -0,0 +1,167 @@
+import gzip
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from customer import Customer
+import storage
+from json_stream import open_text
+from storage import file_lock, get_store, write_json_atomic
+
+PATH = 'customers.json'
+CUSTOMER = {'first_name': 'Ana', 'last_name': 'Lopez', 'phone_number': '444-555-6666'}
+
+class TestSnapshotStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, PATH)
+        shutil.copy(PATH, self.path)
+        self.store = get_store(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_get_store_returns_the_same_store_for_a_file(self):
+        self.assertIs(self.store, get_store(os.path.join(self.directory, '.', PATH)))
+
+    def test_snapshot_is_read_only(self):
+        snapshot = self.store.snapshot()
+        with self.assertRaises(TypeError):
+            snapshot.data[0]['first_name'] = 'Omar'
+
+    def test_snapshot_is_read_only_at_every_level(self):
+        path = os.path.join(self.directory, 'reservations.json')
+        shutil.copy('reservations.json', path)
+        reservations = get_store(path).snapshot().data[0]['reservations']
+        self.assertIsInstance(reservations, tuple)
+        with self.assertRaises(TypeError):
+            reservations[0]['first_name'] = 'Omar'
+
+    def test_stores_are_bounded(self):
+        for number in range(storage.MAX_STORES + 1):
+            get_store(os.path.join(self.directory, f'{number}.json'))
+        self.assertEqual(len(storage.STORES), storage.MAX_STORES)
+        self.assertNotIn(os.path.abspath(self.path), storage.STORES)
+
+    def test_snapshot_is_reused_while_file_does_not_change(self):
+        self.assertIs(self.store.snapshot(), self.store.snapshot())
+
+    def test_reader_keeps_its_snapshot_while_writer_publishes(self):
+        snapshot = self.store.snapshot()
+        self.store.publish([dict(element) for element in snapshot.data] + [CUSTOMER])
+        self.assertNotIn(CUSTOMER, snapshot.data)
+        self.assertIn(CUSTOMER, self.store.snapshot().data)
+        self.assertEqual(self.store.snapshot().version, snapshot.version + 1)
+
+    def test_snapshot_sees_changes_made_by_other_writers(self):
+        self.store.snapshot()
+        write_json_atomic(self.path, [CUSTOMER])
+        self.assertEqual(list(self.store.snapshot().data), [CUSTOMER])
+
+    def test_readers_never_see_a_half_written_file(self):
+        cust = Customer()
+        cust.path = self.path
+        errors = []
+        stop = threading.Event()
+
+        def read():
+            while not stop.is_set():
+                try:
+                    with open(self.path, 'r', encoding='utf-8') as file:
+                        json.load(file)
+                except ValueError as error:
+                    errors.append(error)
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        for i in range(50):
+            cust.create(dict(CUSTOMER, phone_number=str(i)), self.path)
+        stop.set()
+        reader.join()
+        self.assertEqual(errors, [])
+
+
+class TestCompressedFiles(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_compressed_files_are_written_and_read_transparently(self):
+        cust = Customer()
+        for extension, magic in (('.gz', b'\x1f\x8b'), ('.bz2', b'BZh'), ('.xz', b'\xfd7zXZ')):
+            path = os.path.join(self.directory, PATH + extension)
+            write_json_atomic(path, cust.read_file(PATH))
+            with open(path, 'rb') as file:
+                self.assertEqual(file.read(len(magic)), magic)
+            cust.create(CUSTOMER, path)
+            self.assertIn(CUSTOMER, cust.read_file(path))
+            self.assertIn(CUSTOMER, get_store(path).snapshot().data)
+
+    def test_compressed_file_is_detected_without_extension(self):
+        path = os.path.join(self.directory, 'customers.data')
+        with gzip.open(path, 'wt', encoding='utf-8') as file:
+            json.dump([CUSTOMER], file)
+        with open_text(path) as file:
+            self.assertEqual(json.load(file), [CUSTOMER])
+
+    def test_rewritten_file_keeps_its_codec(self):
+        path = os.path.join(self.directory, PATH)
+        with gzip.open(path, 'wt', encoding='utf-8') as file:
+            json.dump([CUSTOMER], file)
+        cust = Customer()
+        cust.path = path
+        cust.write_file([CUSTOMER, dict(CUSTOMER, first_name='Eva')])
+        with open(path, 'rb') as file:
+            self.assertEqual(file.read(2), b'\x1f\x8b')
+        self.assertEqual(len(cust.read_file(path)), 2)
+
+
+
+class TestFileLock(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, PATH)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def lock_excludes_other_threads(self):
+        order = []
+        with file_lock(self.path):
+            def other():
+                with file_lock(self.path):
+                    order.append('other')
+            thread = threading.Thread(target=other)
+            thread.start()
+            thread.join(0.2)
+            order.append('first')
+        thread.join()
+        self.assertEqual(order, ['first', 'other'])
+
+    def test_file_lock_excludes_other_threads(self):
+        self.lock_excludes_other_threads()
+
+    def test_file_lock_falls_back_to_thread_locks(self):
+        with mock.patch.object(storage, 'fcntl', None), mock.patch.object(storage, 'msvcrt', None):
+            self.lock_excludes_other_threads()
+
+    def test_lock_file_is_not_left_next_to_the_data(self):
+        with file_lock(self.path):
+            pass
+        self.assertEqual(os.listdir(self.directory), [])
+        self.assertEqual(storage.lock_path(self.path), storage.lock_path(os.path.join(self.directory, '.', PATH)))
+
+    def test_modules_import_without_fcntl(self):
+        code = "import sys; sys.modules['fcntl'] = None; import hotel, reservation, reservation_store, waitlist"
+        subprocess.run([sys.executable, '-c', code], check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import os
+import shutil
+import tempfile
+import unittest
+from availability import NoRoomsError
+from hotel import Hotel
+from reservation import Reservation
+from reservation_store import PartitionedReservation
+from waitlist import Waitlist
+
+HOTEL = {'hotel_name': 'Grand Hyatt', 'location': 'Tokyo', 'rooms': 0}
+HOTEL_1 = {'hotel_name': 'Sheraton', 'location': 'New York', 'rooms': 85}
+HOTEL_2 = {'hotel_name': 'Westin', 'location': 'Los Angeles', 'rooms': 103}
+CUSTOMER = {'first_name': 'Isabella', 'last_name': 'Gomez', 'phone_number': '234-567-8901'}
+CUSTOMER_1 = {'first_name': 'Omar', 'last_name': 'Esparza', 'phone_number': '55-33-98-01-18'}
+CUSTOMER_2 = {'first_name': 'Israel', 'last_name': 'Garcia', 'phone_number': '245-567-8451'}
+
+class TestWaitlist(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.waitlist = Waitlist(os.path.join(self.directory, 'waitlist.json'))
+        self.new_hotel = Hotel()
+        self.new_hotel.path = os.path.join(self.directory, 'hotels.json')
+        shutil.copy('hotels.json', self.new_hotel.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_pop_method_returns_none_when_nobody_waits(self):
+        self.assertIsNone(self.waitlist.pop(HOTEL))
+
+    def test_waiters_are_served_by_priority_then_arrival(self):
+        self.waitlist.enqueue(HOTEL, CUSTOMER)
+        self.waitlist.enqueue(HOTEL, CUSTOMER_1)
+        self.assertEqual(self.waitlist.enqueue(HOTEL, CUSTOMER_2, priority=-1), 1)
+        self.assertEqual(self.waitlist.waiting(HOTEL), [CUSTOMER_2, CUSTOMER, CUSTOMER_1])
+        self.assertEqual(self.waitlist.pop(HOTEL), CUSTOMER_2)
+
+    def test_waitlist_is_shared_through_the_file(self):
+        self.waitlist.enqueue(HOTEL, CUSTOMER)
+        other = Waitlist(self.waitlist.path)
+        self.assertEqual(other.pop(HOTEL), CUSTOMER)
+        self.assertIsNone(self.waitlist.pop(HOTEL))
+
+    def test_remove_method_raises_assertionerror_when_customer_not_waiting(self):
+        self.assertRaises(AssertionError, self.waitlist.remove, HOTEL, CUSTOMER)
+
+    def test_reserve_room_raises_noroomserror_when_full(self):
+        self.assertRaises(NoRoomsError, self.new_hotel.reserve_room, HOTEL)
+
+    def test_cancel_reservation_leaves_waiters_to_reservation(self):
+        self.waitlist.enqueue(HOTEL, CUSTOMER)
+        self.new_hotel.cancel_reservation(HOTEL)
+        self.assertEqual(self.new_hotel.read_file(self.new_hotel.path)[2]['rooms'], 1)
+        self.assertEqual(self.waitlist.waiting(HOTEL), [CUSTOMER])
+
+    def new_reservation(self):
+        path = os.path.join(self.directory, 'reservations.json')
+        shutil.copy('reservations.json', path)
+        new_reservation = Reservation(path)
+        new_reservation.use_waitlist(self.waitlist)
+        return new_reservation
+
+    def test_reservation_cancel_books_next_waiter(self):
+        new_reservation = self.new_reservation()
+        path = new_reservation.path_reservation
+        rooms = new_reservation.read_file(path)[0]['rooms']
+        self.waitlist.enqueue(HOTEL_1, CUSTOMER_2)
+        self.assertEqual(new_reservation.cancel(HOTEL_1, CUSTOMER), CUSTOMER_2)
+        data = new_reservation.read_file(path)[0]
+        self.assertEqual(data['rooms'], rooms)
+        self.assertIn(CUSTOMER_2, data['reservations'])
+        self.assertNotIn(CUSTOMER, data['reservations'])
+
+    def test_reservation_cancel_keeps_waiter_when_write_fails(self):
+        new_reservation = self.new_reservation()
+        self.waitlist.enqueue(HOTEL_1, CUSTOMER_2)
+
+        def fail(data):
+            raise OSError('disk full')
+        new_reservation.write_file = fail
+        self.assertRaises(OSError, new_reservation.cancel, HOTEL_1, CUSTOMER)
+        self.assertEqual(self.waitlist.waiting(HOTEL_1), [CUSTOMER_2])
+
+    def test_reservation_create_or_wait_checks_rooms_of_the_file(self):
+        new_reservation = self.new_reservation()
+        path = new_reservation.path_reservation
+        data = new_reservation.read_file(path)
+        data[0]['rooms'] = 1
+        new_reservation.write_file(data)
+        self.assertEqual(new_reservation.create_or_wait(HOTEL_1, CUSTOMER_1), (True, 0))
+        self.assertEqual(new_reservation.create_or_wait(HOTEL_1, CUSTOMER_2), (False, 1))
+        self.assertEqual(new_reservation.read_file(path)[0]['rooms'], 0)
+
+    def test_reservation_create_or_wait_uses_rooms_of_a_new_hotel(self):
+        new_reservation = self.new_reservation()
+        self.assertEqual(new_reservation.create_or_wait(HOTEL, CUSTOMER), (False, 1))
+        self.assertEqual(new_reservation.create_or_wait(HOTEL, CUSTOMER_1), (False, 2))
+        self.assertEqual(new_reservation.create_or_wait(HOTEL_2, CUSTOMER), (True, 0))
+        self.assertEqual(self.waitlist.waiting(HOTEL_2), [])
+
+    def test_partitioned_reservation_create_or_wait_uses_rooms_of_a_new_hotel(self):
+        new_reservation = PartitionedReservation(os.path.join(self.directory, 'shards'))
+        new_reservation.use_waitlist(self.waitlist)
+        self.assertEqual(new_reservation.create_or_wait(HOTEL, CUSTOMER), (False, 1))
+        self.assertIsNone(new_reservation.read_shard(HOTEL))
+
+    def test_partitioned_reservation_hands_room_to_waiter(self):
+        new_reservation = PartitionedReservation(os.path.join(self.directory, 'shards'))
+        new_reservation.use_waitlist(self.waitlist)
+        new_reservation.create(dict(HOTEL_1, rooms=1), CUSTOMER)
+        self.assertEqual(new_reservation.create_or_wait(HOTEL_1, CUSTOMER_1), (False, 1))
+        self.assertEqual(new_reservation.cancel(HOTEL_1, CUSTOMER), CUSTOMER_1)
+        data = new_reservation.read_shard(HOTEL_1)
+        self.assertEqual(data['rooms'], 0)
+        self.assertEqual(data['reservations'], [CUSTOMER_1])
+        self.assertIsNone(new_reservation.cancel(HOTEL_1, CUSTOMER_1))
+        self.assertEqual(new_reservation.read_shard(HOTEL_1)['rooms'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,180 @@
+"""
+Module for managing the waitlists of fully booked hotels.
+
+This module provides a class that keeps, for every hotel, a heap of the
+customers waiting for a room ordered by priority and then by arrival,
+so that a canceled room is handed to the next waiter instead of clients
+polling the hotels file until a room frees up. Lower priority values
+are served first, 0 being the default.
+
+The waitlists are persisted to a JSON file shared by every process and
+guarded by a lock file:
+
+    {"sequence": 3,
+     "hotels": [{"hotel_name": "Sheraton", "location": "New York",
+                 "queue": [[0, 1, {...customer...}], ...]}]}
+
+Finding the next waiter is O(log n) in memory, but every change
+rewrites the whole file atomically, so persisting it costs O(N) in the
+customers waiting at every hotel. The waitlists are meant to stay
+short; the file is only read again when another process changed it.
+
+Classes:
+    - Waitlist: The waitlists of every hotel.
+"""
+import heapq
+import os
+from contextlib import contextmanager
+
+from json_stream import load_json, open_text
+from storage import file_lock, file_signature, write_json_atomic
+
+
+class Waitlist:
+    """
+    Class that manages the waitlists of every hotel.
+
+    Methods:
+        - enqueue(hotel, customer, priority): Add a customer to the
+          waitlist of a hotel.
+        - pop(hotel): Remove and return the next customer of a hotel.
+        - take(hotel): Remove the next customer of a hotel inside a
+          transaction.
+        - remove(hotel, customer): Take a customer out of a waitlist.
+        - waiting(hotel): Return the waiting customers in serving order.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.sequence = 0
+        self.queues = {}
+        self.signature = None
+
+    @contextmanager
+    def transaction(self, write=True):
+        """
+        Lock the waitlist file and reload it if another process changed
+        it, saving the changes made inside the block. When the block
+        raises, nothing is saved and the changes are forgotten.
+
+        Parameters:
+            - write (bool): Whether the block changes the waitlists.
+        """
+        with file_lock(self.path):
+            try:
+                self.load()
+                yield
+                if write:
+                    self.save()
+            except BaseException:
+                self.signature = None
+                raise
+
+    def load(self):
+        """
+        Read the waitlist file unless it is unchanged since last read.
+        """
+        if not os.path.exists(self.path):
+            self.sequence = 0
+            self.queues = {}
+            self.signature = None
+            return
+        signature = file_signature(self.path)
+        if signature == self.signature:
+            return
+        with open_text(self.path) as file:
+            data = load_json(file)
+        assert isinstance(data, dict), 'Data does not have correct format'
+        self.sequence = data['sequence']
+        self.queues = {(element['hotel_name'], element['location']):
+                       element['queue'] for element in data['hotels']}
+        self.signature = signature
+
+    def save(self):
+        """
+        Write the waitlist file atomically.
+        """
+        hotels = [{'hotel_name': name, 'location': location, 'queue': queue}
+                  for (name, location), queue in self.queues.items()
+                  if queue]
+        self.signature = write_json_atomic(
+            self.path, {'sequence': self.sequence, 'hotels': hotels})
+
+    def enqueue(self, hotel, customer, priority=0):
+        """
+        Add a customer to the waitlist of a hotel.
+
+        Parameters:
+            - hotel (dict): A dictionary with hotel data.
+            - customer (dict): The customer waiting for a room.
+            - priority (int): Lower values are served first.
+
+        Returns:
+            int: The position of the customer in the waitlist, 1 being
+            the next one to be served.
+        """
+        key = (hotel['hotel_name'], hotel['location'])
+        with self.transaction():
+            self.sequence += 1
+            entry = [priority, self.sequence, customer]
+            heapq.heappush(self.queues.setdefault(key, []), entry)
+            return sum(1 for other in self.queues[key] if other <= entry)
+
+    def pop(self, hotel):
+        """
+        Remove and return the next customer waiting for a hotel.
+
+        Parameters:
+            - hotel (dict): A dictionary with hotel data.
+
+        Returns:
+            dict: The customer to confirm, None when nobody is waiting.
+        """
+        with self.transaction():
+            return self.take(hotel)
+
+    def take(self, hotel):
+        """
+        Remove the next customer waiting for a hotel inside a running
+        transaction, so the caller can confirm the customer before the
+        waitlist is saved.
+
+        Parameters:
+            - hotel (dict): A dictionary with hotel data.
+
+        Returns:
+            dict: The customer to confirm, None when nobody is waiting.
+        """
+        queue = self.queues.get((hotel['hotel_name'], hotel['location']))
+        if not queue:
+            return None
+        return heapq.heappop(queue)[2]
+
+    def remove(self, hotel, customer):
+        """
+        Take a customer out of the waitlist of a hotel.
+
+        Parameters:
+            - hotel (dict): A dictionary with hotel data.
+            - customer (dict): The customer leaving the waitlist.
+        """
+        key = (hotel['hotel_name'], hotel['location'])
+        with self.transaction():
+            queue = self.queues.get(key, [])
+            entries = [entry for entry in queue if entry[2] == customer]
+            assert entries, 'Customer is not waiting'
+            queue.remove(entries[0])
+            heapq.heapify(queue)
+
+    def waiting(self, hotel):
+        """
+        Return the customers waiting for a hotel in serving order.
+
+        Parameters:
+            - hotel (dict): A dictionary with hotel data.
+
+        Returns:
+            list: The waiting customers, the next one to be served first.
+        """
+        key = (hotel['hotel_name'], hotel['location'])
+        with self.transaction(write=False):
+            return [entry[2] for entry in sorted(self.queues.get(key, []))]